@@ -0,0 +1,270 @@
+"""
+Maintenance commands.
+
+    python -m app.cli ledger show <session_id> [--failed]
+    python -m app.cli ledger retry <session_id> [--file <key> ...]
+    python -m app.cli indexes ensure
+    python -m app.cli indexes check
+    python -m app.cli usage report <session_id>
+    python -m app.cli usage sessions [--limit N]
+    python -m app.cli usage rebuild <session_id>
+    python -m app.cli mongo connections
+    python -m app.cli mongo rebuild-search
+    python -m app.cli skills top [--limit N]
+    python -m app.cli skills find <skill> [<skill> ...] [--any]
+"""
+import asyncio
+from collections import Counter
+
+import click
+
+from app.schemas.hiring import HiringRequirements
+
+
+@click.group()
+def cli():
+    """Agent HRM maintenance commands."""
+
+
+@cli.group()
+def ledger():
+    """Inspect and retry per-file processing progress."""
+
+
+@ledger.command("show")
+@click.argument("session_id")
+@click.option("--failed", is_flag=True, help="Only list files whose last attempt failed.")
+def ledger_show(session_id: str, failed: bool):
+    """Shows the stage every file of SESSION_ID reached."""
+    asyncio.run(_ledger_show(session_id, failed))
+
+
+async def _ledger_show(session_id: str, failed: bool):
+    from app.services.ledger import ProgressLedger
+
+    entries = await ProgressLedger().entries(session_id)
+    if not entries:
+        raise click.ClickException(f"No ledger entries for session '{session_id}'.")
+
+    stages = Counter(e["stage"] for e in entries.values())
+    failures = sum(1 for e in entries.values() if e.get("status") == "failed")
+    click.echo(f"Session {session_id}: {len(entries)} files, {failures} failed")
+    click.echo("  " + ", ".join(f"{stage}={count}" for stage, count in sorted(stages.items())))
+    click.echo()
+    for file_key, entry in sorted(entries.items()):
+        if failed and entry.get("status") != "failed":
+            continue
+        line = f"{file_key:<50} {entry['stage']:<11} {entry.get('status', 'ok'):<7} attempts={entry.get('attempts', 0)}"
+        if entry.get("status") == "failed":
+            line += f"  [{entry.get('failed_stage')}] {entry.get('error')}"
+        click.echo(line)
+
+
+@ledger.command("retry")
+@click.argument("session_id")
+@click.option("--file", "files", multiple=True, help="File key to retry (default: every failed file).")
+def ledger_retry(session_id: str, files: tuple[str, ...]):
+    """Re-runs the missing stages of failed files of SESSION_ID and saves the results."""
+    asyncio.run(_ledger_retry(session_id, list(files)))
+
+
+async def _ledger_retry(session_id: str, files: list[str]):
+    from app.services.minio_service import MinioHandler
+    from app.services.usage_writer import usage_writer
+    from app.workflow.builder import build_batch_graph
+    from app.workflow.nodes.processing import ledger as progress_ledger, processor
+
+    session = await progress_ledger.get_session(session_id)
+    if not session:
+        raise click.ClickException(f"Unknown session '{session_id}'.")
+    files = files or await progress_ledger.failed_files(session_id)
+    if not files:
+        click.echo("Nothing to retry.")
+        return
+
+    click.echo(f"Retrying {len(files)} files of {session_id}...")
+    graph = build_batch_graph().compile()
+    try:
+        result = await graph.ainvoke({
+            "session_id": session_id,
+            "batch_id": 0,
+            "files_in_batch": files,
+            "hiring_reqs": HiringRequirements.model_validate_json(session["hiring_reqs"]),
+            "ocr_results": {},
+            "structured_results": [],
+            "evaluated_results": [],
+        })
+        saved = await processor.save(session_id, result.get("evaluated_results", []))
+    finally:
+        await usage_writer.close()
+        await MinioHandler.close()
+    click.echo(f"Saved {saved}/{len(files)} files.")
+
+
+@cli.group()
+def indexes():
+    """Create and check the MongoDB indexes."""
+
+
+@indexes.command("ensure")
+def indexes_ensure():
+    """Creates the missing indexes (safe to run repeatedly)."""
+    from app.services.indexes import ensure_indexes
+
+    asyncio.run(ensure_indexes())
+    click.echo("Indexes are in place.")
+
+
+@indexes.command("check")
+def indexes_check():
+    """Reports missing, unused and unexpected indexes per collection."""
+    from app.services.indexes import check_indexes
+
+    report = asyncio.run(check_indexes())
+    problems = 0
+    for collection, result in report.items():
+        click.echo(f"{collection}:")
+        for label in ("missing", "unused", "extra"):
+            names = result[label]
+            problems += len(names) if label == "missing" else 0
+            click.echo(f"  {label:<8} {', '.join(names) if names else '-'}")
+    if problems:
+        raise click.ClickException(f"{problems} missing indexes, run `python -m app.cli indexes ensure`.")
+
+
+@cli.group()
+def usage():
+    """Token usage, cost and throughput per session."""
+
+
+@usage.command("report")
+@click.argument("session_id")
+def usage_report(session_id: str):
+    """Shows the calls, tokens, latency and cost of SESSION_ID per node and model, and per resume."""
+    asyncio.run(_usage_report(session_id))
+
+
+async def _usage_report(session_id: str):
+    from app.services.ledger import ProgressLedger, Stage
+    from app.services.usage_rollups import UsageRollups
+
+    stages = await ProgressLedger().stage_counts(session_id)
+    resumes = stages.get(Stage.EVALUATED.value, 0) + stages.get(Stage.SAVED.value, 0)
+    report = await UsageRollups().session_report(session_id, resumes=resumes or None)
+    if not report["rows"]:
+        raise click.ClickException(f"No usage recorded for session '{session_id}'.")
+
+    def cost(value):
+        return f"{value:.4f}" if value is not None else "-"
+
+    click.echo(f"{'node':<22} {'model':<30} {'calls':>6} {'prompt':>10} {'completion':>10} {'avg ms':>8} {'cost':>10}")
+    for row in report["rows"]:
+        latency = f"{row['avg_latency_ms']:.0f}" if row["avg_latency_ms"] is not None else "-"
+        click.echo(
+            f"{row['node_name']:<22} {row['model_name']:<30} {row['calls']:>6} {row['prompt_tokens']:>10} "
+            f"{row['completion_tokens']:>10} {latency:>8} {cost(row['cost']):>10}"
+        )
+    totals = report["totals"]
+    click.echo(
+        f"{'total':<53} {totals['calls']:>6} {totals['prompt_tokens']:>10} {totals['completion_tokens']:>10} "
+        f"{'':>8} {cost(totals['cost']):>10}"
+    )
+    click.echo()
+    click.echo(f"Duration: {report['duration_s']:.0f}s ({report['first_at']} → {report['last_at']})")
+    if report["resumes"]:
+        click.echo(
+            f"Resumes: {report['resumes']}, {report['tokens_per_resume']:.0f} tokens and "
+            f"{report['calls_per_resume']:.1f} calls per resume, cost per resume {cost(report['cost_per_resume'])}"
+        )
+        if report.get("resumes_per_minute"):
+            click.echo(f"Throughput: {report['resumes_per_minute']:.1f} resumes/min")
+    if report["unpriced_models"]:
+        click.echo(f"No LLM_PRICES entry for: {', '.join(report['unpriced_models'])}")
+
+
+@usage.command("sessions")
+@click.option("--limit", default=20, show_default=True, help="Number of sessions to list.")
+def usage_sessions(limit: int):
+    """Lists the latest sessions with their call and token totals."""
+    from app.services.usage_rollups import UsageRollups
+
+    for session in asyncio.run(UsageRollups().recent_sessions(limit)):
+        click.echo(f"{session['_id']:<50} {session['last_at']}  calls={session['calls']} tokens={session['total_tokens']}")
+
+
+@usage.command("rebuild")
+@click.argument("session_id")
+def usage_rebuild(session_id: str):
+    """Recomputes the rollups of SESSION_ID from its raw usage logs."""
+    from app.services.usage_rollups import UsageRollups
+
+    count = asyncio.run(UsageRollups().rebuild(session_id))
+    click.echo(f"Rolled up {count} usage logs.")
+
+
+@cli.group()
+def mongo():
+    """MongoDB connection diagnostics."""
+
+
+@mongo.command("connections")
+def mongo_connections():
+    """Shows the connections MongoDB has open from all app processes (serverStatus)."""
+    from app.services.mongo_client import server_connections
+
+    connections = asyncio.run(server_connections())
+    if connections is None:
+        raise click.ClickException("serverStatus needs the clusterMonitor role.")
+    click.echo(
+        f"current={connections.get('current')} available={connections.get('available')} "
+        f"total_created={connections.get('totalCreated')} active={connections.get('active', '-')}"
+    )
+
+
+@mongo.command("rebuild-search")
+def mongo_rebuild_search():
+    """Recomputes the flat `search` view of every saved candidate."""
+    from app.services.mongo_service import MongoHandler
+
+    updated = asyncio.run(MongoHandler().rebuild_search_views())
+    click.echo(f"Updated the search view of {updated} candidates.")
+
+
+@cli.group()
+def skills():
+    """Canonical skills of the saved candidates."""
+
+
+@skills.command("top")
+@click.option("--limit", default=20, show_default=True, help="Number of skills to list.")
+def skills_top(limit: int):
+    """Lists the most common canonical skills."""
+    from app.services.mongo_service import MongoHandler
+
+    for row in asyncio.run(MongoHandler().skill_counts(limit)):
+        click.echo(f"{row['_id']:<30} {row['candidates']}")
+
+
+@skills.command("find")
+@click.argument("names", nargs=-1, required=True)
+@click.option("--any", "match_any", is_flag=True, help="Candidates with any (not all) of the skills.")
+def skills_find(names: tuple[str, ...], match_any: bool):
+    """Lists candidates with the given skills (any alias or spelling)."""
+    from utils.skill_taxonomy import canonical_skills
+
+    click.echo(f"Skills: {', '.join(canonical_skills(names))}")
+    for candidate in asyncio.run(_skills_find(list(names), match_any)):
+        name = candidate["resume"]["personal_info"].get("full_name")
+        click.echo(f"{str(candidate['_id']):<26} {candidate.get('final_score', 0):>6.1f}  {name}")
+
+
+async def _skills_find(names: list[str], match_any: bool) -> list[dict]:
+    from app.services.mongo_service import MongoHandler
+
+    return await MongoHandler().candidates_with_skills(
+        names, match_all=not match_any, projection={"resume.personal_info.full_name": 1, "final_score": 1}
+    )
+
+
+if __name__ == "__main__":
+    cli()
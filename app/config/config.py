@@ -1,6 +1,6 @@
 from pydantic import Field , SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Literal, Optional
 from urllib.parse import quote_plus
 
 
@@ -17,6 +17,14 @@ class Settings(BaseSettings):
     minio_endpoint: str
     minio_resume_bucket: str = "resumes"
     minio_compare_bucket: str = "compare-resume"
+    minio_artifact_bucket: str = "hrm-artifacts"
+    minio_max_pool_connections: int = Field(default=50)
+    minio_list_page_size: int = Field(default=1000)
+    minio_multipart_threshold_mb: int = Field(default=8)
+    minio_multipart_chunk_mb: int = Field(default=8)
+    minio_upload_concurrency: int = Field(default=4)
+    storage_retention_days: int = Field(default=30)
+    storage_cleanup_interval_hours: float = Field(default=6.0)
     model_name: str = "deepseek/deepseek-v3.2"
     structured_model_name: str = "deepseek/deepseek-v3.2"
     ocr_model_name: str = "google/gemini-3-flash-preview"
@@ -26,13 +34,74 @@ class Settings(BaseSettings):
     mongo_db_name: str
     mongo_db_usage: str
     mongo_collection: str
+    mongo_artifact_collection: str = "artifacts"
+    mongo_ledger_collection: str = "file_ledger"
+    mongo_jobs_collection: str = "jobs"
+    mongo_uploads_collection: str = "uploads"
+    mongo_usage_rollup_collection: str = "usage_rollups"
+    mongo_meta_collection: str = "app_meta"
+    # Similarity (0-1) for matching unknown skill spellings to the taxonomy at save time (1 disables)
+    skill_fuzzy_cutoff: float = Field(default=0.9)
+    mongo_bulk_batch_size: int = Field(default=500)
+    save_write_behind: bool = Field(default=True)
+    usage_buffer_size: int = Field(default=5000)
+    usage_flush_size: int = Field(default=200)
+    usage_flush_seconds: float = Field(default=2.0)
+    # Price per 1M tokens by model name, [input, output], e.g. {"gpt-4o": [2.5, 10]} (JSON in .env)
+    llm_prices: dict[str, list[float]] = Field(default_factory=dict)
     mongo_username: str
     mongo_password: SecretStr
+    # One client per process; every handler and the checkpointer share its pool
+    mongo_max_pool_size: int = Field(default=50)
+    mongo_min_pool_size: int = Field(default=0)
 
     ocr_workers: int = Field(default=5, validation_alias="OCR_WORKERS")
     structure_workers: int = Field(default=10, validation_alias="STRUCTURE_WORKERS")
     eval_workers: int = Field(default=10, validation_alias="EVAL_WORKERS")
 
+    # Batched evaluation (max resumes per scoring call, 1 = one resume per call)
+    eval_batch_size: int = Field(default=1)
+    eval_batch_token_budget: int = Field(default=60000)
+    eval_output_tokens_per_resume: int = Field(default=800)
+
+    # Batch execution: "staged" (OCR all -> structure all -> evaluate all) or "pipelined" (per-file streaming)
+    batch_execution_mode: Literal["staged", "pipelined"] = Field(default="staged")
+    pipeline_queue_size: int = Field(default=20)
+
+    # Sharding: "count" (equal files per batch) or "work" (balanced by estimated pages + work stealing)
+    sharding_mode: Literal["count", "work"] = Field(default="count")
+    max_batches: int = Field(default=10)
+    shard_bytes_per_page: int = Field(default=150000)
+
+    # Processing backend: "inline" (inside the Chainlit process) or "queue" (python -m app.worker)
+    processing_backend: Literal["inline", "queue"] = Field(default="inline")
+    worker_concurrency: int = Field(default=2)
+    job_granularity: Literal["file", "batch"] = Field(default="file")
+    job_lease_seconds: int = Field(default=120)
+    job_heartbeat_seconds: int = Field(default=30)
+    job_max_attempts: int = Field(default=3)
+    job_retry_backoff_seconds: int = Field(default=10)
+    job_poll_seconds: float = Field(default=2.0)
+
+    # QA query governor (queries written by the QA agent)
+    qa_query_max_time_ms: int = Field(default=3000)
+    qa_query_max_results: int = Field(default=10)
+    qa_slow_query_ms: int = Field(default=500)
+    qa_collscan_max_docs: int = Field(default=5000)
+    qa_collscan_action: Literal["rewrite", "reject"] = Field(default="rewrite")
+    qa_projection_fields: list[str] = Field(default=["_id", "resume", "evaluation", "final_score", "session_id", "search"])
+    # QA tool results are rendered as compact tables within this budget
+    qa_result_token_budget: int = Field(default=1500)
+    qa_result_max_chars: int = Field(default=200)
+    qa_result_default_fields: list[str] = Field(default=["resume.personal_info.full_name", "final_score"])
+    # Model turns per question before the agent must answer; compiled agents kept per db structure
+    qa_max_iterations: int = Field(default=6)
+    qa_agent_cache_size: int = Field(default=8)
+    # Saved candidates sampled to add fields missing from the models to the QA schema (0 = models only)
+    qa_schema_sample_size: int = Field(default=0)
+    # Cached QA answers and tool results (0 disables); invalidated by every candidate write
+    qa_cache_size: int = Field(default=512)
+
     # LLM Parameters
     max_tokens: int = 20000
     top_p: float = 0.0
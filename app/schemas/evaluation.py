@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 from app.schemas.resume import ResumeData
 
@@ -20,6 +20,13 @@ class ResumeEvaluation(BaseModel):
     final_weighted_score: float = Field(..., description="Final calculated score")
     summary_explanation: str
 
+class SourcedResumeEvaluation(ResumeEvaluation):
+    source_file: str = Field(..., description="The `source_file` of the resume this evaluation belongs to")
+
+class BatchResumeEvaluation(BaseModel):
+    # One entry per resume sent in a batched scoring call
+    evaluations: List[SourcedResumeEvaluation]
+
 # ==================================================
 # Resume Evaluator
 # ==================================================
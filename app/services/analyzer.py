@@ -1,17 +1,48 @@
 import asyncio
+import json
+import time
+from dataclasses import dataclass, field
 from langchain_core.messages import HumanMessage
 
 from app.config.config import config
 from app.config.logger import logger
 from app.services.structured_output import StructuredOutputHandler
 from app.schemas.resume import ResumeData
-from app.schemas.evaluation import ResumeEvaluation
+from app.schemas.evaluation import ResumeEvaluation, BatchResumeEvaluation
 from app.schemas.hiring import HiringRequirements
-from utils.prompt import STRUCTURE_PROMPT_TEMPLATE, SCORING_PROMPT
-from utils.helper import save_token_cost
+from utils.prompt import STRUCTURE_PROMPT_TEMPLATE, SCORING_PROMPT, BATCH_SCORING_PROMPT
+from utils.helper import save_token_cost, estimate_tokens
+
+
+@dataclass
+class EvaluationStats:
+    """Token usage and throughput of one evaluation run (K=1 or batched)."""
+    mode: str
+    resumes: int = 0
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+
+    def record(self, raw_response):
+        self.calls += 1
+        usage = getattr(raw_response, "usage_metadata", None) or {}
+        self.input_tokens += usage.get("input_tokens", 0)
+        self.output_tokens += usage.get("output_tokens", 0)
+
+    def log(self):
+        elapsed = time.perf_counter() - self.started_at
+        per_resume = (self.input_tokens + self.output_tokens) / self.resumes if self.resumes else 0
+        throughput = self.resumes / elapsed if elapsed > 0 else 0
+        logger.info(
+            f"📊 [EVAL STATS] mode={self.mode} resumes={self.resumes} calls={self.calls} "
+            f"in={self.input_tokens} out={self.output_tokens} tokens/resume={per_resume:.0f} "
+            f"throughput={throughput:.2f} resumes/s"
+        )
+
 
 class ResumeAnalyzerService:
-    
+
     def __init__(self):
         self.struct_sem = asyncio.Semaphore(config.structure_workers)
         self.eval_sem = asyncio.Semaphore(config.eval_workers)
@@ -25,11 +56,17 @@ class ResumeAnalyzerService:
             max_retries=config.structure_max_retries,
             model_name=config.structured_model_name,
         )
+        # A failed batch falls back to per-resume calls, so don't retry the whole batch
+        self.batch_evaluation_handler = StructuredOutputHandler(
+            schema=BatchResumeEvaluation,
+            max_retries=1,
+            model_name=config.structured_model_name,
+        )
 
     async def structure_text(self, file_key: str, text: str , session_id:str) -> dict | None:
         if not text:
             return None
-            
+
         async with self.struct_sem:
             prompt = STRUCTURE_PROMPT_TEMPLATE.format(raw_text=text)
             try:
@@ -37,7 +74,7 @@ class ResumeAnalyzerService:
                     [HumanMessage(content=prompt)]
                 )
                 if raw_response is not None:
-                    asyncio.create_task(save_token_cost("batch_structure_node", session_id, raw_response))
+                    await save_token_cost("batch_structure_node", session_id, raw_response)
                 data = response.model_dump(mode="json")
                 data["_source_file"] = file_key
                 logger.info(f"✅ [STRUCT DONE] {file_key}")
@@ -46,7 +83,44 @@ class ResumeAnalyzerService:
                 logger.error(f"❌ [STRUCT FAILED] {file_key}: {e}")
                 return None
 
-    async def evaluate_resume(self, resume_dict: dict, reqs: HiringRequirements, session_id:str) -> dict | None:
+    @staticmethod
+    def _score(resume_dict: dict, eval_result: ResumeEvaluation, reqs: HiringRequirements) -> dict:
+        # Logic: Weighted Calculation
+        w = reqs.weights
+        s = eval_result
+
+        weighted_sum = (
+            (s.hard_skills_score.score * w.hard_skills_weight) +
+            (s.experience_score.score * w.experience_weight) +
+            (s.education_score.score * w.education_weight) +
+            (s.soft_skills_score.score * w.soft_skills_weight) +
+            (s.military_status_score.score * w.military_status_weight) +
+            (s.university_tier_score.score * w.university_tier_weight)
+        )
+
+        total_weight = sum([
+            w.hard_skills_weight, w.experience_weight, w.education_weight,
+            w.soft_skills_weight, w.military_status_weight, w.university_tier_weight
+        ])
+
+        final_score = round(weighted_sum / total_weight, 2) if total_weight > 0 else 0
+        eval_result.final_weighted_score = final_score
+
+        logger.info(f"⚖️ [EVAL DONE] {resume_dict.get('_source_file')} -> {final_score}")
+
+        return {
+            "resume": resume_dict,
+            "evaluation": eval_result.model_dump(),
+            "final_score": final_score
+        }
+
+    async def evaluate_resume(
+        self,
+        resume_dict: dict,
+        reqs: HiringRequirements,
+        session_id: str,
+        stats: EvaluationStats | None = None,
+    ) -> dict | None:
         async with self.eval_sem:
             try:
                 resume_obj = ResumeData(**resume_dict)
@@ -54,40 +128,125 @@ class ResumeAnalyzerService:
                     requirements_json=reqs.model_dump_json(),
                     resume_json=resume_obj.model_dump_json()
                 )
-                
+
                 eval_result, raw_response = await self.evaluation_handler.ainvoke(
                     [HumanMessage(content=prompt)]
                 )
                 if raw_response is not None:
-                    asyncio.create_task(save_token_cost("batch_evaluate_node", session_id, raw_response))
-                # Logic: Weighted Calculation
-                w = reqs.weights
-                s = eval_result
-                
-                weighted_sum = (
-                    (s.hard_skills_score.score * w.hard_skills_weight) +
-                    (s.experience_score.score * w.experience_weight) +
-                    (s.education_score.score * w.education_weight) +
-                    (s.soft_skills_score.score * w.soft_skills_weight) +
-                    (s.military_status_score.score * w.military_status_weight) + 
-                    (s.university_tier_score.score * w.university_tier_weight)
-                )
-                
-                total_weight = sum([
-                    w.hard_skills_weight, w.experience_weight, w.education_weight,
-                    w.soft_skills_weight, w.military_status_weight, w.university_tier_weight
-                ])
-                
-                final_score = round(weighted_sum / total_weight, 2) if total_weight > 0 else 0
-                eval_result.final_weighted_score = final_score
-                
-                logger.info(f"⚖️ [EVAL DONE] {resume_dict.get('_source_file')} -> {final_score}")
-                
-                return {
-                    "resume": resume_dict,
-                    "evaluation": eval_result.model_dump(),
-                    "final_score": final_score
-                }
+                    await save_token_cost("batch_evaluate_node", session_id, raw_response)
+                    if stats is not None:
+                        stats.record(raw_response)
+                return self._score(resume_dict, eval_result, reqs)
             except Exception as e:
                 logger.error(f"❌ [EVAL ERROR] {resume_dict.get('_source_file')}: {e}")
                 return None
+
+    @staticmethod
+    def _compact_resume(resume_dict: dict) -> dict:
+        """Resume payload for batched scoring: nulls dropped, keyed by source file."""
+        resume_obj = ResumeData(**resume_dict)
+        return {
+            "source_file": resume_dict.get("_source_file"),
+            "resume": resume_obj.model_dump(mode="json", exclude_none=True),
+        }
+
+    def plan_batches(self, resume_dicts: list[dict], reqs: HiringRequirements) -> list[list[dict]]:
+        """
+        Greedily packs resumes into batches of at most `eval_batch_size`, so that the
+        shared prompt, the compact resumes and the expected output fit the token budget.
+        """
+        max_k = max(1, config.eval_batch_size)
+        output_reserve = config.eval_output_tokens_per_resume
+        # The whole batch reply has to fit in one completion
+        max_k = max(1, min(max_k, config.max_tokens // max(1, output_reserve)))
+        static_tokens = estimate_tokens(BATCH_SCORING_PROMPT) + estimate_tokens(reqs.model_dump_json())
+        budget = config.eval_batch_token_budget - static_tokens
+
+        batches: list[list[dict]] = []
+        current: list[dict] = []
+        current_tokens = 0
+        for resume_dict in resume_dicts:
+            cost = estimate_tokens(json.dumps(self._compact_resume(resume_dict), ensure_ascii=False)) + output_reserve
+            if current and (len(current) >= max_k or current_tokens + cost > budget):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(resume_dict)
+            current_tokens += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    async def evaluate_batch(
+        self,
+        resume_dicts: list[dict],
+        reqs: HiringRequirements,
+        session_id: str,
+        stats: EvaluationStats | None = None,
+    ) -> list[dict]:
+        """
+        Scores several resumes in one call. Resumes whose evaluation is missing or
+        malformed in the batch reply are retried individually.
+        """
+        if len(resume_dicts) == 1:
+            result = await self.evaluate_resume(resume_dicts[0], reqs, session_id, stats)
+            return [result] if result else []
+
+        evaluations = {}
+        async with self.eval_sem:
+            try:
+                resumes_json = json.dumps(
+                    [self._compact_resume(r) for r in resume_dicts], ensure_ascii=False
+                )
+                prompt = BATCH_SCORING_PROMPT.format(
+                    requirements_json=reqs.model_dump_json(),
+                    resumes_json=resumes_json,
+                )
+                batch_result, raw_response = await self.batch_evaluation_handler.ainvoke(
+                    [HumanMessage(content=prompt)]
+                )
+                if raw_response is not None:
+                    await save_token_cost("batch_evaluate_node", session_id, raw_response)
+                    if stats is not None:
+                        stats.record(raw_response)
+                for item in batch_result.evaluations:
+                    evaluations.setdefault(item.source_file, item)
+            except Exception as e:
+                logger.error(f"❌ [BATCH EVAL ERROR] {len(resume_dicts)} resumes: {e}")
+
+        results = []
+        retry = []
+        for resume_dict in resume_dicts:
+            item = evaluations.get(resume_dict.get("_source_file"))
+            if item is None:
+                retry.append(resume_dict)
+                continue
+            eval_result = ResumeEvaluation(**item.model_dump(exclude={"source_file"}))
+            results.append(self._score(resume_dict, eval_result, reqs))
+
+        if retry:
+            logger.warning(f"🔁 [BATCH EVAL] Retrying {len(retry)}/{len(resume_dicts)} resumes individually.")
+            retried = await asyncio.gather(
+                *[self.evaluate_resume(r, reqs, session_id, stats) for r in retry]
+            )
+            results.extend(r for r in retried if r is not None)
+        return results
+
+    async def evaluate_resumes(self, resume_dicts: list[dict], reqs: HiringRequirements, session_id: str) -> list[dict]:
+        """
+        Evaluates a list of resumes, batched when `eval_batch_size` > 1,
+        and logs token cost per resume and throughput for the run.
+        """
+        if config.eval_batch_size > 1:
+            batches = self.plan_batches(resume_dicts, reqs)
+            stats = EvaluationStats(mode=f"batched(K<={config.eval_batch_size})")
+        else:
+            batches = [[r] for r in resume_dicts]
+            stats = EvaluationStats(mode="single(K=1)")
+
+        batch_results = await asyncio.gather(
+            *[self.evaluate_batch(b, reqs, session_id, stats) for b in batches]
+        )
+        results = [r for batch in batch_results for r in batch]
+        stats.resumes = len(results)
+        stats.log()
+        return results
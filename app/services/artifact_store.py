@@ -0,0 +1,135 @@
+import copy
+from collections import OrderedDict
+
+from app.config.config import config
+from app.config.logger import logger
+from app.services.minio_service import MinioHandler
+from app.services.mongo_service import MongoHandler
+from app.services.upload_manifest import content_identity
+
+
+class ArtifactStore:
+    """
+    Keeps bulky per-file artifacts out of the LangGraph state (and so out of every checkpoint).
+    OCR text goes to MinIO, structured resumes and evaluations to Mongo; the graph only
+    carries the string references returned here.
+    OCR text and structured resumes of content-addressed files depend only on the file,
+    so they are stored once under a shared scope and reused by every session.
+    """
+
+    OCR = "ocr"
+    STRUCTURED = "structured"
+    EVALUATION = "evaluation"
+    CONTENT_SCOPE = "content"
+    _CONTENT_KINDS = (OCR, STRUCTURED)
+
+    def __init__(self, cache_size: int = 512):
+        self.minio = MinioHandler()
+        self.mongo = MongoHandler()
+        self.collection = self.mongo.db[config.mongo_artifact_collection]
+        # Recently written artifacts, so the next stage in this process skips the round-trip
+        self._cache: OrderedDict[str, object] = OrderedDict()
+        self.cache_size = cache_size
+
+    def _remember(self, ref: str, value):
+        self._cache[ref] = copy.deepcopy(value)
+        self._cache.move_to_end(ref)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _cached(self, ref: str):
+        if ref not in self._cache:
+            return None
+        # Callers mutate what they get back (e.g. save_candidate), never hand out the cached object
+        return copy.deepcopy(self._cache[ref])
+
+    def _scope(self, session_id: str, kind: str, file_key: str) -> tuple[str, str]:
+        """(scope, name) of an artifact: content-keyed files share one copy across sessions."""
+        identity = content_identity(file_key)
+        if kind in self._CONTENT_KINDS and identity:
+            return self.CONTENT_SCOPE, identity
+        return session_id, file_key
+
+    def text_ref(self, session_id: str, kind: str, file_key: str) -> str:
+        scope, name = self._scope(session_id, kind, file_key)
+        return f"{scope}/{kind}/{name}.md"
+
+    def doc_ref(self, session_id: str, kind: str, file_key: str) -> str:
+        scope, name = self._scope(session_id, kind, file_key)
+        return f"{scope}:{kind}:{name}"
+
+    async def find_shared(self, kind: str, file_key: str) -> str | None:
+        """Reference of an artifact another session already produced for the same content, if any."""
+        if kind not in self._CONTENT_KINDS or not content_identity(file_key):
+            return None
+        if kind == self.OCR:
+            ref = self.text_ref(self.CONTENT_SCOPE, kind, file_key)
+            if ref in self._cache or await self.minio.head_object(config.minio_artifact_bucket, ref):
+                return ref
+            return None
+        ref = self.doc_ref(self.CONTENT_SCOPE, kind, file_key)
+        if ref in self._cache or await self.collection.count_documents({"_id": ref}, limit=1):
+            return ref
+        return None
+
+    async def put_text(self, session_id: str, kind: str, file_key: str, text: str) -> str:
+        ref = self.text_ref(session_id, kind, file_key)
+        await self.minio.upload_bytes(
+            config.minio_artifact_bucket, ref, text.encode("utf-8"), content_type="text/markdown"
+        )
+        self._remember(ref, text)
+        return ref
+
+    async def get_text(self, ref: str) -> str | None:
+        cached = self._cached(ref)
+        if cached is not None:
+            return cached
+        try:
+            data = await self.minio.download_file_bytes(config.minio_artifact_bucket, ref)
+        except Exception as e:
+            logger.error(f"❌ [ARTIFACT] Could not load {ref}: {e}")
+            return None
+        text = data.decode("utf-8")
+        self._remember(ref, text)
+        return text
+
+    async def put_doc(self, session_id: str, kind: str, file_key: str, doc: dict) -> str:
+        ref = self.doc_ref(session_id, kind, file_key)
+        scope, _ = self._scope(session_id, kind, file_key)
+        await self.collection.replace_one(
+            {"_id": ref},
+            {"_id": ref, "session_id": scope, "kind": kind, "file_key": file_key, "data": doc},
+            upsert=True,
+        )
+        self._remember(ref, doc)
+        return ref
+
+    async def get_docs(self, refs: list[str]) -> list[dict]:
+        """Loads documents in the order of `refs`; missing ones are skipped."""
+        found = await self.get_doc_map(refs)
+        return [found[ref] for ref in refs if ref in found]
+
+    async def get_doc_map(self, refs: list[str]) -> dict[str, dict]:
+        found = {ref: self._cached(ref) for ref in refs if ref in self._cache}
+        missing = [ref for ref in refs if ref not in found]
+        if missing:
+            cursor = self.collection.find({"_id": {"$in": missing}})
+            async for item in cursor:
+                found[item["_id"]] = item["data"]
+                self._remember(item["_id"], item["data"])
+        for ref in missing:
+            if ref not in found:
+                logger.warning(f"⚠️ [ARTIFACT] Missing document {ref}")
+        return found
+
+    async def put_structured(self, session_id: str, resume_dict: dict) -> dict:
+        """Stores a structured resume, returns the compact entry kept in the graph state."""
+        file_key = resume_dict.get("_source_file")
+        ref = await self.put_doc(session_id, self.STRUCTURED, file_key, resume_dict)
+        return {"file": file_key, "ref": ref}
+
+    async def put_evaluation(self, session_id: str, result: dict) -> dict:
+        """Stores an evaluated candidate, returns the compact entry kept in the graph state."""
+        file_key = result["resume"].get("_source_file")
+        ref = await self.put_doc(session_id, self.EVALUATION, file_key, result)
+        return {"file": file_key, "ref": ref, "final_score": result["final_score"]}
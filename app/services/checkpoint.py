@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import time
+
+from langgraph.checkpoint.mongodb import MongoDBSaver
+
+from app.config.logger import logger
+
+
+class _SizeRecordingSerde:
+    """Wraps the saver's serializer and counts the bytes it produces on the current thread."""
+
+    def __init__(self, serde):
+        self.serde = serde
+        self._local = threading.local()
+
+    def reset(self):
+        self._local.bytes = 0
+
+    @property
+    def bytes(self) -> int:
+        return getattr(self._local, "bytes", 0)
+
+    def dumps_typed(self, obj):
+        type_, data = self.serde.dumps_typed(obj)
+        self._local.bytes = self.bytes + len(data)
+        return type_, data
+
+    def __getattr__(self, name):
+        return getattr(self.serde, name)
+
+
+class MeasuredMongoDBSaver(MongoDBSaver):
+    """
+    MongoDBSaver that logs the serialized size and write time of every checkpoint
+    and of every batch of pending writes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.serde = _SizeRecordingSerde(self.serde)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        self.serde.reset()
+        started = time.perf_counter()
+        result = super().put(config, checkpoint, metadata, new_versions)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            f"📦 [CHECKPOINT] thread={config['configurable'].get('thread_id')} "
+            f"ns={config['configurable'].get('checkpoint_ns') or '-'} step={metadata.get('step')} "
+            f"size={self.serde.bytes / 1024:.1f}KB write={elapsed_ms:.0f}ms"
+        )
+        return result
+
+    def put_writes(self, config, writes, task_id, *args, **kwargs):
+        self.serde.reset()
+        started = time.perf_counter()
+        result = super().put_writes(config, writes, task_id, *args, **kwargs)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.debug(
+            f"📦 [CHECKPOINT WRITES] thread={config['configurable'].get('thread_id')} "
+            f"channels={[w[0] for w in writes]} size={self.serde.bytes / 1024:.1f}KB write={elapsed_ms:.0f}ms"
+        )
+        return result
+
+    # Route the async API through the measured sync methods
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, *args, **kwargs):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, *args, **kwargs)
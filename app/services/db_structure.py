@@ -0,0 +1,140 @@
+import hashlib
+import json
+import types
+import typing
+from datetime import datetime
+from enum import Enum
+
+from bson import ObjectId
+from pydantic import BaseModel
+
+from app.config.config import config
+from app.config.logger import logger
+from app.schemas.evaluation import ScoredResume
+from app.services.mongo_service import MongoHandler
+
+# Fields MongoHandler adds to (or removes from) a ScoredResume when saving it
+# (`search` is the flat view from utils.process_stracutre.build_search_view)
+_ADDED_FIELDS = {
+    "_id": "ObjectId",
+    "session_id": "str",
+    "resume._source_file": "str",
+    "resume.education.items.duration_months": "int",
+    "resume.work_experience.items.duration_months": "int",
+    "search": {
+        "skills": ["str (canonical skill id, lowercase)"],
+        "experience_months": "int (total)",
+        "highest_degree": "str (one of: 'diploma', 'associate', 'bachelor', 'master', 'phd')",
+        "degree_level": "int (1 diploma .. 5 phd)",
+        "best_university_tier": "int (1 elite .. 4)",
+        "age": "int",
+        "final_score": "float",
+    },
+}
+_REMOVED_FIELDS = ["resume.personal_info.date_of_birth"]
+
+_cache: dict[str, dict] = {}
+
+
+def _annotation_structure(annotation):
+    origin = typing.get_origin(annotation)
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    if origin in (typing.Union, types.UnionType) and len(args) == 1:
+        return _annotation_structure(args[0])
+    if origin in (list, typing.List):
+        return [_annotation_structure(args[0]) if args else "Any"]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return model_structure(annotation)
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        return f"str (one of: {', '.join(repr(m.value) for m in annotation)})"
+    return getattr(annotation, "__name__", str(annotation))
+
+
+def model_structure(model: type[BaseModel]) -> dict:
+    """Field name -> type name (nested models as dicts, lists as one-element lists)."""
+    return {name: _annotation_structure(field.annotation) for name, field in model.model_fields.items()}
+
+
+def value_structure(value):
+    """Type structure of a stored document (used for sampled documents)."""
+    if isinstance(value, dict):
+        return {k: value_structure(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [value_structure(value[0])] if value else ["Array (Empty)"]
+    if isinstance(value, ObjectId):
+        return "ObjectId"
+    if isinstance(value, datetime):
+        return "Date (ISO)"
+    return type(value).__name__
+
+
+def _node(structure: dict, path: list[str]) -> dict | None:
+    for part in path:
+        value = structure.get(part)
+        if isinstance(value, list) and value and isinstance(value[0], dict):
+            value = value[0]
+        if not isinstance(value, dict):
+            return None
+        structure = value
+    return structure
+
+
+def merge_structure(base, extra):
+    """Adds the fields of `extra` missing from `base`; the types in `base` win."""
+    if isinstance(base, dict) and isinstance(extra, dict):
+        merged = dict(base)
+        for key, value in extra.items():
+            merged[key] = merge_structure(base[key], value) if key in base else value
+        return merged
+    if isinstance(base, list) and isinstance(extra, list) and base and extra:
+        return [merge_structure(base[0], extra[0])]
+    return base
+
+
+def stored_structure() -> dict:
+    """Structure of a saved candidate, from the models plus the fields added on save."""
+    structure = model_structure(ScoredResume)
+    for dotted, type_name in _ADDED_FIELDS.items():
+        *parents, leaf = dotted.split(".")
+        node = _node(structure, parents)
+        if node is not None:
+            node[leaf] = type_name
+    for dotted in _REMOVED_FIELDS:
+        *parents, leaf = dotted.split(".")
+        node = _node(structure, parents)
+        if node is not None:
+            node.pop(leaf, None)
+    return structure
+
+
+def structure_fingerprint() -> str:
+    """Changes whenever the models or the fields added on save change."""
+    payload = json.dumps(
+        [ScoredResume.model_json_schema(), _ADDED_FIELDS, _REMOVED_FIELDS, config.qa_schema_sample_size],
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def get_db_structure(mongo: MongoHandler | None = None) -> dict:
+    """
+    The resumes collection structure shown to the QA agent, built once per process (and
+    model version). With `qa_schema_sample_size` > 0, fields found in a `$sample` of saved
+    candidates but absent from the models are merged in.
+    """
+    key = structure_fingerprint()
+    if key in _cache:
+        return _cache[key]
+
+    structure = stored_structure()
+    if config.qa_schema_sample_size > 0:
+        mongo = mongo or MongoHandler()
+        try:
+            cursor = mongo.collection.aggregate([{"$sample": {"size": config.qa_schema_sample_size}}])
+            async for doc in cursor:
+                structure = merge_structure(structure, value_structure(doc))
+        except Exception as e:
+            logger.error(f"Schema sampling failed, using the model structure only: {e}")
+            return structure
+    _cache[key] = structure
+    return structure
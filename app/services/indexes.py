@@ -0,0 +1,114 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from app.config.config import config
+from app.config.logger import logger
+from app.services.mongo_service import MongoHandler
+
+# Mongo error codes for "an equivalent index exists with other options/name"
+_INDEX_CONFLICT_CODES = (85, 86)
+
+RESUME_INDEXES = [
+    # save_candidate upserts by session and email, or by source file when there is no email
+    IndexModel([("resume.personal_info.email", ASCENDING), ("session_id", ASCENDING)], name="email_session"),
+    IndexModel([("resume._source_file", ASCENDING), ("session_id", ASCENDING)], name="source_file_session"),
+    # top candidates, globally and per review session
+    IndexModel([("final_score", DESCENDING)], name="final_score"),
+    IndexModel([("session_id", ASCENDING), ("final_score", DESCENDING)], name="session_final_score"),
+    # fields the QA agent filters on most
+    IndexModel([("resume.skills.hard_skills", ASCENDING)], name="hard_skills"),
+    IndexModel([("resume.work_experience.items.job_title", ASCENDING)], name="job_title"),
+    IndexModel([("resume.work_experience.items.duration_months", ASCENDING)], name="experience_months"),
+    IndexModel([("resume.education.items.degree", ASCENDING)], name="degree"),
+    IndexModel([("resume.personal_info.age", ASCENDING)], name="age"),
+    # flat `search` view, what the QA agent is pointed at
+    IndexModel([("search.skills", ASCENDING)], name="search_skills"),
+    IndexModel([("search.experience_months", ASCENDING)], name="search_experience_months"),
+    IndexModel([("search.degree_level", ASCENDING)], name="search_degree_level"),
+    IndexModel([("search.best_university_tier", ASCENDING)], name="search_university_tier"),
+    IndexModel([("search.age", ASCENDING)], name="search_age"),
+    IndexModel([("search.final_score", DESCENDING)], name="search_final_score"),
+]
+
+USAGE_INDEXES = [
+    IndexModel([("session_id", ASCENDING), ("node_name", ASCENDING)], name="session_node"),
+]
+
+USAGE_ROLLUP_INDEXES = [
+    IndexModel([("session_id", ASCENDING), ("first_at", ASCENDING)], name="session_first_at"),
+    IndexModel([("last_at", DESCENDING)], name="last_at"),
+]
+
+LEDGER_INDEXES = [
+    IndexModel([("session_id", ASCENDING), ("kind", ASCENDING), ("status", ASCENDING)], name="session_kind_status"),
+]
+
+JOB_INDEXES = [
+    # claims filter on status + available_at / lease_expires_at, progress polls on run_id
+    IndexModel([("status", ASCENDING), ("available_at", ASCENDING)], name="status_available"),
+    IndexModel([("status", ASCENDING), ("lease_expires_at", ASCENDING)], name="status_lease"),
+    IndexModel([("run_id", ASCENDING), ("status", ASCENDING)], name="run_status"),
+]
+
+
+def index_specs() -> dict[str, list[IndexModel]]:
+    """Indexes the application relies on, by collection name."""
+    return {
+        config.mongo_collection: RESUME_INDEXES,
+        config.mongo_db_usage: USAGE_INDEXES,
+        config.mongo_usage_rollup_collection: USAGE_ROLLUP_INDEXES,
+        config.mongo_ledger_collection: LEDGER_INDEXES,
+        config.mongo_jobs_collection: JOB_INDEXES,
+    }
+
+
+async def create_indexes(collection, indexes: list[IndexModel]) -> list[str]:
+    """Creates missing indexes; existing ones (even under another name) are left alone."""
+    created = []
+    for index in indexes:
+        try:
+            created.extend(await collection.create_indexes([index]))
+        except OperationFailure as e:
+            if e.code not in _INDEX_CONFLICT_CODES:
+                raise
+            logger.warning(f"⚠️ [INDEX] {collection.name}.{index.document['name']} exists with other options: {e}")
+    return created
+
+
+async def ensure_indexes(mongo: MongoHandler | None = None):
+    """Idempotent index bootstrap, run at startup."""
+    mongo = mongo or MongoHandler()
+    for name, indexes in index_specs().items():
+        await create_indexes(mongo.db[name], indexes)
+    logger.info(f"🗂️ Indexes ensured on {len(index_specs())} collections")
+
+
+def _key_of(spec: dict) -> tuple:
+    return tuple((field, int(direction)) for field, direction in spec.items())
+
+
+async def check_indexes(mongo: MongoHandler | None = None) -> dict[str, dict[str, list[str]]]:
+    """
+    Per collection: `missing` expected indexes (matched by key pattern), `unused` indexes
+    with no operations since the server started tracking them ($indexStats), and `extra`
+    indexes the application does not define.
+    """
+    mongo = mongo or MongoHandler()
+    report = {}
+    for name, indexes in index_specs().items():
+        collection = mongo.db[name]
+        existing = await collection.index_information()
+        existing_keys = {_key_of(dict(info["key"])): index_name for index_name, info in existing.items()}
+        expected_keys = {_key_of(dict(index.document["key"])): index.document["name"] for index in indexes}
+
+        stats = collection.aggregate([{"$indexStats": {}}])
+        unused = [s["name"] async for s in stats if s["name"] != "_id_" and s["accesses"]["ops"] == 0]
+        report[name] = {
+            "missing": [index_name for key, index_name in expected_keys.items() if key not in existing_keys],
+            "unused": sorted(unused),
+            "extra": sorted(
+                index_name for key, index_name in existing_keys.items()
+                if key not in expected_keys and index_name != "_id_"
+            ),
+        }
+    return report
@@ -0,0 +1,171 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+
+from app.config.config import config
+from app.config.logger import logger
+from app.services.indexes import JOB_INDEXES, create_indexes
+from app.services.mongo_service import MongoHandler
+
+
+# Job kinds
+PROCESS_BATCH = "process_batch"
+PROCESS_FILE = "process_file"
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class JobQueue:
+    """
+    Mongo-backed job queue shared by the web process and the workers.
+    A worker claims a job with a lease and keeps it alive with heartbeats; a job whose
+    lease expired (worker died) can be claimed again. Failed jobs are retried with
+    backoff until `max_attempts`.
+    """
+
+    def __init__(self, collection_name: str | None = None):
+        self.mongo = MongoHandler()
+        self.collection = self.mongo.db[collection_name or config.mongo_jobs_collection]
+
+    async def ensure_indexes(self):
+        await create_indexes(self.collection, JOB_INDEXES)
+
+    @staticmethod
+    def _now():
+        return datetime.now(timezone.utc)
+
+    @staticmethod
+    def job_id(kind: str, session_id: str, run_id: str, key: str) -> str:
+        digest = hashlib.sha256(f"{run_id}\n{key}".encode("utf-8")).hexdigest()[:16]
+        return f"{session_id}:{kind}:{digest}"
+
+    def _new_job(self, kind: str, session_id: str, run_id: str, payload: dict, key: str) -> UpdateOne:
+        now = self._now()
+        return UpdateOne(
+            {"_id": self.job_id(kind, session_id, run_id, key)},
+            {"$setOnInsert": {
+                "kind": kind,
+                "session_id": session_id,
+                "run_id": run_id,
+                "payload": payload,
+                "status": JobStatus.QUEUED.value,
+                "attempts": 0,
+                "max_attempts": config.job_max_attempts,
+                "available_at": now,
+                "created_at": now,
+            }},
+            upsert=True,
+        )
+
+    async def submit(self, kind: str, session_id: str, run_id: str, payload: dict, key: str) -> str:
+        """Enqueues a job; submitting the same (kind, session, run, key) twice is a no-op."""
+        await self.collection.bulk_write([self._new_job(kind, session_id, run_id, payload, key)])
+        return self.job_id(kind, session_id, run_id, key)
+
+    async def submit_many(self, kind: str, session_id: str, run_id: str, jobs: list[tuple[str, dict]]) -> int:
+        """Enqueues `(key, payload)` jobs in one round-trip."""
+        if not jobs:
+            return 0
+        await self.collection.bulk_write(
+            [self._new_job(kind, session_id, run_id, payload, key) for key, payload in jobs],
+            ordered=False,
+        )
+        return len(jobs)
+
+    async def claim(self, worker_id: str, kinds: list[str] | None = None) -> dict | None:
+        """Atomically leases the oldest runnable job (queued, or running with an expired lease)."""
+        while True:
+            now = self._now()
+            query = {"$or": [
+                {"status": JobStatus.QUEUED.value, "available_at": {"$lte": now}},
+                {"status": JobStatus.RUNNING.value, "lease_expires_at": {"$lt": now}},
+            ]}
+            if kinds:
+                query["kind"] = {"$in": kinds}
+            job = await self.collection.find_one_and_update(
+                query,
+                {
+                    "$set": {
+                        "status": JobStatus.RUNNING.value,
+                        "lease_owner": worker_id,
+                        "lease_expires_at": now + timedelta(seconds=config.job_lease_seconds),
+                        "heartbeat_at": now,
+                        "started_at": now,
+                    },
+                    "$inc": {"attempts": 1},
+                },
+                sort=[("available_at", ASCENDING)],
+                return_document=ReturnDocument.AFTER,
+            )
+            if job is None:
+                return None
+            if job["attempts"] <= job["max_attempts"]:
+                return job
+            # A worker died on this job too often: give up instead of running it again
+            await self.collection.update_one(
+                {"_id": job["_id"], "lease_owner": worker_id},
+                {"$set": {"status": JobStatus.FAILED.value, "error": "Lease expired too many times",
+                          "finished_at": now}},
+            )
+            logger.error(f"❌ [JOB] {job['_id']} abandoned after {job['max_attempts']} attempts")
+
+    async def heartbeat(self, job_id: str, worker_id: str, progress: dict | None = None) -> bool:
+        """Extends the lease; False means the lease was lost to another worker."""
+        now = self._now()
+        update = {"lease_expires_at": now + timedelta(seconds=config.job_lease_seconds), "heartbeat_at": now}
+        if progress is not None:
+            update["progress"] = progress
+        result = await self.collection.update_one(
+            {"_id": job_id, "lease_owner": worker_id, "status": JobStatus.RUNNING.value},
+            {"$set": update},
+        )
+        return result.matched_count == 1
+
+    async def complete(self, job_id: str, worker_id: str, result: dict):
+        await self.collection.update_one(
+            {"_id": job_id, "lease_owner": worker_id},
+            {"$set": {"status": JobStatus.DONE.value, "result": result, "finished_at": self._now()},
+             "$unset": {"lease_expires_at": ""}},
+        )
+
+    async def fail(self, job_id: str, worker_id: str, error: str):
+        job = await self.collection.find_one({"_id": job_id, "lease_owner": worker_id})
+        if job is None:
+            return
+        now = self._now()
+        if job["attempts"] < job["max_attempts"]:
+            backoff = config.job_retry_backoff_seconds * (2 ** (job["attempts"] - 1))
+            update = {"status": JobStatus.QUEUED.value, "available_at": now + timedelta(seconds=backoff), "error": error}
+            logger.warning(f"🔁 [JOB] {job_id} failed (attempt {job['attempts']}), retrying in {backoff}s: {error}")
+        else:
+            update = {"status": JobStatus.FAILED.value, "error": error, "finished_at": now}
+            logger.error(f"❌ [JOB] {job_id} failed permanently: {error}")
+        await self.collection.update_one(
+            {"_id": job_id, "lease_owner": worker_id},
+            {"$set": update, "$unset": {"lease_expires_at": ""}},
+        )
+
+    async def run_status_counts(self, run_id: str) -> dict[str, int]:
+        cursor = self.collection.aggregate([
+            {"$match": {"run_id": run_id}},
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+        ])
+        return {doc["_id"]: doc["count"] async for doc in cursor}
+
+    async def run_results(self, run_id: str) -> tuple[list[dict], list[dict]]:
+        """Aggregates a finished run: the results of done jobs, and the failed jobs."""
+        done, failed = [], []
+        cursor = self.collection.find(
+            {"run_id": run_id, "status": {"$in": [JobStatus.DONE.value, JobStatus.FAILED.value]}},
+            {"status": 1, "result": 1, "error": 1},
+        )
+        async for job in cursor:
+            (done if job["status"] == JobStatus.DONE.value else failed).append(job)
+        return done, failed
@@ -0,0 +1,141 @@
+import hashlib
+from datetime import datetime, timezone
+from enum import Enum
+
+from pymongo import UpdateOne
+
+from app.config.config import config
+from app.config.logger import logger
+from app.schemas.hiring import HiringRequirements
+from app.services.mongo_service import MongoHandler
+
+
+class Stage(str, Enum):
+    PENDING = "pending"
+    DOWNLOADED = "downloaded"
+    OCR = "ocr"
+    STRUCTURED = "structured"
+    EVALUATED = "evaluated"
+    SAVED = "saved"
+
+
+STAGE_ORDER = list(Stage)
+
+
+def stage_reached(entry: dict | None, stage: Stage) -> bool:
+    if not entry:
+        return False
+    return STAGE_ORDER.index(Stage(entry.get("stage", Stage.PENDING))) >= STAGE_ORDER.index(stage)
+
+
+class ProgressLedger:
+    """
+    Durable per-file progress of a review session: the stage each file reached,
+    the artifact references produced so far and the last failure.
+    A re-run of the same session only redoes the missing stages.
+    """
+
+    def __init__(self):
+        self.mongo = MongoHandler()
+        self.collection = self.mongo.db[config.mongo_ledger_collection]
+
+    @staticmethod
+    def _file_id(session_id: str, file_key: str) -> str:
+        return f"{session_id}:{file_key}"
+
+    @staticmethod
+    def _now():
+        return datetime.now(timezone.utc)
+
+    async def start_session(self, session_id: str, files: list[str], reqs: HiringRequirements):
+        """Registers the session's files and requirements; existing progress is kept."""
+        reqs_json = reqs.model_dump_json()
+        reqs_hash = hashlib.sha256(reqs_json.encode("utf-8")).hexdigest()
+        previous = await self.collection.find_one_and_update(
+            {"_id": session_id},
+            {"$set": {"kind": "session", "hiring_reqs": reqs_json, "reqs_hash": reqs_hash, "updated_at": self._now()}},
+            upsert=True,
+        )
+        if previous and previous.get("reqs_hash") != reqs_hash:
+            # Scores depend on the requirements, OCR and structuring don't
+            result = await self.collection.update_many(
+                {"kind": "file", "session_id": session_id,
+                 "stage": {"$in": [Stage.EVALUATED.value, Stage.SAVED.value]}},
+                {"$set": {"stage": Stage.STRUCTURED.value}, "$unset": {"artifacts.evaluated": "", "final_score": ""}},
+            )
+            logger.info(f"📒 Requirements changed, {result.modified_count} files will be re-evaluated.")
+        await self.register_files(session_id, files)
+
+    async def register_files(self, session_id: str, files: list[str]):
+        """Adds files to a started session (e.g. further pages of a bucket listing)."""
+        if files:
+            await self.collection.bulk_write([
+                UpdateOne(
+                    {"_id": self._file_id(session_id, f)},
+                    {"$setOnInsert": {
+                        "kind": "file", "session_id": session_id, "file_key": f,
+                        "stage": Stage.PENDING.value, "status": "ok", "attempts": 0,
+                        "artifacts": {}, "updated_at": self._now(),
+                    }},
+                    upsert=True,
+                )
+                for f in files
+            ], ordered=False)
+
+    async def get_session(self, session_id: str) -> dict | None:
+        return await self.collection.find_one({"_id": session_id, "kind": "session"})
+
+    async def entries(self, session_id: str, files: list[str] | None = None) -> dict[str, dict]:
+        query = {"kind": "file", "session_id": session_id}
+        if files is not None:
+            query["_id"] = {"$in": [self._file_id(session_id, f) for f in files]}
+        cursor = self.collection.find(query)
+        return {doc["file_key"]: doc async for doc in cursor}
+
+    async def advance(self, session_id: str, file_key: str, stage: Stage, ref: str | None = None, **fields):
+        update = {"stage": stage.value, "status": "ok", "updated_at": self._now(), **fields}
+        if ref is not None:
+            update[f"artifacts.{stage.value}"] = ref
+        await self.collection.update_one(
+            {"_id": self._file_id(session_id, file_key)},
+            {"$set": {"kind": "file", "session_id": session_id, "file_key": file_key, **update},
+             "$unset": {"error": ""}},
+            upsert=True,
+        )
+
+    async def advance_many(self, session_id: str, file_keys: list[str], stage: Stage):
+        """Moves many files to `stage` in one round-trip (no artifact references)."""
+        if not file_keys:
+            return
+        now = self._now()
+        await self.collection.bulk_write([
+            UpdateOne(
+                {"_id": self._file_id(session_id, f)},
+                {"$set": {"kind": "file", "session_id": session_id, "file_key": f,
+                          "stage": stage.value, "status": "ok", "updated_at": now},
+                 "$unset": {"error": ""}},
+                upsert=True,
+            )
+            for f in file_keys
+        ], ordered=False)
+
+    async def fail(self, session_id: str, file_key: str, stage: Stage, error: str):
+        await self.collection.update_one(
+            {"_id": self._file_id(session_id, file_key)},
+            {"$set": {"kind": "file", "session_id": session_id, "file_key": file_key,
+                      "status": "failed", "failed_stage": stage.value, "error": error,
+                      "updated_at": self._now()},
+             "$inc": {"attempts": 1}},
+            upsert=True,
+        )
+
+    async def failed_files(self, session_id: str) -> list[str]:
+        cursor = self.collection.find({"kind": "file", "session_id": session_id, "status": "failed"})
+        return [doc["file_key"] async for doc in cursor]
+
+    async def stage_counts(self, session_id: str) -> dict[str, int]:
+        cursor = self.collection.aggregate([
+            {"$match": {"kind": "file", "session_id": session_id}},
+            {"$group": {"_id": "$stage", "count": {"$sum": 1}}},
+        ])
+        return {doc["_id"]: doc["count"] async for doc in cursor}
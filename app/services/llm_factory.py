@@ -1,3 +1,5 @@
+import time
+
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import BaseMessage, HumanMessage
 from app.config.config import config
@@ -5,6 +7,14 @@ from typing import Optional, Sequence, Union
 
 
 class LLMFactory:
+    @staticmethod
+    def stamp_latency(message, started: float):
+        """Records the call latency in the message metadata, where usage logging picks it up."""
+        metadata = getattr(message, "response_metadata", None)
+        if isinstance(metadata, dict):
+            metadata["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return message
+
     @staticmethod
     def get_model(
         temperature: float = 0.0,
@@ -57,6 +67,6 @@ class LLMFactory:
             model_name=model_name,
         )
 
-        if isinstance(input_data, str):
-            return await llm.ainvoke([HumanMessage(content=input_data)])
-        return await llm.ainvoke(list(input_data))
\ No newline at end of file
+        messages = [HumanMessage(content=input_data)] if isinstance(input_data, str) else list(input_data)
+        started = time.perf_counter()
+        return LLMFactory.stamp_latency(await llm.ainvoke(messages), started)
\ No newline at end of file
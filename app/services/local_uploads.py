@@ -0,0 +1,80 @@
+import asyncio
+import os
+
+from app.config.logger import logger
+
+
+class LocalUploads:
+    """
+    Process-local registry of resumes that are still on local disk (Chainlit's upload
+    path) while their MinIO upload runs in the background. OCR reads the local copy
+    directly and only falls back to MinIO once it is gone.
+    """
+
+    def __init__(self):
+        self._paths: dict[tuple[str, str], str] = {}
+        self._uploads: dict[tuple[str, str], asyncio.Task] = {}
+        # Uploads that failed, with their error, until the failure is reported
+        self._failed: dict[tuple[str, str], str] = {}
+        # Files already rendered whose upload was still running; dropped once it finishes
+        self._released: set[tuple[str, str]] = set()
+
+    def register(self, bucket_name: str, key: str, path: str, upload: asyncio.Task):
+        self._paths[(bucket_name, key)] = path
+        self._uploads[(bucket_name, key)] = upload
+        self._failed.pop((bucket_name, key), None)
+        self._released.discard((bucket_name, key))
+        upload.add_done_callback(lambda task: self._upload_done(bucket_name, key, task))
+
+    def _upload_done(self, bucket_name: str, key: str, task: asyncio.Task):
+        if self._uploads.get((bucket_name, key)) is not task:
+            return
+        del self._uploads[(bucket_name, key)]
+        if task.cancelled():
+            self._failed[(bucket_name, key)] = "upload cancelled"
+        elif task.exception() is not None:
+            logger.error(f"❌ [UPLOAD] {key}: {task.exception()}")
+            self._failed[(bucket_name, key)] = str(task.exception())
+        if (bucket_name, key) in self._released:
+            self._released.discard((bucket_name, key))
+            self._paths.pop((bucket_name, key), None)
+
+    def local_path(self, bucket_name: str, key: str) -> str | None:
+        path = self._paths.get((bucket_name, key))
+        if path is None:
+            return None
+        if not os.path.exists(path):
+            # Chainlit removed the session files; MinIO holds the durable copy
+            del self._paths[(bucket_name, key)]
+            return None
+        return path
+
+    def release(self, bucket_name: str, key: str):
+        """Forgets the local copy once OCR rendered it: right away if the upload finished, else when it does."""
+        if (bucket_name, key) in self._uploads:
+            self._released.add((bucket_name, key))
+        else:
+            self._paths.pop((bucket_name, key), None)
+
+    def pop_failed(self, bucket_name: str, keys: list[str]) -> dict[str, str]:
+        """The failed uploads among `keys` with their errors, forgotten once taken (reported)."""
+        return {k: self._failed.pop((bucket_name, k)) for k in keys if (bucket_name, k) in self._failed}
+
+    async def wait_uploaded(self, bucket_name: str, keys: list[str]) -> list[str]:
+        """
+        Waits until the background uploads of `keys` (if any) finished, and returns the keys
+        whose upload failed (they are not in MinIO).
+        """
+        tasks = [self._uploads[(bucket_name, k)] for k in keys if (bucket_name, k) in self._uploads]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return [k for k in keys if (bucket_name, k) in self._failed]
+
+    async def drain(self):
+        """Finishes every pending upload (app shutdown)."""
+        if self._uploads:
+            logger.info(f"⏳ Finishing {len(self._uploads)} background uploads...")
+            await asyncio.gather(*self._uploads.values(), return_exceptions=True)
+
+
+local_uploads = LocalUploads()
@@ -1,61 +1,179 @@
+import asyncio
+from contextlib import AsyncExitStack
+from typing import AsyncIterator
+
 import aioboto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from app.config.config import config
 from app.config.logger import logger
 
 class MinioHandler:
+    """
+    Thin async wrapper over MinIO. All handlers of a process share one S3 client (and its
+    connection pool), opened on first use and closed by `MinioHandler.close()` on shutdown.
+    """
+
+    _client = None
+    _client_stack: AsyncExitStack | None = None
+    _client_loop: asyncio.AbstractEventLoop | None = None
+    _client_lock: asyncio.Lock | None = None
+
     def __init__(self):
         self.session = aioboto3.Session()
         self.config = {
             'endpoint_url': config.minio_endpoint,      
             'aws_access_key_id': config.minio_access_key, 
             'aws_secret_access_key': config.minio_secret_key.get_secret_value(), 
-            'use_ssl': False
+            'use_ssl': False,
+            'config': Config(max_pool_connections=config.minio_max_pool_connections),
         }
 
+    async def _s3(self):
+        """Returns the process-wide S3 client, creating it on first use."""
+        cls = MinioHandler
+        loop = asyncio.get_running_loop()
+        # The client's connection pool belongs to the loop it was created on
+        if cls._client is not None and cls._client_loop is loop:
+            return cls._client
+        if cls._client_lock is None or cls._client_loop is not loop:
+            cls._client_lock = asyncio.Lock()
+            cls._client_loop = loop
+            stale, cls._client, cls._client_stack = cls._client_stack, None, None
+            if stale is not None:
+                try:
+                    await stale.aclose()
+                except Exception as e:
+                    # Its loop may already be closed; the sockets go with it
+                    logger.warning(f"⚠️ Closing the previous MinIO client failed: {e}")
+        async with cls._client_lock:
+            if cls._client is None:
+                stack = AsyncExitStack()
+                cls._client = await stack.enter_async_context(self.session.client("s3", **self.config))
+                cls._client_stack = stack
+                logger.info(f"🔌 MinIO client opened (pool size {config.minio_max_pool_connections})")
+        return cls._client
+
+    @classmethod
+    async def close(cls):
+        """Closes the shared client; the next call opens a new one."""
+        stack, cls._client, cls._client_stack = cls._client_stack, None, None
+        if stack is not None:
+            await stack.aclose()
+            logger.info("🔌 MinIO client closed")
+
     async def ensure_bucket(self , bucket_name:str):
-        async with self.session.client("s3", **self.config) as s3:
-            try:
-                await s3.create_bucket(Bucket=bucket_name) 
-            except ClientError as e:
-                if e.response['Error']['Code'] != 'BucketAlreadyOwnedByYou':
-                    raise
-
-    async def upload_file(self, file_path: str, bucket_name:str ,object_name: str):
-        async with self.session.client("s3", **self.config) as s3:
-            await s3.upload_file(file_path, bucket_name, object_name)
-            logger.info(f"✅ Uploaded: {object_name}")
-
-    async def list_files(self , bucket_name:str) -> list[str]:
-        async with self.session.client("s3", **self.config) as s3:
-            response = await s3.list_objects_v2(Bucket=bucket_name) 
-            return [obj['Key'] for obj in response.get('Contents', []) if obj['Key'].endswith('.pdf')]
+        s3 = await self._s3()
+        try:
+            await s3.create_bucket(Bucket=bucket_name) 
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'BucketAlreadyOwnedByYou':
+                raise
+
+    async def upload_file(self, file_path: str, bucket_name:str ,object_name: str, metadata: dict | None = None):
+        """Uploads a local file; files above the multipart threshold are sent as concurrent parts."""
+        s3 = await self._s3()
+        extra_args = {'ContentType': 'application/pdf'} if object_name.endswith('.pdf') else {}
+        if metadata:
+            extra_args['Metadata'] = metadata
+        transfer = TransferConfig(
+            multipart_threshold=config.minio_multipart_threshold_mb * 1024 * 1024,
+            multipart_chunksize=config.minio_multipart_chunk_mb * 1024 * 1024,
+            max_concurrency=config.minio_upload_concurrency,
+        )
+        await s3.upload_file(file_path, bucket_name, object_name, ExtraArgs=extra_args or None, Config=transfer)
+        logger.info(f"✅ Uploaded: {object_name}")
+
+    async def head_object(self, bucket_name: str, object_name: str) -> dict | None:
+        """Object metadata, or None when the object does not exist."""
+        s3 = await self._s3()
+        try:
+            return await s3.head_object(Bucket=bucket_name, Key=object_name)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    async def upload_bytes(self, bucket_name:str, object_name: str, data: bytes, content_type: str = "application/octet-stream"):
+        s3 = await self._s3()
+        await s3.put_object(Bucket=bucket_name, Key=object_name, Body=data, ContentType=content_type)
+
+    async def iter_object_pages(
+        self, bucket_name: str, prefix: str = "", suffix: str = ".pdf"
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Streams the bucket listing page by page (`MINIO_LIST_PAGE_SIZE` keys per request).
+        Each object is `{'key', 'size', 'etag', 'last_modified'}`; size and ETag feed work
+        estimation and dedup, the modification time retention cleanup.
+        """
+        s3 = await self._s3()
+        paginator = s3.get_paginator('list_objects_v2')
+        pages = paginator.paginate(
+            Bucket=bucket_name, Prefix=prefix, PaginationConfig={'PageSize': config.minio_list_page_size}
+        )
+        async for page in pages:
+            objects = [
+                {
+                    'key': obj['Key'],
+                    'size': obj.get('Size', 0),
+                    'etag': obj.get('ETag', '').strip('"'),
+                    'last_modified': obj.get('LastModified'),
+                }
+                for obj in page.get('Contents', []) if obj['Key'].endswith(suffix)
+            ]
+            if objects:
+                yield objects
+
+    async def iter_objects(self, bucket_name: str, prefix: str = "", suffix: str = ".pdf") -> AsyncIterator[dict]:
+        async for page in self.iter_object_pages(bucket_name, prefix, suffix):
+            for obj in page:
+                yield obj
+
+    async def list_objects(self, bucket_name: str, prefix: str = "") -> list[dict]:
+        """Lists every PDF object with its metadata."""
+        return [obj async for obj in self.iter_objects(bucket_name, prefix)]
+
+    async def list_files(self , bucket_name:str, prefix: str = "") -> list[str]:
+        return [obj['key'] async for obj in self.iter_objects(bucket_name, prefix)]
+
+    async def copy_object(self, bucket_name: str, source_key: str, object_name: str):
+        """Server-side copy inside a bucket, the bytes never leave MinIO."""
+        s3 = await self._s3()
+        await s3.copy_object(Bucket=bucket_name, Key=object_name, CopySource={'Bucket': bucket_name, 'Key': source_key})
+
+    async def delete_objects(self, bucket_name: str, object_names: list[str]):
+        s3 = await self._s3()
+        # delete_objects accepts at most 1000 keys per request
+        for i in range(0, len(object_names), 1000):
+            chunk = object_names[i:i + 1000]
+            await s3.delete_objects(Bucket=bucket_name, Delete={'Objects': [{'Key': k} for k in chunk], 'Quiet': True})
 
     async def download_file_bytes(self, bucket_name:str ,object_name: str) -> bytes:
-        async with self.session.client("s3", **self.config) as s3:
-            response = await s3.get_object(Bucket=bucket_name, Key=object_name)
-            return await response['Body'].read()
+        s3 = await self._s3()
+        response = await s3.get_object(Bucket=bucket_name, Key=object_name)
+        return await response['Body'].read()
 
     async def empty_bucket(self,bucket_name:str):
         """
         Deletes all objects in the configured bucket.
         """
-        async with self.session.client("s3", **self.config) as s3:
-            # 1. Use a paginator to handle buckets with more than 1000 files
-            paginator = s3.get_paginator('list_objects_v2')
-            
-            async for page in paginator.paginate(Bucket=bucket_name):
-                # 2. Check if the page has contents
-                if 'Contents' in page:
-                    # 3. Prepare list of objects to delete
-                    objects_to_delete = [{'Key': obj['Key']} for obj in page['Contents']]
-                    
-                    if objects_to_delete:
-                        # 4. Perform batch deletion
-                        await s3.delete_objects(
-                            Bucket=bucket_name,
-                            Delete={'Objects': objects_to_delete}
-                        )
-                        logger.info(f"🗑️ Batch deleted {len(objects_to_delete)} files from {bucket_name}")
-            
-            logger.info(f"✅ Bucket '{bucket_name}' has been successfully emptied.")
\ No newline at end of file
+        s3 = await self._s3()
+        # 1. Use a paginator to handle buckets with more than 1000 files
+        paginator = s3.get_paginator('list_objects_v2')
+        
+        async for page in paginator.paginate(Bucket=bucket_name):
+            # 2. Check if the page has contents
+            if 'Contents' in page:
+                # 3. Prepare list of objects to delete
+                objects_to_delete = [{'Key': obj['Key']} for obj in page['Contents']]
+                
+                if objects_to_delete:
+                    # 4. Perform batch deletion
+                    await s3.delete_objects(
+                        Bucket=bucket_name,
+                        Delete={'Objects': objects_to_delete}
+                    )
+                    logger.info(f"🗑️ Batch deleted {len(objects_to_delete)} files from {bucket_name}")
+        
+        logger.info(f"✅ Bucket '{bucket_name}' has been successfully emptied.")
\ No newline at end of file
@@ -0,0 +1,136 @@
+import asyncio
+import threading
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient
+from pymongo.errors import OperationFailure
+from pymongo.monitoring import ConnectionPoolListener
+
+from app.config.config import config
+from app.config.logger import logger
+
+
+class _PoolCounter(ConnectionPoolListener):
+    """Counts the connections of this process's pools (pymongo connection pool events)."""
+
+    def __init__(self):
+        self.open = 0
+        self.in_use = 0
+        self.created = 0
+        self.checkout_failures = 0
+
+    def connection_created(self, event):
+        self.open += 1
+        self.created += 1
+
+    def connection_closed(self, event):
+        self.open -= 1
+
+    def connection_checked_out(self, event):
+        self.in_use += 1
+
+    def connection_checked_in(self, event):
+        self.in_use -= 1
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+
+_pool_counter = _PoolCounter()
+# One client per event loop: Motor binds a client to the loop that first uses it.
+# The client created before any loop runs (module-level handlers, the checkpointer)
+# is adopted by the first loop that asks for one.
+_clients: dict[asyncio.AbstractEventLoop | None, AsyncIOMotorClient] = {}
+_lock = threading.Lock()
+
+
+def _new_client() -> AsyncIOMotorClient:
+    return AsyncIOMotorClient(
+        config.mongo_uri,
+        maxPoolSize=config.mongo_max_pool_size,
+        minPoolSize=config.mongo_min_pool_size,
+        appname="agent-hrm",
+        event_listeners=[_pool_counter],
+    )
+
+
+def get_client() -> AsyncIOMotorClient:
+    """The process-wide async client of the running event loop, created on first use."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    with _lock:
+        client = _clients.get(loop)
+        if client is None and loop is not None and None in _clients:
+            client = _clients[loop] = _clients.pop(None)
+        if client is None:
+            for closed in [l for l in _clients if l is not None and l.is_closed()]:
+                _clients.pop(closed).close()
+            client = _clients[loop] = _new_client()
+            logger.debug(f"🔌 [MONGO] New client (pool {config.mongo_min_pool_size}-{config.mongo_max_pool_size})")
+        return client
+
+
+def get_sync_client() -> MongoClient:
+    """
+    Blocking client for sync code (the LangGraph checkpointer). It is the pymongo client
+    under the shared async client, so both use the same connection pool.
+    """
+    return get_client().delegate
+
+
+def close_clients():
+    """Closes every client of the process (shutdown)."""
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+def connection_stats() -> dict[str, int]:
+    """Connections of this process: open, checked out, created since start, failed checkouts."""
+    return {
+        "clients": len(_clients),
+        "open": _pool_counter.open,
+        "in_use": _pool_counter.in_use,
+        "created": _pool_counter.created,
+        "checkout_failures": _pool_counter.checkout_failures,
+    }
+
+
+def log_connection_stats(context: str):
+    stats = connection_stats()
+    logger.info(
+        f"🔌 [MONGO] {context}: clients={stats['clients']} open={stats['open']} in_use={stats['in_use']} "
+        f"created={stats['created']} checkout_failures={stats['checkout_failures']} "
+        f"max_pool={config.mongo_max_pool_size}"
+    )
+
+
+async def server_connections() -> dict | None:
+    """Connections the server sees from every client (serverStatus), None without clusterMonitor rights."""
+    try:
+        status = await get_client().admin.command("serverStatus")
+    except OperationFailure as e:
+        logger.warning(f"⚠️ [MONGO] serverStatus unavailable: {e}")
+        return None
+    return status.get("connections")
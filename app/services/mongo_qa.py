@@ -1,4 +1,7 @@
+import hashlib
 import json
+import time
+from collections import OrderedDict
 from typing import Annotated, TypedDict, List
 import asyncio
 
@@ -10,21 +13,34 @@ from langgraph.prebuilt import ToolNode, tools_condition
 from langgraph.graph.message import add_messages
 from langchain_core.output_parsers import StrOutputParser
 
+from app.config.config import config
 from app.config.logger import logger
 from app.services.mongo_service import MongoHandler
+from app.services.qa_cache import normalize_question, qa_cache
+from app.services.query_guard import QueryRejectedError
+from app.services.result_formatter import format_results, selected_fields, start_turn
 from utils.prompt import QA_AGENT_SYSTEM_PROMPT
 from utils.helper import save_token_cost
 
 # -- AGENT STATE --
 class QAAgentState(TypedDict):
     messages: Annotated[List[BaseMessage], add_messages]
+    session_id: str
+    iterations: int
 
 class ResumeQAAgent:
-    def __init__(self, db_structure: dict, session_id:str):
+    """
+    ReAct agent over the resumes collection. Built once per database structure (see
+    `get_qa_agent`): tools, models, system prompt and compiled graph are reused by
+    every question; the session is passed per run.
+    """
+
+    def __init__(self, db_structure: dict):
         self.db_structure = db_structure
+        self.structure_key = structure_key(db_structure)
         self.mongo = MongoHandler()
         self.parser = StrOutputParser()
-        self.session_id = session_id
+        self.system_message = SystemMessage(content=QA_AGENT_SYSTEM_PROMPT.format(structure=self.db_structure))
         # -- DEFINE TOOLS --
         @tool
         async def search_database(query: str, projection: str = None):
@@ -43,22 +59,74 @@ class ResumeQAAgent:
                 query_dict = json.loads(query_clean)
                 proj_dict = json.loads(proj_clean) if proj_clean else None
                 
+                cache_key = json.dumps([query_dict, proj_dict], sort_keys=True, ensure_ascii=False)
+                cached = qa_cache.get("search", cache_key, qa_cache.turn_version())
+                if cached is not None:
+                    return cached
+
                 logger.info(f"🔍 Agent Executing Query: {query_dict}")
                 
                 # 2. Execute
-                results = await self.mongo.execute_raw_query(query_dict, proj_dict)
+                results, stats = await self.mongo.execute_raw_query(query_dict, proj_dict)
                 
                 if not results:
-                    return "Database returned: No documents found matching this query."
-                
-                return f"Database Results: {str(results)}"
+                    output = f"Database returned: No documents found matching this query.\nQuery stats: {stats}"
+                else:
+                    table = format_results(results, selected_fields(query_dict, proj_dict))
+                    output = f"Database Results ({len(results)} documents):\n{table}\nQuery stats: {stats}"
+                qa_cache.put("search", cache_key, qa_cache.turn_version(), output)
+                return output
                 
+            except QueryRejectedError as e:
+                qa_cache.flag_turn("query rejected")
+                return f"Query rejected: {e}"
             except json.JSONDecodeError:
+                qa_cache.flag_turn("invalid query JSON")
                 return "Error: Invalid JSON format. Please correct the query syntax."
             except Exception as e:
+                qa_cache.flag_turn("database error")
                 return f"Database Error: {str(e)}"
 
-        self.tools = [search_database]
+        @tool
+        async def aggregate_database(pipeline: str):
+            """
+            Runs a MongoDB aggregation pipeline on the server and returns only its result.
+            Use it to count, group or rank candidates instead of counting search results.
+            Input MUST be a valid JSON array string. Allowed stages: $match, $unwind, $group, $count, $sort, $limit.
+            Example: '[{"$match": {"final_score": {"$gt": 80}}}, {"$count": "total"}]'
+            """
+            try:
+                pipeline_clean = pipeline.strip().replace("```json", "").replace("```", "")
+                pipeline_list = json.loads(pipeline_clean)
+                cache_key = json.dumps(pipeline_list, sort_keys=True, ensure_ascii=False)
+                cached = qa_cache.get("aggregate", cache_key, qa_cache.turn_version())
+                if cached is not None:
+                    return cached
+
+                logger.info(f"📊 Agent Executing Aggregation: {pipeline_list}")
+                results, stats = await self.mongo.execute_aggregation(pipeline_list)
+
+                if not results:
+                    output = f"Database returned: No documents matched this pipeline.\nQuery stats: {stats}"
+                else:
+                    output = f"Aggregation Results:\n{format_results(results)}\nQuery stats: {stats}"
+                qa_cache.put("aggregate", cache_key, qa_cache.turn_version(), output)
+                return output
+
+            except QueryRejectedError as e:
+                qa_cache.flag_turn("pipeline rejected")
+                return f"Pipeline rejected: {e}"
+            except json.JSONDecodeError:
+                qa_cache.flag_turn("invalid pipeline JSON")
+                return "Error: Invalid JSON format. Please correct the pipeline syntax."
+            except Exception as e:
+                qa_cache.flag_turn("database error")
+                return f"Database Error: {str(e)}"
+
+        self.tools = [search_database, aggregate_database]
+        self.llm = LLMFactory.get_model(tools=self.tools)
+        # Used once the iteration cap is reached: no tools, so the model has to answer
+        self.final_llm = LLMFactory.get_model()
         
         # -- BUILD INTERNAL GRAPH (Thought -> Action Loop) --
         workflow = StateGraph(QAAgentState)
@@ -73,19 +141,61 @@ class ResumeQAAgent:
         self.graph = workflow.compile()
 
     async def call_model(self, state: QAAgentState):
-        messages = state["messages"]
-        # Inject system prompt at the start
-        sys_msg = SystemMessage(content=QA_AGENT_SYSTEM_PROMPT.format(structure=self.db_structure))
-        # We prepend it to the context sent to API
-        response = await LLMFactory.ainvoke(
-            [sys_msg] + messages,
-            tools=self.tools,
-        )
-        asyncio.create_task(save_token_cost("qa_process_node", self.session_id, response))
-        return {"messages": [response]}
-
-    async def run(self, user_question: str) -> str:
-        """Entry point for the agent."""
-        inputs = {"messages": [HumanMessage(content=user_question)]}
-        result = await self.graph.ainvoke(inputs)
-        return self.parser.invoke(result["messages"][-1])
+        iterations = state.get("iterations", 0)
+        llm = self.llm if iterations < config.qa_max_iterations else self.final_llm
+        if llm is self.final_llm:
+            qa_cache.flag_turn("iteration cap")
+            logger.warning(f"⚠️ [QA] Iteration cap ({config.qa_max_iterations}) reached, answering with the results so far")
+        # The system prompt is prepended to the context sent to the API
+        started = time.perf_counter()
+        response = LLMFactory.stamp_latency(await llm.ainvoke([self.system_message] + state["messages"]), started)
+        await save_token_cost("qa_process_node", state["session_id"], response)
+        return {"messages": [response], "iterations": iterations + 1}
+
+    async def run(self, user_question: str, session_id: str) -> str:
+        """Entry point for the agent. Repeated questions are answered from the cache until candidates change."""
+        version = await self.mongo.write_version()
+        question_key = (self.structure_key, normalize_question(user_question))
+        cached = qa_cache.get("answer", question_key, version)
+        if cached is not None:
+            logger.info(f"⚡ [QA CACHE] Answered from cache (hits={qa_cache.hits}, misses={qa_cache.misses})")
+            return cached
+        qa_cache.begin_turn(version)
+
+        inputs = {"messages": [HumanMessage(content=user_question)], "session_id": session_id, "iterations": 0}
+        tokens = start_turn()
+        # ToolNode runs the tool calls of one model turn concurrently
+        result = await self.graph.ainvoke(inputs, {"recursion_limit": 2 * config.qa_max_iterations + 5})
+        if tokens["calls"]:
+            logger.info(
+                f"🧮 [QA] {tokens['calls']} tool results: {tokens['raw']} → {tokens['formatted']} tokens "
+                f"({tokens['raw'] - tokens['formatted']} saved)"
+            )
+        answer = self.parser.invoke(result["messages"][-1])
+        issues = qa_cache.turn_issues()
+        if issues:
+            # The answer may rest on partial results; let the next ask try again
+            logger.info(f"🚫 [QA CACHE] Answer not cached: {', '.join(sorted(set(issues)))}")
+        else:
+            qa_cache.put("answer", question_key, version, answer)
+        return answer
+
+
+_agents: "OrderedDict[str, ResumeQAAgent]" = OrderedDict()
+
+
+def structure_key(db_structure: dict) -> str:
+    return hashlib.sha256(json.dumps(db_structure, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def get_qa_agent(db_structure: dict) -> ResumeQAAgent:
+    """The QA agent for a database structure, built on first use and kept for later questions."""
+    key = structure_key(db_structure)
+    agent = _agents.get(key)
+    if agent is None:
+        agent = _agents[key] = ResumeQAAgent(db_structure)
+        while len(_agents) > config.qa_agent_cache_size:
+            _agents.popitem(last=False)
+    else:
+        _agents.move_to_end(key)
+    return agent
@@ -1,42 +1,251 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import DESCENDING
+import time
+
+from pymongo import DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, ExecutionTimeout
 from app.config.config import config
 from app.config.logger import logger
-from utils.process_stracutre import enrich_resume_with_durations , fix_age_field
+from app.services.mongo_client import get_client
+from app.services.query_guard import (
+    QueryRejectedError, clamp_limit, plan_summary, vet_filter, vet_pipeline, vet_projection,
+)
+from utils.process_stracutre import build_search_view, enrich_resume_with_durations , fix_age_field
+from utils.skill_taxonomy import canonical_skills
 
 
 class MongoHandler:
     def __init__(self):
-        self.client = AsyncIOMotorClient(config.mongo_uri)
+        # Shared process-wide client: handlers are cheap and share one connection pool
+        self.client = get_client()
         self.db = self.client[config.mongo_db_name]
         self.collection = self.db[config.mongo_collection]
         self.usage_logs = self.db[config.mongo_db_usage]
+        self.meta = self.db[config.mongo_meta_collection]
 
-    async def save_candidate(self, resume_data: dict):
-        """Saves or updates a candidate."""
-        # We use email or a hash as a unique identifier to avoid duplicates
+    async def write_version(self) -> int:
+        """Counter bumped on every candidate write; QA caches are only valid for one version."""
+        doc = await self.meta.find_one({"_id": "resumes_write_version"})
+        return (doc or {}).get("version", 0)
+
+    async def _bump_write_version(self):
+        await self.meta.update_one({"_id": "resumes_write_version"}, {"$inc": {"version": 1}}, upsert=True)
+
+    @staticmethod
+    def _candidate_upsert(resume_data: dict) -> UpdateOne:
+        # We use email or a hash as a unique identifier to avoid duplicates, within the review
+        # session: another session scoring the same person must not overwrite this one's score
         email = resume_data.get('resume').get("personal_info", {}).get("email")
         if not email:
             # Fallback if no email: use filename or full name
-            query = {"_source_file": resume_data.get('resume').get("_source_file")}
+            query = {"resume._source_file": resume_data.get('resume').get("_source_file")}
         else:
             query = {"resume.personal_info.email": email}
+        query["session_id"] = resume_data.get("session_id")
         resume_data = enrich_resume_with_durations(resume_data)
         resume_data = fix_age_field(resume_data)
-        await self.collection.update_one(query, {"$set": resume_data}, upsert=True)
+        resume_data['search'] = build_search_view(resume_data)
+        return UpdateOne(query, {"$set": resume_data}, upsert=True)
+
+    async def save_candidate(self, resume_data: dict):
+        """Saves or updates a candidate."""
+        op = self._candidate_upsert(resume_data)
+        try:
+            await self.collection.bulk_write([op])
+        finally:
+            await self._bump_write_version()
         logger.info(f"💾 Saved candidate to DB: {resume_data['final_score']:.1f}/100")
 
-    async def get_top_candidates(self, limit: int = 5):
-        """Retrieves top N candidates sorted by final_score."""
-        cursor = self.collection.find().sort("final_score", DESCENDING).limit(limit)
+    async def save_candidates(self, candidates: list[dict]) -> dict[str, str]:
+        """
+        Saves or updates candidates with unordered bulk upserts of `mongo_bulk_batch_size`.
+        Returns `{source_file: error}` for the candidates that could not be written.
+        """
+        failed: dict[str, str] = {}
+        started = time.perf_counter()
+        size = config.mongo_bulk_batch_size
+        for i in range(0, len(candidates), size):
+            prepared = []
+            for res in candidates[i:i + size]:
+                try:
+                    prepared.append((res['resume'].get('_source_file'), self._candidate_upsert(res)))
+                except Exception as e:
+                    failed[res['resume'].get('_source_file')] = str(e)
+            if not prepared:
+                continue
+            try:
+                await self.collection.bulk_write([op for _, op in prepared], ordered=False)
+            except BulkWriteError as e:
+                for err in e.details.get('writeErrors', []):
+                    failed[prepared[err['index']][0]] = err.get('errmsg', 'write error')
+            finally:
+                # Even a partly failed unordered batch may have written documents
+                await self._bump_write_version()
+        elapsed = time.perf_counter() - started
+        written = len(candidates) - len(failed)
+        logger.info(
+            f"💾 Saved {written}/{len(candidates)} candidates in {elapsed:.2f}s "
+            f"({written / elapsed if elapsed else 0:.0f} docs/s, batch size {size})"
+        )
+        return failed
+
+    async def rebuild_search_views(self) -> int:
+        """
+        Recomputes the `search` view of every saved candidate (after changing how it is
+        built, e.g. new skill aliases).
+        """
+        updated, ops = 0, []
+        async for doc in self.collection.find({}, {"resume": 1, "final_score": 1}):
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search": build_search_view(doc)}}))
+            if len(ops) >= config.mongo_bulk_batch_size:
+                updated += (await self.collection.bulk_write(ops, ordered=False)).modified_count
+                ops = []
+        if ops:
+            updated += (await self.collection.bulk_write(ops, ordered=False)).modified_count
+        await self._bump_write_version()
+        return updated
+
+    async def candidates_with_skills(
+        self, skills: list[str], match_all: bool = True, projection: dict | None = None
+    ) -> list[dict]:
+        """
+        Candidates with all (or any) of `skills`, any alias or spelling, best first. Served by
+        the multikey `search.skills` index, which maps each canonical skill to its candidates.
+        """
+        wanted = canonical_skills(skills)
+        if not wanted:
+            return []
+        query = {"search.skills": {"$all" if match_all else "$in": wanted}}
+        cursor = self.collection.find(query, projection).sort("final_score", DESCENDING)
+        return [doc async for doc in cursor]
+
+    async def skill_counts(self, limit: int = 20) -> list[dict]:
+        """Most common canonical skills and their number of candidates."""
+        cursor = self.collection.aggregate([
+            {"$unwind": "$search.skills"},
+            {"$group": {"_id": "$search.skills", "candidates": {"$sum": 1}}},
+            {"$sort": {"candidates": -1}},
+            {"$limit": limit},
+        ])
+        return [doc async for doc in cursor]
+
+    async def get_top_candidates(self, limit: int = 5, session_id: str | None = None):
+        """Retrieves top N candidates sorted by final_score, of one review session if given."""
+        query = {"session_id": session_id} if session_id else {}
+        cursor = self.collection.find(query).sort("final_score", DESCENDING).limit(limit)
         return await cursor.to_list(length=limit)
 
     async def save_doc(self,collection_name,data):
         result = await collection_name.insert_one(data)
         return result
 
-    async def execute_raw_query(self, query: dict , projection: dict = None):
-        """Executes a generated query (for the Q&A feature)."""
+    async def indexed_fields(self) -> list[str]:
+        """Fields of the resumes collection's indexes (what a query should filter on)."""
+        info = await self.collection.index_information()
+        return sorted({field for name, index in info.items() if name != "_id_" for field, _ in index["key"]})
+
+    async def execute_raw_query(self, query: dict, projection: dict = None, limit: int | None = None) -> tuple[list, dict]:
+        """
+        Executes a generated query (for the Q&A feature) under the query governor: vetted
+        filter and projection, at most `qa_query_max_results` documents, `qa_query_max_time_ms`
+        on the server. Plans that scan the whole collection past `qa_collscan_max_docs` are
+        rejected, or rewritten to search only the `qa_collscan_max_docs` highest-scoring candidates.
+        Returns the documents and the query stats; raises QueryRejectedError.
+        """
+        query = vet_filter(query)
+        projection = vet_projection(projection)
+        limit = clamp_limit(limit)
+
+        explain = await self.db.command({
+            "explain": {"find": self.collection.name, "filter": query, "projection": projection, "limit": limit},
+            "verbosity": "queryPlanner",
+        })
+        plan = plan_summary(explain)
+        stats = {"plan": "COLLSCAN" if plan["collscan"] else "IXSCAN", "indexes": plan["indexes"], "rewritten": False}
+
+        cursor = self.collection.find(query, projection, limit=limit, max_time_ms=config.qa_query_max_time_ms)
+        if plan["collscan"]:
+            total = await self.collection.estimated_document_count()
+            if total > config.qa_collscan_max_docs:
+                indexed = await self.indexed_fields()
+                if config.qa_collscan_action == "reject" or "final_score" not in indexed:
+                    raise QueryRejectedError(
+                        f"This query scans all {total} candidates. Add a filter on an indexed field: {', '.join(indexed)}."
+                    )
+                cursor = await self._top_scored_cursor(query, projection, limit)
+                if cursor is None:
+                    raise QueryRejectedError(
+                        f"This query scans all {total} candidates. Add a filter on an indexed field: {', '.join(indexed)}."
+                    )
+                stats.update(rewritten=True, note=(
+                    f"searched only the {config.qa_collscan_max_docs} highest-scoring of {total} candidates; "
+                    "add a filter on an indexed field to search all of them"
+                ))
+
+        started = time.perf_counter()
+        try:
+            results = await cursor.to_list(length=limit)
+        except ExecutionTimeout:
+            raise QueryRejectedError(
+                f"The query exceeded {config.qa_query_max_time_ms} ms. Narrow it with filters on indexed fields: "
+                f"{', '.join(await self.indexed_fields())}."
+            )
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        stats.update(returned=len(results), limit=limit, elapsed_ms=round(elapsed_ms),
+                     slow=elapsed_ms >= config.qa_slow_query_ms)
+        if stats["slow"]:
+            logger.warning(f"🐢 [QA QUERY] {elapsed_ms:.0f}ms {stats['plan']} {query}")
+        return results, stats
+
+    async def _top_scored_cursor(self, query: dict, projection: dict, limit: int):
+        """
+        `query` restricted to the `qa_collscan_max_docs` highest-scoring candidates, walking the
+        `final_score` index, so at most that many documents are examined. None when the
+        collection has too few scored candidates to draw the line.
+        """
+        by_score = [("final_score", DESCENDING)]
+        # Covered by the final_score index: reads index keys only
+        scores = self.collection.find({}, {"_id": 0, "final_score": 1}, skip=config.qa_collscan_max_docs - 1, limit=1)
+        cutoff = await scores.hint(by_score).sort(by_score).to_list(length=1)
+        if not cutoff or cutoff[0].get("final_score") is None:
+            return None
+        bounded = {"$and": [query, {"final_score": {"$gte": cutoff[0]["final_score"]}}]}
+        cursor = self.collection.find(bounded, projection, limit=limit, max_time_ms=config.qa_query_max_time_ms)
+        return cursor.hint(by_score).sort(by_score)
+
+    async def execute_aggregation(self, pipeline: list) -> tuple[list, dict]:
+        """
+        Runs a generated aggregation (for the Q&A feature) server-side, under the same limits
+        as `execute_raw_query`: vetted stages, `qa_query_max_time_ms`, at most
+        `qa_query_max_results` result documents. A `$match` that would scan the whole
+        collection past `qa_collscan_max_docs` is rejected (a bounded scan would miscount).
+        Returns the result documents and the query stats; raises QueryRejectedError.
+        """
+        pipeline = vet_pipeline(pipeline)
+        explain = await self.db.command({
+            "explain": {"aggregate": self.collection.name, "pipeline": pipeline, "cursor": {}},
+            "verbosity": "queryPlanner",
+        })
+        plan = plan_summary(explain)
+        stats = {"plan": "COLLSCAN" if plan["collscan"] else "IXSCAN", "indexes": plan["indexes"]}
+        if plan["collscan"] and any("$match" in stage for stage in pipeline):
+            total = await self.collection.estimated_document_count()
+            if total > config.qa_collscan_max_docs:
+                raise QueryRejectedError(
+                    f"This $match scans all {total} candidates. Filter on an indexed field: "
+                    f"{', '.join(await self.indexed_fields())}."
+                )
 
-        cursor = self.collection.find(query , projection)
-        return await cursor.to_list(length=10)
\ No newline at end of file
+        started = time.perf_counter()
+        try:
+            cursor = self.collection.aggregate(pipeline, maxTimeMS=config.qa_query_max_time_ms)
+            results = await cursor.to_list(length=config.qa_query_max_results)
+        except ExecutionTimeout:
+            raise QueryRejectedError(
+                f"The aggregation exceeded {config.qa_query_max_time_ms} ms. Narrow its $match with filters on "
+                f"indexed fields: {', '.join(await self.indexed_fields())}."
+            )
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        stats.update(returned=len(results), limit=config.qa_query_max_results, elapsed_ms=round(elapsed_ms),
+                     slow=elapsed_ms >= config.qa_slow_query_ms)
+        if stats["slow"]:
+            logger.warning(f"🐢 [QA AGGREGATE] {elapsed_ms:.0f}ms {stats['plan']} {pipeline}")
+        return results, stats
@@ -1,29 +1,53 @@
 import asyncio
 import io
 import base64
-from pdf2image import convert_from_bytes
+from pdf2image import convert_from_bytes, convert_from_path
 from langchain_core.messages import HumanMessage
 from app.config.config import config
 from app.config.logger import logger
 from app.services.llm_factory import LLMFactory
 from app.services.minio_service import MinioHandler
+from app.services.ledger import ProgressLedger, Stage
+from app.services.local_uploads import local_uploads
 from utils.prompt import OCR_PROMPT
 from utils.helper import save_token_cost
 
 class OCRService:
-    def __init__(self, node_name:str, session_id:str):
+    def __init__(self, node_name:str, session_id:str, ledger: ProgressLedger | None = None):
         self.semaphore = asyncio.Semaphore(config.ocr_workers)
         self.node_name = node_name
         self.session_id = session_id
+        self.ledger = ledger
+
+    async def _rasterize(self, minio: MinioHandler, bucket_name: str, file_key: str):
+        """
+        Renders the PDF pages. A file still in the local upload path is rendered straight
+        from disk (pdftoppm reads the file itself), so OCR does not wait for the MinIO
+        upload and download round-trip; otherwise the bytes come from MinIO.
+        """
+        local_path = local_uploads.local_path(bucket_name, file_key)
+        if local_path is not None:
+            try:
+                # Run CPU-bound image conversion in a separate thread
+                images = await asyncio.to_thread(convert_from_path, local_path, fmt='png', dpi=300)
+                local_uploads.release(bucket_name, file_key)
+                return images, f"local:{local_path}"
+            except Exception as e:
+                logger.warning(f"⚠️ [OCR] Local copy of {file_key} unusable, using MinIO: {e}")
+
+        if await local_uploads.wait_uploaded(bucket_name, [file_key]):
+            raise RuntimeError(f"{file_key} was never stored in MinIO (its upload failed)")
+        pdf_bytes = await minio.download_file_bytes(bucket_name,file_key)
+        images = await asyncio.to_thread(convert_from_bytes, pdf_bytes, fmt='png', dpi=300)
+        return images, f"{bucket_name}/{file_key}"
 
     async def process_file(self, minio: MinioHandler, bucket_name:str ,file_key: str) -> tuple[str, str | None]:
         async with self.semaphore:
             try:
                 logger.info(f"🔹 [OCR START] {file_key}")
-                pdf_bytes = await minio.download_file_bytes(bucket_name,file_key)
-                
-                # Run CPU-bound image conversion in a separate thread
-                images = await asyncio.to_thread(convert_from_bytes, pdf_bytes, fmt='png', dpi=300)
+                images, source = await self._rasterize(minio, bucket_name, file_key)
+                if self.ledger is not None:
+                    await self.ledger.advance(self.session_id, file_key, Stage.DOWNLOADED, source=source)
                 
                 if not images:
                     logger.warning(f"⚠️ [OCR WARNING] No images converted for {file_key}")
@@ -43,7 +67,7 @@ class OCRService:
                         [msg],
                         model_name=config.ocr_model_name,
                     )
-                    asyncio.create_task(save_token_cost(self.node_name, self.session_id, response))
+                    await save_token_cost(self.node_name, self.session_id, response)
                     text_result += response.content + "\n"
 
                 return file_key, text_result
@@ -0,0 +1,219 @@
+import asyncio
+import time
+
+from app.config.config import config
+from app.config.logger import logger
+from app.schemas.hiring import HiringRequirements
+from app.services.analyzer import EvaluationStats
+from app.services.ledger import Stage
+from app.services.processor import ResumeProcessor
+from app.services.minio_service import MinioHandler
+from app.services.ocr import OCRService
+
+# Marks the end of a stage's input queue
+_DONE = object()
+
+
+class StageStats:
+    """Queue depth and worker utilization of one pipeline stage."""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.max_depth = 0
+        self.depth_total = 0
+        self.depth_samples = 0
+
+    def sample_depth(self, queue: asyncio.Queue):
+        depth = queue.qsize()
+        self.max_depth = max(self.max_depth, depth)
+        self.depth_total += depth
+        self.depth_samples += 1
+
+    def utilization(self, elapsed: float) -> float:
+        if elapsed <= 0 or self.workers == 0:
+            return 0.0
+        return self.busy_seconds / (self.workers * elapsed)
+
+    def summary(self, elapsed: float) -> str:
+        avg_depth = self.depth_total / self.depth_samples if self.depth_samples else 0
+        return (
+            f"{self.name}: workers={self.workers} done={self.processed} failed={self.failed} "
+            f"util={self.utilization(elapsed):.0%} queue_avg={avg_depth:.1f} queue_max={self.max_depth}"
+        )
+
+
+class ResumePipeline:
+    """
+    Streams every file through OCR -> structure -> evaluate independently.
+    Stages are connected by bounded queues, so a slow file only holds up its own
+    worker instead of the whole batch.
+    """
+
+    def __init__(
+        self,
+        processor: ResumeProcessor,
+        session_id: str,
+        reqs: HiringRequirements,
+        batch_id: int,
+    ):
+        self.processor = processor
+        self.session_id = session_id
+        self.reqs = reqs
+        self.batch_id = batch_id
+        self.ocr_service = OCRService(node_name="batch_ocr_node", session_id=session_id, ledger=processor.ledger)
+        self.minio = MinioHandler()
+        self.entries: dict[str, dict] = {}
+
+        # Artifact references only, the payloads themselves live in the artifact store
+        self.ocr_results: dict[str, str] = {}
+        self.structured_results: list[dict] = []
+        self.evaluated_results: list[dict] = []
+        self.eval_stats = EvaluationStats(
+            mode=f"pipelined(K<={config.eval_batch_size})" if config.eval_batch_size > 1 else "pipelined(K=1)"
+        )
+
+        self.stats = {
+            "ocr": StageStats("ocr", config.ocr_workers),
+            "structure": StageStats("structure", config.structure_workers),
+            "evaluate": StageStats("evaluate", config.eval_workers),
+        }
+
+    async def _failed(self, stage: Stage, file_keys: list[str], error: Exception):
+        """A storage or ledger error only drops the files it happened to, not the batch."""
+        name = {Stage.OCR: "ocr", Stage.STRUCTURED: "structure", Stage.EVALUATED: "evaluate"}[stage]
+        self.stats[name].failed += len(file_keys)
+        for file_key in file_keys:
+            logger.error(f"❌ [Batch {self.batch_id}] {name} of {file_key} failed: {error}")
+            try:
+                await self.processor.ledger.fail(self.session_id, file_key, stage, str(error))
+            except Exception as e:
+                logger.error(f"❌ [LEDGER] Could not record the failure of {file_key}: {e}")
+
+    async def _ocr_worker(self, source, out: asyncio.Queue):
+        stats = self.stats["ocr"]
+        while (file_key := await source.next()) is not None:
+            started = time.perf_counter()
+            try:
+                ref = await self.processor.ocr(
+                    self.ocr_service, self.minio, self.session_id, file_key, self.entries.get(file_key)
+                )
+            except Exception as e:
+                await self._failed(Stage.OCR, [file_key], e)
+                continue
+            finally:
+                stats.busy_seconds += time.perf_counter() - started
+            if ref is None:
+                stats.failed += 1
+                continue
+            stats.processed += 1
+            self.ocr_results[file_key] = ref
+            await out.put((file_key, ref))
+            self.stats["structure"].sample_depth(out)
+
+    async def _structure_worker(self, inp: asyncio.Queue, out: asyncio.Queue):
+        stats = self.stats["structure"]
+        while True:
+            item = await inp.get()
+            if item is _DONE:
+                return
+            key, ocr_ref = item
+            started = time.perf_counter()
+            try:
+                structured = await self.processor.structure(self.session_id, key, ocr_ref, self.entries.get(key))
+            except Exception as e:
+                await self._failed(Stage.STRUCTURED, [key], e)
+                continue
+            finally:
+                stats.busy_seconds += time.perf_counter() - started
+            if structured is None:
+                stats.failed += 1
+                continue
+            stats.processed += 1
+            self.structured_results.append(structured)
+            await out.put(structured)
+            self.stats["evaluate"].sample_depth(out)
+
+    async def _evaluate_worker(self, inp: asyncio.Queue):
+        stats = self.stats["evaluate"]
+        finished = False
+        while not finished:
+            item = await inp.get()
+            if item is _DONE:
+                return
+            # Batched mode: take whatever is already waiting, up to K resumes
+            items = [item]
+            while len(items) < config.eval_batch_size and not inp.empty():
+                extra = inp.get_nowait()
+                if extra is _DONE:
+                    finished = True
+                    break
+                items.append(extra)
+
+            started = time.perf_counter()
+            try:
+                results = await self.processor.evaluate(
+                    self.session_id, items, self.reqs, self.entries, self.eval_stats
+                )
+            except Exception as e:
+                await self._failed(Stage.EVALUATED, [item["file"] for item in items], e)
+                continue
+            finally:
+                stats.busy_seconds += time.perf_counter() - started
+            self.evaluated_results.extend(results)
+            stats.processed += len(results)
+            stats.failed += len(items) - len(results)
+
+    async def run(self, source):
+        """`source` hands out file keys via `await source.next()` until it returns None."""
+        started = time.perf_counter()
+        self.entries = await self.processor.ledger.entries(self.session_id)
+        structure_queue: asyncio.Queue = asyncio.Queue(maxsize=config.pipeline_queue_size)
+        eval_queue: asyncio.Queue = asyncio.Queue(maxsize=config.pipeline_queue_size)
+
+        async def run_stage(workers: list, out: asyncio.Queue | None, next_workers: int):
+            await asyncio.gather(*workers)
+            # Wake up every worker of the next stage once this one is drained
+            if out is not None:
+                for _ in range(next_workers):
+                    await out.put(_DONE)
+
+        ocr_workers = max(1, config.ocr_workers)
+        structure_workers = max(1, config.structure_workers)
+        eval_workers = max(1, config.eval_workers)
+
+        stages = [
+            asyncio.create_task(run_stage(
+                [self._ocr_worker(source, structure_queue) for _ in range(ocr_workers)],
+                structure_queue, structure_workers,
+            )),
+            asyncio.create_task(run_stage(
+                [self._structure_worker(structure_queue, eval_queue) for _ in range(structure_workers)],
+                eval_queue, eval_workers,
+            )),
+            asyncio.create_task(run_stage(
+                [self._evaluate_worker(eval_queue) for _ in range(eval_workers)],
+                None, 0,
+            )),
+        ]
+        try:
+            await asyncio.gather(*stages)
+        finally:
+            # A stage that died would leave its neighbours waiting on the queues forever
+            for stage in stages:
+                stage.cancel()
+
+        elapsed = time.perf_counter() - started
+        self.eval_stats.resumes = len(self.evaluated_results)
+        self.eval_stats.log()
+        self.log_stats(elapsed)
+
+    def log_stats(self, elapsed: float):
+        stats = list(self.stats.values())
+        bottleneck = max(stats, key=lambda s: s.utilization(elapsed))
+        logger.info(f"📈 [Batch {self.batch_id}] Pipeline finished in {elapsed:.1f}s (bottleneck: {bottleneck.name})")
+        for s in stats:
+            logger.info(f"📈 [Batch {self.batch_id}]   {s.summary(elapsed)}")
@@ -0,0 +1,163 @@
+from app.config.config import config
+from app.config.logger import logger
+from app.schemas.hiring import HiringRequirements
+from app.services.analyzer import ResumeAnalyzerService, EvaluationStats
+from app.services.artifact_store import ArtifactStore
+from app.services.ledger import ProgressLedger, Stage, stage_reached
+from app.services.minio_service import MinioHandler
+from app.services.mongo_service import MongoHandler
+from app.services.ocr import OCRService
+
+
+class ResumeProcessor:
+    """
+    The OCR -> structure -> evaluate -> save steps for individual files, shared by the
+    staged batch nodes and the pipelined mode. Every step stores its artifact, records
+    it in the ledger and is skipped when the ledger shows it already succeeded.
+    Failures are recorded against the stage the file did not reach.
+    """
+
+    def __init__(self, analyzer: ResumeAnalyzerService, artifacts: ArtifactStore, ledger: ProgressLedger):
+        self.analyzer = analyzer
+        self.artifacts = artifacts
+        self.ledger = ledger
+        self.mongo = MongoHandler()
+
+    async def ocr(
+        self,
+        ocr_service: OCRService,
+        minio: MinioHandler,
+        session_id: str,
+        file_key: str,
+        entry: dict | None = None,
+    ) -> str | None:
+        """Returns the OCR text reference of `file_key`."""
+        if stage_reached(entry, Stage.OCR):
+            return entry["artifacts"][Stage.OCR.value]
+        ref = await self.artifacts.find_shared(ArtifactStore.OCR, file_key)
+        if ref is not None:
+            logger.info(f"♻️ [OCR] Reusing text of identical file {file_key}")
+            await self.ledger.advance(session_id, file_key, Stage.OCR, ref)
+            return ref
+        key, text = await ocr_service.process_file(minio, config.minio_resume_bucket, file_key)
+        if text is None:
+            await self.ledger.fail(session_id, file_key, Stage.OCR, "OCR produced no text")
+            return None
+        ref = await self.artifacts.put_text(session_id, ArtifactStore.OCR, key, text)
+        await self.ledger.advance(session_id, key, Stage.OCR, ref)
+        return ref
+
+    async def structure(self, session_id: str, file_key: str, ocr_ref: str, entry: dict | None = None) -> dict | None:
+        """Returns the compact `{"file", "ref"}` entry of the structured resume."""
+        if stage_reached(entry, Stage.STRUCTURED):
+            return {"file": file_key, "ref": entry["artifacts"][Stage.STRUCTURED.value]}
+        ref = await self.artifacts.find_shared(ArtifactStore.STRUCTURED, file_key)
+        if ref is not None:
+            await self.ledger.advance(session_id, file_key, Stage.STRUCTURED, ref)
+            return {"file": file_key, "ref": ref}
+        text = await self.artifacts.get_text(ocr_ref)
+        data = await self.analyzer.structure_text(file_key, text, session_id)
+        if data is None:
+            await self.ledger.fail(session_id, file_key, Stage.STRUCTURED, "Structuring failed")
+            return None
+        item = await self.artifacts.put_structured(session_id, data)
+        await self.ledger.advance(session_id, file_key, Stage.STRUCTURED, item["ref"])
+        return item
+
+    async def evaluate(
+        self,
+        session_id: str,
+        structured: list[dict],
+        reqs: HiringRequirements,
+        entries: dict[str, dict] | None = None,
+        stats: EvaluationStats | None = None,
+    ) -> list[dict]:
+        """
+        Evaluates structured resumes, returns compact `{"file", "ref", "final_score"}` entries.
+        With `stats` the caller owns the run statistics (pipelined mode).
+        """
+        entries = entries or {}
+        evaluated = []
+        todo = []
+        for item in structured:
+            entry = entries.get(item["file"])
+            if stage_reached(entry, Stage.EVALUATED):
+                evaluated.append({
+                    "file": item["file"],
+                    "ref": entry["artifacts"][Stage.EVALUATED.value],
+                    "final_score": entry.get("final_score"),
+                })
+            else:
+                todo.append(item)
+        if not todo:
+            return evaluated
+
+        found = await self.artifacts.get_doc_map([item["ref"] for item in todo])
+        docs = []
+        for item in todo:
+            if item["ref"] in found:
+                doc = found[item["ref"]]
+                # Shared (content-keyed) resumes carry the key of the session that structured them first
+                doc["_source_file"] = item["file"]
+                docs.append(doc)
+        if stats is None:
+            results = await self.analyzer.evaluate_resumes(docs, reqs, session_id)
+        else:
+            results = []
+            for batch in self.analyzer.plan_batches(docs, reqs):
+                results.extend(await self.analyzer.evaluate_batch(batch, reqs, session_id, stats))
+
+        for result in results:
+            item = await self.artifacts.put_evaluation(session_id, result)
+            await self.ledger.advance(
+                session_id, item["file"], Stage.EVALUATED, item["ref"], final_score=item["final_score"]
+            )
+            evaluated.append(item)
+
+        scored = {r["resume"].get("_source_file") for r in results}
+        for item in todo:
+            if item["file"] not in scored:
+                await self.ledger.fail(session_id, item["file"], Stage.EVALUATED, "Evaluation failed")
+        return evaluated
+
+    async def process_file(
+        self,
+        ocr_service: OCRService,
+        minio: MinioHandler,
+        session_id: str,
+        file_key: str,
+        reqs: HiringRequirements,
+    ) -> dict | None:
+        """Runs the missing OCR -> structure -> evaluate steps of one file; returns its evaluated entry."""
+        entry = (await self.ledger.entries(session_id, [file_key])).get(file_key)
+        ocr_ref = await self.ocr(ocr_service, minio, session_id, file_key, entry)
+        if ocr_ref is None:
+            return None
+        structured = await self.structure(session_id, file_key, ocr_ref, entry)
+        if structured is None:
+            return None
+        evaluated = await self.evaluate(session_id, [structured], reqs, {file_key: entry} if entry else None)
+        return evaluated[0] if evaluated else None
+
+    async def save(self, session_id: str, evaluated: list[dict]) -> int:
+        """
+        Persists evaluated candidates to the resumes collection with bulk upserts.
+        Candidates the ledger already shows as saved (write-behind) are skipped.
+        """
+        entries = await self.ledger.entries(session_id, [item["file"] for item in evaluated])
+        todo = [item for item in evaluated if not stage_reached(entries.get(item["file"]), Stage.SAVED)]
+        if not todo:
+            return 0
+        refs = list(dict.fromkeys(item["ref"] for item in todo))
+        candidates = await self.artifacts.get_docs(refs)
+        for res in candidates:
+            res['session_id'] = session_id
+
+        failed = await self.mongo.save_candidates(candidates)
+        for file_key, error in failed.items():
+            logger.error(f"❌ [SAVE ERROR] {file_key}: {error}")
+            await self.ledger.fail(session_id, file_key, Stage.SAVED, error)
+        saved = [res["resume"].get("_source_file") for res in candidates]
+        saved = [f for f in saved if f not in failed]
+        await self.ledger.advance_many(session_id, saved, Stage.SAVED)
+        return len(saved)
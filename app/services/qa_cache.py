@@ -0,0 +1,79 @@
+import re
+from collections import OrderedDict
+from contextvars import ContextVar
+
+from app.config.config import config
+
+# Write version of the resumes collection read at the start of the current QA question
+_turn_version: ContextVar[int | None] = ContextVar("qa_turn_version", default=None)
+# Why the current question's answer must not be cached (rejected or failed tool calls, iteration cap);
+# a list, so tools running in child tasks add to the same one
+_turn_issues: ContextVar[list[str] | None] = ContextVar("qa_turn_issues", default=None)
+
+_PUNCTUATION = re.compile(r"[\s?!.,;:؟،؛«»\"']+")
+# Arabic code points keyboards produce for Persian letters, and the zero-width non-joiner
+_PERSIAN = str.maketrans({"ي": "ی", "ك": "ک", "ة": "ه", "‌": " "})
+
+
+def normalize_question(question: str) -> str:
+    """Case, spacing, punctuation and Arabic/Persian letter variants do not change the question."""
+    return _PUNCTUATION.sub(" ", str(question).translate(_PERSIAN).lower()).strip()
+
+
+class QACache:
+    """
+    In-process LRU of QA answers (by normalized question) and tool results (by query).
+    Every entry carries the write version of the resumes collection it was computed at;
+    `MongoHandler` bumps that version on every candidate write, in any process, so an
+    entry is only served while the candidate set is unchanged.
+    """
+
+    def __init__(self):
+        self._entries: OrderedDict[tuple, tuple[int, str]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind: str, key, version: int | None) -> str | None:
+        if not config.qa_cache_size or version is None:
+            return None
+        entry = self._entries.get((kind, key))
+        if entry is None or entry[0] != version:
+            if entry is not None:
+                del self._entries[(kind, key)]
+            self.misses += 1
+            return None
+        self._entries.move_to_end((kind, key))
+        self.hits += 1
+        return entry[1]
+
+    def put(self, kind: str, key, version: int | None, value: str):
+        if not config.qa_cache_size or version is None:
+            return
+        self._entries[(kind, key)] = (version, value)
+        self._entries.move_to_end((kind, key))
+        while len(self._entries) > config.qa_cache_size:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def begin_turn(version: int):
+        """Tool calls of the current question cache their results under `version`."""
+        _turn_version.set(version)
+        _turn_issues.set([])
+
+    @staticmethod
+    def flag_turn(reason: str):
+        """Marks the current question's answer as not cacheable."""
+        issues = _turn_issues.get()
+        if issues is not None:
+            issues.append(reason)
+
+    @staticmethod
+    def turn_issues() -> list[str]:
+        return list(_turn_issues.get() or [])
+
+    @staticmethod
+    def turn_version() -> int | None:
+        return _turn_version.get()
+
+
+qa_cache = QACache()
@@ -0,0 +1,210 @@
+"""
+Checks for LLM-written MongoDB queries (the QA agent's tools) before they reach the server.
+"""
+from app.config.config import config
+from utils.skill_taxonomy import canonical_skill
+
+# Operators that run server-side JavaScript
+_FORBIDDEN_OPERATORS = {"$where", "$function", "$accumulator"}
+# Aggregation stages and $group accumulators the QA agent may use
+_PIPELINE_STAGES = {"$match", "$unwind", "$group", "$count", "$sort", "$limit"}
+_GROUP_ACCUMULATORS = {"$sum", "$avg", "$min", "$max", "$first", "$last", "$addToSet", "$count"}
+# Aggregation variables the QA agent may use ($$ROOT/$$CURRENT would return whole documents)
+_SAFE_VARIABLES = {"$$NOW", "$$REMOVE"}
+
+
+class QueryRejectedError(ValueError):
+    """A generated query was refused by the governor; the message tells the agent how to fix it."""
+
+
+def _check_operators(value, path: str = ""):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in _FORBIDDEN_OPERATORS:
+                raise QueryRejectedError(f"Operator {key} is not allowed (at '{path or key}').")
+            _check_operators(item, f"{path}.{key}" if path else key)
+    elif isinstance(value, list):
+        for item in value:
+            _check_operators(item, path)
+
+
+def _canonical_skill_values(value):
+    if isinstance(value, str):
+        return canonical_skill(value)
+    if isinstance(value, list):
+        return [_canonical_skill_values(v) for v in value]
+    if isinstance(value, dict):
+        return {
+            op: _canonical_skill_values(v) if op in ("$eq", "$ne", "$in", "$nin", "$all") else v
+            for op, v in value.items()
+        }
+    return value
+
+
+def canonicalize_skill_filters(query):
+    """Maps the values compared with `search.skills` to canonical skill ids ("پایتون" -> "python")."""
+    if isinstance(query, list):
+        return [canonicalize_skill_filters(item) for item in query]
+    if not isinstance(query, dict):
+        return query
+    return {
+        key: _canonical_skill_values(value) if key == "search.skills"
+        else canonicalize_skill_filters(value) if key in ("$and", "$or", "$nor")
+        else value
+        for key, value in query.items()
+    }
+
+
+def vet_filter(query: dict) -> dict:
+    """Rejects filters that are not documents or that run JavaScript; canonicalizes skill filters."""
+    if not isinstance(query, dict):
+        raise QueryRejectedError("The query must be a JSON object (a MongoDB filter document).")
+    _check_operators(query)
+    return canonicalize_skill_filters(query)
+
+
+def _allowed_field(field: str) -> bool:
+    return any(field == allowed or field.startswith(f"{allowed}.") for allowed in config.qa_projection_fields)
+
+
+def vet_projection(projection: dict | None) -> dict:
+    """
+    Limits projections to `qa_projection_fields`. Without a projection, or with exclusions
+    only, the whitelisted fields (minus the excluded ones) are returned.
+    """
+    allowed = ", ".join(config.qa_projection_fields)
+    if not projection:
+        return {"_id": 0, **{field: 1 for field in config.qa_projection_fields if field != "_id"}}
+    if not isinstance(projection, dict):
+        raise QueryRejectedError("The projection must be a JSON object, e.g. {\"_id\": 0, \"final_score\": 1}.")
+    vetted, excluded, included = {}, set(), False
+    for field, value in projection.items():
+        if isinstance(value, dict):
+            if set(value) != {"$slice"}:
+                raise QueryRejectedError(f"Projection of '{field}' may only use $slice.")
+        elif value not in (0, 1, True, False):
+            raise QueryRejectedError(f"Projection of '{field}' must be 0 or 1.")
+        if field == "_id" or isinstance(value, dict) or value not in (0, False):
+            if field != "_id" and not _allowed_field(field):
+                raise QueryRejectedError(f"Field '{field}' cannot be returned. Allowed fields: {allowed}.")
+            included = included or (field != "_id" and not isinstance(value, dict))
+            vetted[field] = value
+        elif field in config.qa_projection_fields:
+            excluded.add(field)
+        else:
+            raise QueryRejectedError(
+                f"Field '{field}' cannot be excluded. Exclude whole fields ({allowed}) or list the fields to return."
+            )
+    if included:
+        if excluded:
+            raise QueryRejectedError("A projection cannot both include and exclude fields (except _id).")
+        return vetted
+    if len(vetted) > ("_id" in vetted):
+        raise QueryRejectedError("$slice needs the fields to return listed next to it, e.g. {\"final_score\": 1}.")
+    # Exclusions only: an inclusion projection of the remaining whitelisted fields
+    remaining = {field: 1 for field in config.qa_projection_fields if field != "_id" and field not in excluded}
+    if not remaining:
+        raise QueryRejectedError(f"The projection excludes every returnable field ({allowed}).")
+    return {"_id": vetted.get("_id", 0), **remaining}
+
+
+def _check_field_refs(value, stage: str):
+    """
+    `$field` references must point at returnable fields; of the `$$variables` only the ones
+    that cannot expose a whole document are allowed (not `$$ROOT`/`$$CURRENT`).
+    """
+    if isinstance(value, str):
+        if value.startswith("$$"):
+            if value not in _SAFE_VARIABLES:
+                raise QueryRejectedError(
+                    f"{stage} cannot use variable '{value}'. Refer to fields instead, e.g. \"$final_score\"."
+                )
+        elif value.startswith("$") and not _allowed_field(value[1:]):
+            raise QueryRejectedError(f"{stage} cannot use field '{value[1:]}'.")
+    elif isinstance(value, dict):
+        for item in value.values():
+            _check_field_refs(item, stage)
+    elif isinstance(value, list):
+        for item in value:
+            _check_field_refs(item, stage)
+
+
+def _check_group(group: dict):
+    if not isinstance(group, dict) or "_id" not in group:
+        raise QueryRejectedError("$group needs an _id, e.g. {\"_id\": \"$resume.personal_info.location\", \"n\": {\"$sum\": 1}}.")
+    for name, expression in group.items():
+        if name != "_id":
+            if not isinstance(expression, dict) or len(expression) != 1 or next(iter(expression)) not in _GROUP_ACCUMULATORS:
+                raise QueryRejectedError(
+                    f"$group field '{name}' must use one of {', '.join(sorted(_GROUP_ACCUMULATORS))}."
+                )
+        _check_field_refs(expression, "$group")
+
+
+def vet_pipeline(pipeline: list) -> list:
+    """
+    Accepts $match/$unwind/$group/$count/$sort/$limit pipelines and caps their output with a
+    final `$limit` of at most `qa_query_max_results`.
+    """
+    if not isinstance(pipeline, list) or not pipeline:
+        raise QueryRejectedError("The pipeline must be a non-empty JSON array of stages.")
+    vetted = []
+    for stage in pipeline:
+        if not isinstance(stage, dict) or len(stage) != 1:
+            raise QueryRejectedError("Every pipeline stage must be an object with exactly one stage operator.")
+        name, body = next(iter(stage.items()))
+        if name not in _PIPELINE_STAGES:
+            raise QueryRejectedError(f"Stage {name} is not allowed. Allowed stages: {', '.join(sorted(_PIPELINE_STAGES))}.")
+        if name == "$match":
+            body = vet_filter(body)
+        elif name == "$group":
+            _check_group(body)
+        elif name == "$unwind":
+            _check_field_refs(body.get("path") if isinstance(body, dict) else body, "$unwind")
+        elif name == "$limit" and (not isinstance(body, int) or body < 1):
+            raise QueryRejectedError("$limit must be a positive integer.")
+        vetted.append({name: body})
+    last = vetted[-1]
+    if "$limit" in last:
+        last["$limit"] = clamp_limit(last["$limit"])
+    elif "$count" not in last:
+        vetted.append({"$limit": clamp_limit(None)})
+    return vetted
+
+
+def plan_stages(plan) -> list[dict]:
+    """Every stage of an explain plan, including nested input stages."""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan)
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(plan_stages(item))
+    return stages
+
+
+def _winning_plans(explain) -> list[dict]:
+    # find explains have one queryPlanner; aggregate explains nest it under their first stage
+    if isinstance(explain, dict):
+        if "winningPlan" in explain:
+            return [explain["winningPlan"]]
+        return [plan for value in explain.values() for plan in _winning_plans(value)]
+    if isinstance(explain, list):
+        return [plan for item in explain for plan in _winning_plans(item)]
+    return []
+
+
+def plan_summary(explain: dict) -> dict:
+    """Whether the winning plan scans the whole collection, and which indexes it uses."""
+    stages = plan_stages(_winning_plans(explain))
+    return {
+        "collscan": any(s["stage"] == "COLLSCAN" for s in stages),
+        "indexes": sorted({s["indexName"] for s in stages if s.get("indexName")}),
+    }
+
+
+def clamp_limit(limit: int | None) -> int:
+    return max(1, min(limit or config.qa_query_max_results, config.qa_query_max_results))
@@ -0,0 +1,114 @@
+"""
+Compact, tabular rendering of QA tool results, so query results cost the ReAct loop
+as few tokens as possible.
+"""
+from contextvars import ContextVar
+
+from app.config.config import config
+from utils.helper import estimate_tokens
+
+# Raw vs. formatted tokens of the tool results of the current QA turn
+_turn_tokens: ContextVar[dict | None] = ContextVar("qa_turn_tokens", default=None)
+
+
+def query_fields(query) -> list[str]:
+    """Field paths a filter refers to, in order (operators are walked into, not listed)."""
+    fields = []
+
+    def walk(value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key.startswith("$"):
+                    walk(item)
+                elif key not in fields:
+                    fields.append(key)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+
+    walk(query)
+    return fields
+
+
+def _flatten(value, path: str, out: dict[str, list]):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(item, f"{path}.{key}" if path else key, out)
+    elif isinstance(value, list):
+        for item in value:
+            _flatten(item, path, out)
+    elif value is not None and value != "":
+        values = out.setdefault(path, [])
+        if value not in values:
+            values.append(value)
+
+
+def _cell(values: list) -> str:
+    text = ", ".join(str(v) for v in values).replace("\n", " ").replace("|", "/")
+    limit = config.qa_result_max_chars
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def _columns(rows: list[dict[str, list]], prefixes: list[str] | None) -> list[str]:
+    seen = list(dict.fromkeys(path for row in rows for path in row))
+    if not prefixes:
+        return seen
+    return [
+        path for prefix in prefixes for path in seen
+        if path == prefix or path.startswith(f"{prefix}.")
+    ]
+
+
+def selected_fields(query: dict | None, projection: dict | None) -> list[str]:
+    """
+    Columns to show: the explicitly projected fields, otherwise the fields the query
+    filters on plus `qa_result_default_fields`.
+    """
+    included = [f for f, v in (projection or {}).items() if v not in (0, False)]
+    if included:
+        return included
+    return list(dict.fromkeys(config.qa_result_default_fields + query_fields(query or {})))
+
+
+def format_results(docs: list[dict], fields: list[str] | None = None) -> str:
+    """
+    Renders documents as a `|`-separated table over `fields` (all fields when None), dropping
+    empty values and truncating long text, within `qa_result_token_budget` tokens.
+    """
+    rows = []
+    for doc in docs:
+        flat: dict[str, list] = {}
+        _flatten(doc, "", flat)
+        rows.append(flat)
+    columns = _columns(rows, fields) or _columns(rows, None)
+    lines = [" | ".join(columns)]
+    budget = config.qa_result_token_budget - estimate_tokens(lines[0])
+    shown = 0
+    for row in rows:
+        line = " | ".join(_cell(row.get(column, [])) for column in columns)
+        budget -= estimate_tokens(line)
+        if budget < 0 and shown:
+            break
+        lines.append(line)
+        shown += 1
+    if shown < len(rows):
+        lines.append(f"... {len(rows) - shown} more rows not shown (narrow the query or aggregate)")
+
+    text = "\n".join(lines)
+    record_savings(estimate_tokens(str(docs)), estimate_tokens(text))
+    return text
+
+
+def start_turn() -> dict:
+    """Starts counting tool-result tokens for one QA question (tools run in its context)."""
+    tokens = {"calls": 0, "raw": 0, "formatted": 0}
+    _turn_tokens.set(tokens)
+    return tokens
+
+
+def record_savings(raw: int, formatted: int):
+    tokens = _turn_tokens.get()
+    if tokens is not None:
+        tokens["calls"] += 1
+        tokens["raw"] += raw
+        tokens["formatted"] += formatted
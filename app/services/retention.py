@@ -0,0 +1,36 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.config.config import config
+from app.config.logger import logger
+from app.services.minio_service import MinioHandler
+from app.services.upload_manifest import UploadManifest
+
+
+async def cleanup_expired_uploads(minio: MinioHandler, manifest: UploadManifest) -> int:
+    """Deletes session uploads older than `storage_retention_days`; returns the number of objects removed."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=config.storage_retention_days)
+    deleted = 0
+    for bucket_name in (config.minio_resume_bucket, config.minio_compare_bucket):
+        async for page in minio.iter_object_pages(bucket_name, prefix="sessions/", suffix=""):
+            expired = [obj["key"] for obj in page if obj["last_modified"] and obj["last_modified"] < cutoff]
+            if not expired:
+                continue
+            await minio.delete_objects(bucket_name, expired)
+            await manifest.forget_locations(bucket_name, expired)
+            deleted += len(expired)
+    return deleted
+
+
+async def retention_loop():
+    """Background cleanup of expired uploads, so uploads never wait on deletes."""
+    minio = MinioHandler()
+    manifest = UploadManifest()
+    while True:
+        try:
+            deleted = await cleanup_expired_uploads(minio, manifest)
+            if deleted:
+                logger.info(f"🧹 Retention: removed {deleted} uploads older than {config.storage_retention_days} days")
+        except Exception as e:
+            logger.error(f"❌ Retention cleanup failed: {e}")
+        await asyncio.sleep(config.storage_cleanup_interval_hours * 3600)
@@ -1,5 +1,6 @@
 import json
 import re
+import time
 from json import JSONDecodeError
 from typing import Optional, Sequence, TypeVar
 
@@ -52,9 +53,10 @@ class StructuredOutputHandler:
 
         last_error: Optional[Exception] = None
         for attempt in range(1, self.max_retries + 1):
+            started = time.perf_counter()
             result = await structured_llm.ainvoke(messages)
             parsed = result.get("parsed")
-            raw_message = result.get("raw")
+            raw_message = LLMFactory.stamp_latency(result.get("raw"), started)
             parsing_error = result.get("parsing_error")
 
             if parsed is not None:
@@ -0,0 +1,106 @@
+import hashlib
+import posixpath
+import re
+from datetime import datetime, timezone
+
+from app.config.config import config
+from app.services.mongo_service import MongoHandler
+
+_CONTENT_KEY = re.compile(r"^[0-9a-f]{64}\.pdf$")
+
+
+def content_key(digest: str) -> str:
+    """File name of an uploaded resume: its SHA-256, so identical files share one identity."""
+    return f"{digest}.pdf"
+
+
+def session_prefix(session_id: str) -> str:
+    """Object prefix of a session's uploads; sessions never list or overwrite each other's files."""
+    return f"sessions/{session_id}/"
+
+
+def content_identity(file_key: str) -> str | None:
+    """The content key (`<sha256>.pdf`) of an object key, None for files not stored by content."""
+    name = posixpath.basename(file_key or "")
+    return name if _CONTENT_KEY.match(name) else None
+
+
+def is_content_key(file_key: str) -> bool:
+    return content_identity(file_key) is not None
+
+
+def file_digest(path: str) -> tuple[str, int]:
+    """SHA-256 and size of a local file, read in chunks."""
+    sha = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            sha.update(chunk)
+            size += len(chunk)
+    return sha.hexdigest(), size
+
+
+class UploadManifest:
+    """
+    Maps content-addressed resumes to the file names they were uploaded under and the
+    session objects holding them, with the size and page count measured at upload time
+    (used for work estimates).
+    """
+
+    def __init__(self):
+        self.mongo = MongoHandler()
+        self.collection = self.mongo.db[config.mongo_uploads_collection]
+
+    @staticmethod
+    def _id(bucket_name: str, key: str) -> str:
+        return f"{bucket_name}/{content_identity(key) or key}"
+
+    async def record(
+        self,
+        bucket_name: str,
+        object_key: str,
+        digest: str,
+        size: int,
+        original_name: str,
+        pages: int | None = None,
+        stored: bool = True,
+    ):
+        """Records an upload; with `stored=False` the object is not offered as a copy source yet."""
+        now = datetime.now(timezone.utc)
+        update = {
+            "$setOnInsert": {"bucket": bucket_name, "key": content_key(digest), "sha256": digest, "size": size,
+                             "created_at": now},
+            "$addToSet": {"original_names": original_name},
+            "$set": {"last_uploaded_at": now},
+        }
+        if stored:
+            update["$addToSet"]["locations"] = object_key
+        if pages:
+            update["$set"]["pages"] = pages
+        await self.collection.update_one({"_id": self._id(bucket_name, object_key)}, update, upsert=True)
+
+    async def add_location(self, bucket_name: str, object_key: str):
+        await self.collection.update_one(
+            {"_id": self._id(bucket_name, object_key)}, {"$addToSet": {"locations": object_key}}
+        )
+
+    async def locations(self, bucket_name: str, digest: str) -> list[str]:
+        """Objects (of any session) already holding this content."""
+        doc = await self.collection.find_one({"_id": self._id(bucket_name, content_key(digest))}, {"locations": 1})
+        return (doc or {}).get("locations", [])
+
+    async def forget_locations(self, bucket_name: str, object_keys: list[str]):
+        """Drops deleted objects (retention cleanup) from the manifest."""
+        by_id: dict[str, list[str]] = {}
+        for key in object_keys:
+            if is_content_key(key):
+                by_id.setdefault(self._id(bucket_name, key), []).append(key)
+        for _id, keys in by_id.items():
+            await self.collection.update_one({"_id": _id}, {"$pullAll": {"locations": keys}})
+
+    async def lookup(self, bucket_name: str, object_keys: list[str]) -> dict[str, dict]:
+        """Manifest entries by object key; objects that were not uploaded through the manifest are absent."""
+        keys = [k for k in object_keys if is_content_key(k)]
+        cursor = self.collection.find({"_id": {"$in": list({self._id(bucket_name, k) for k in keys})}})
+        found = {doc["_id"]: doc async for doc in cursor}
+        return {k: found[self._id(bucket_name, k)] for k in keys if self._id(bucket_name, k) in found}
@@ -0,0 +1,139 @@
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+
+from app.config.config import config
+from app.services.mongo_service import MongoHandler
+
+
+def _tokens(doc: dict) -> tuple[int, int, int]:
+    """(prompt, completion, total) tokens of a usage log, for OpenAI-style and LangChain-style usage keys."""
+    prompt = doc.get("prompt_tokens", doc.get("input_tokens")) or 0
+    completion = doc.get("completion_tokens", doc.get("output_tokens")) or 0
+    total = doc.get("total_tokens") or prompt + completion
+    return prompt, completion, total
+
+
+def price_of(model_name: str, prompt_tokens: int, completion_tokens: int) -> float | None:
+    """Cost in `llm_prices` units (per 1M input/output tokens); None for models without a price."""
+    price = config.llm_prices.get(model_name)
+    if not price:
+        return None
+    return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+
+class UsageRollups:
+    """
+    Usage totals per (session, node, model), kept up to date with `$inc` as usage logs
+    are written, so cost and throughput reports read a few documents per session
+    instead of scanning the raw usage logs.
+    """
+
+    def __init__(self):
+        self.mongo = MongoHandler()
+        self.collection = self.mongo.db[config.mongo_usage_rollup_collection]
+
+    @staticmethod
+    def _id(session_id: str, node_name: str, model_name: str) -> str:
+        return f"{session_id}|{node_name}|{model_name}"
+
+    async def apply(self, docs: list[dict]):
+        """Adds a batch of usage logs to the rollups (one upsert per session/node/model in the batch)."""
+        totals: dict[str, dict] = {}
+        for doc in docs:
+            key = self._id(doc.get("session_id"), doc.get("node_name"), doc.get("model_name"))
+            prompt, completion, total = _tokens(doc)
+            at = doc.get("created_at") or datetime.now(timezone.utc)
+            latency = doc.get("latency_ms")
+            row = totals.setdefault(key, {
+                "keys": {"session_id": doc.get("session_id"), "node_name": doc.get("node_name"),
+                         "model_name": doc.get("model_name")},
+                "inc": {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0,
+                        "latency_ms": 0.0, "timed_calls": 0},
+                "first_at": at, "last_at": at, "max_latency_ms": 0.0,
+            })
+            row["inc"]["calls"] += 1
+            row["inc"]["prompt_tokens"] += prompt
+            row["inc"]["completion_tokens"] += completion
+            row["inc"]["total_tokens"] += total
+            if latency is not None:
+                row["inc"]["latency_ms"] += latency
+                row["inc"]["timed_calls"] += 1
+                row["max_latency_ms"] = max(row["max_latency_ms"], latency)
+            row["first_at"] = min(row["first_at"], at)
+            row["last_at"] = max(row["last_at"], at)
+
+        ops = [
+            UpdateOne(
+                {"_id": key},
+                {"$setOnInsert": row["keys"], "$inc": row["inc"],
+                 "$min": {"first_at": row["first_at"]},
+                 "$max": {"last_at": row["last_at"], "max_latency_ms": row["max_latency_ms"]}},
+                upsert=True,
+            )
+            for key, row in totals.items()
+        ]
+        if ops:
+            await self.collection.bulk_write(ops, ordered=False)
+
+    async def rebuild(self, session_id: str) -> int:
+        """Recomputes a session's rollups from the raw usage logs (logs written before rollups existed)."""
+        await self.collection.delete_many({"session_id": session_id})
+        cursor = self.mongo.usage_logs.find({"session_id": session_id})
+        batch, count = [], 0
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= config.mongo_bulk_batch_size:
+                await self.apply(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            await self.apply(batch)
+            count += len(batch)
+        return count
+
+    async def session_rows(self, session_id: str) -> list[dict]:
+        cursor = self.collection.find({"session_id": session_id}, {"_id": 0}).sort([("first_at", 1)])
+        return [doc async for doc in cursor]
+
+    async def recent_sessions(self, limit: int = 20) -> list[dict]:
+        """Latest sessions with their totals, newest first."""
+        cursor = self.collection.aggregate([
+            {"$group": {"_id": "$session_id", "calls": {"$sum": "$calls"},
+                        "total_tokens": {"$sum": "$total_tokens"},
+                        "first_at": {"$min": "$first_at"}, "last_at": {"$max": "$last_at"}}},
+            {"$sort": {"last_at": -1}},
+            {"$limit": limit},
+        ])
+        return [doc async for doc in cursor]
+
+    async def session_report(self, session_id: str, resumes: int | None = None) -> dict:
+        """
+        Cost and throughput of a session: one row per node/model with its average latency
+        and cost, the totals, and per-resume figures over `resumes` processed files.
+        """
+        rows = await self.session_rows(session_id)
+        totals = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        for row in rows:
+            row["avg_latency_ms"] = row["latency_ms"] / row["timed_calls"] if row.get("timed_calls") else None
+            row["cost"] = price_of(row["model_name"], row["prompt_tokens"], row["completion_tokens"])
+            for field in totals:
+                totals[field] += row[field]
+        costs = [row["cost"] for row in rows if row["cost"] is not None]
+        # Models without a price are left out of the cost; `unpriced_models` says which
+        totals["cost"] = sum(costs) if costs else None
+
+        report = {"session_id": session_id, "rows": rows, "totals": totals, "resumes": resumes,
+                  "unpriced_models": sorted({row["model_name"] for row in rows if row["cost"] is None})}
+        if rows:
+            first_at = min(row["first_at"] for row in rows)
+            last_at = max(row["last_at"] for row in rows)
+            report["first_at"], report["last_at"] = first_at, last_at
+            report["duration_s"] = (last_at - first_at).total_seconds()
+        if resumes:
+            report["tokens_per_resume"] = totals["total_tokens"] / resumes
+            report["calls_per_resume"] = totals["calls"] / resumes
+            report["cost_per_resume"] = totals["cost"] / resumes if totals["cost"] is not None else None
+            if report.get("duration_s"):
+                report["resumes_per_minute"] = resumes * 60 / report["duration_s"]
+        return report
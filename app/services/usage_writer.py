@@ -0,0 +1,117 @@
+import asyncio
+
+from app.config.config import config
+from app.config.logger import logger
+from app.services.mongo_service import MongoHandler
+from app.services.usage_rollups import UsageRollups
+
+
+class UsageLogWriter:
+    """
+    Buffers token-usage documents and writes them with `insert_many`: when
+    `usage_flush_size` documents are waiting, and every `usage_flush_seconds`. Each
+    written batch is added to the per session/node/model rollups.
+    One flush runs at a time. Buffered plus in-flight documents are capped at
+    `usage_buffer_size`; `record` waits for a flush when the cap is reached. A batch that
+    fails to write goes back to the buffer and is retried by the next flush.
+    Owns (and keeps references to) its flush tasks.
+    """
+
+    def __init__(self):
+        self.mongo = MongoHandler()
+        self.rollups = UsageRollups()
+        self._buffer: list[dict] = []
+        self._in_flight = 0
+        self._tasks: set[asyncio.Task] = set()
+        self._ticker: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._space: asyncio.Condition | None = None
+        self._flushing: asyncio.Lock | None = None
+        self._flusher: asyncio.Task | None = None
+        self.written = 0
+
+    def _bind(self):
+        # Flush tasks, the lock and the condition belong to the loop that created them
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._space = asyncio.Condition()
+            self._flushing = asyncio.Lock()
+            self._flusher = None
+            self._tasks = set()
+            self._ticker = loop.create_task(self._tick())
+
+    def _track(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _pending(self) -> int:
+        return len(self._buffer) + self._in_flight
+
+    def _request_flush(self):
+        # A running flush keeps going while full batches are waiting, no need for another
+        if self._flusher is None or self._flusher.done():
+            self._flusher = self._track(self.flush())
+
+    async def record(self, doc: dict):
+        self._bind()
+        if self._pending() >= config.usage_buffer_size:
+            # Backpressure: wait for a flush instead of growing without bound
+            async with self._space:
+                self._request_flush()
+                await self._space.wait_for(lambda: self._pending() < config.usage_buffer_size)
+        self._buffer.append(doc)
+        if len(self._buffer) >= config.usage_flush_size:
+            self._request_flush()
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(config.usage_flush_seconds)
+            if self._buffer:
+                self._request_flush()
+
+    async def flush(self):
+        """Writes the buffered documents, then any full batch that arrived meanwhile."""
+        self._bind()
+        async with self._flushing:
+            while self._buffer:
+                docs, self._buffer = self._buffer, []
+                self._in_flight = len(docs)
+                try:
+                    await self.mongo.usage_logs.insert_many(docs, ordered=False)
+                    self.written += len(docs)
+                except Exception as e:
+                    # Keep them, ahead of newer documents, for the next flush
+                    self._buffer[:0] = docs
+                    logger.error(f"❌ [USAGE] Flush of {len(docs)} usage logs failed, will retry: {e}")
+                    return
+                else:
+                    try:
+                        await self.rollups.apply(docs)
+                    except Exception as e:
+                        # The raw logs are written; `usage rebuild` recomputes the session's rollups
+                        logger.error(f"❌ [USAGE] Rollup of {len(docs)} usage logs failed: {e}")
+                finally:
+                    self._in_flight = 0
+                    async with self._space:
+                        self._space.notify_all()
+                if len(self._buffer) < config.usage_flush_size:
+                    return
+
+    async def close(self):
+        """Flushes everything still buffered and stops the interval flush (shutdown)."""
+        self._bind()
+        self._ticker.cancel()
+        self._ticker = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush()
+        if self._buffer:
+            logger.error(f"❌ [USAGE] {len(self._buffer)} usage logs could not be written before shutdown")
+            self._buffer = []
+        self._loop = None
+
+
+usage_writer = UsageLogWriter()
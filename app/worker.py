@@ -0,0 +1,162 @@
+"""
+Background worker that executes resume-processing jobs from the Mongo job queue.
+
+    python -m app.worker [--concurrency N]
+
+Run as many workers as needed, on any host that can reach Mongo and MinIO.
+"""
+import asyncio
+import os
+import signal
+import socket
+import uuid
+
+import click
+
+from app.config.config import config
+from app.config.logger import logger
+from app.schemas.hiring import HiringRequirements
+from app.services.indexes import ensure_indexes
+from app.services.job_queue import JobQueue, PROCESS_BATCH, PROCESS_FILE
+from app.services.minio_service import MinioHandler
+from app.services.mongo_client import close_clients, log_connection_stats
+from app.services.usage_writer import usage_writer
+
+
+async def process_batch_job(job: dict) -> dict:
+    """Runs the batch subgraph (OCR -> structure -> evaluate) for the job's files."""
+    from app.workflow.builder import build_batch_graph
+
+    payload = job["payload"]
+    graph = build_batch_graph().compile()
+    result = await graph.ainvoke({
+        "session_id": job["session_id"],
+        "batch_id": payload["batch_id"],
+        "files_in_batch": payload["files"],
+        "hiring_reqs": HiringRequirements.model_validate_json(payload["hiring_reqs"]),
+        "ocr_results": {},
+        "structured_results": [],
+        "evaluated_results": [],
+    })
+    return {"evaluated_results": result.get("evaluated_results", [])}
+
+
+async def process_file_job(job: dict) -> dict:
+    """Runs the missing OCR -> structure -> evaluate steps of the job's single file."""
+    from app.services.ocr import OCRService
+    from app.workflow.nodes.processing import ledger, processor
+
+    session_id = job["session_id"]
+    file_key = job["payload"]["file"]
+    reqs = HiringRequirements.model_validate_json(job["payload"]["hiring_reqs"])
+    ocr_service = OCRService(node_name="process_file_job", session_id=session_id, ledger=ledger)
+    result = await processor.process_file(ocr_service, MinioHandler(), session_id, file_key, reqs)
+    if result is None:
+        # Raise so the queue retries the file; the ledger holds the failed stage
+        entry = (await ledger.entries(session_id, [file_key])).get(file_key) or {}
+        raise RuntimeError(f"{file_key} failed at {entry.get('failed_stage')}: {entry.get('error')}")
+    return {"evaluated_results": [result]}
+
+
+HANDLERS = {
+    PROCESS_BATCH: process_batch_job,
+    PROCESS_FILE: process_file_job,
+}
+
+
+class JobWorker:
+    def __init__(
+        self,
+        queue: JobQueue,
+        concurrency: int,
+        worker_id: str | None = None,
+        handlers: dict | None = None,
+        exit_when_idle: bool = False,
+    ):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.handlers = handlers or HANDLERS
+        # Stop once the queue has nothing to claim (benchmarks, one-off drains)
+        self.exit_when_idle = exit_when_idle
+        self.jobs_done = 0
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        logger.info(f"🛑 Worker {self.worker_id} stopping after the current jobs...")
+        self._stopping.set()
+
+    async def run(self):
+        logger.info(f"👷 Worker {self.worker_id} started (concurrency={self.concurrency})")
+        await asyncio.gather(*[self._loop() for _ in range(self.concurrency)])
+
+    async def _loop(self):
+        while not self._stopping.is_set():
+            job = await self.queue.claim(self.worker_id, list(self.handlers))
+            if job is None:
+                if self.exit_when_idle:
+                    return
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=config.job_poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._execute(job)
+
+    async def _heartbeat(self, job: dict, task: asyncio.Task):
+        while True:
+            await asyncio.sleep(config.job_heartbeat_seconds)
+            if not await self.queue.heartbeat(job["_id"], self.worker_id):
+                logger.warning(f"⚠️ [JOB] Lost lease on {job['_id']}, abandoning it")
+                task.cancel()
+                return
+
+    async def _execute(self, job: dict):
+        job_id = job["_id"]
+        logger.info(f"▶️ [JOB] {job_id} ({job['kind']}) attempt {job['attempts']}")
+        task = asyncio.create_task(self.handlers[job["kind"]](job))
+        heartbeat = asyncio.create_task(self._heartbeat(job, task))
+        try:
+            result = await task
+            await self.queue.complete(job_id, self.worker_id, result)
+            self.jobs_done += 1
+            logger.info(f"✅ [JOB] {job_id} done")
+        except asyncio.CancelledError:
+            if task.cancelled() and not asyncio.current_task().cancelling():
+                # Lease lost (the heartbeat cancelled the handler): another worker owns the job now
+                return
+            # The worker itself is being cancelled: do not leave the handler running
+            task.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"❌ [JOB] {job_id}: {e}", exc_info=True)
+            await self.queue.fail(job_id, self.worker_id, str(e))
+        finally:
+            heartbeat.cancel()
+
+
+@click.command()
+@click.option("--concurrency", default=None, type=int, help="Jobs processed at the same time.")
+def main(concurrency: int | None):
+    """Starts a resume-processing worker."""
+
+    async def run():
+        queue = JobQueue()
+        await ensure_indexes()
+        worker = JobWorker(queue, concurrency or config.worker_concurrency)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, worker.stop)
+        try:
+            await worker.run()
+        finally:
+            await usage_writer.close()
+            await MinioHandler.close()
+            log_connection_stats(f"worker exit ({worker.jobs_done} jobs)")
+            close_clients()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,50 @@
-import math
 from langgraph.graph import StateGraph, END, START
 from langgraph.types import Send
 from langgraph.checkpoint.memory import MemorySaver
 
 from app.workflow.state import BatchState, OverallState
+from app.workflow.sharding import WorkQueue, plan_shards, register_work_queue, take_listing
 from app.workflow.nodes import router, hiring, jd, processing, comparison, qa
+from app.config.config import config
 from app.config.logger import logger
 
 def map_to_batches(state: OverallState):
     """Sharding Logic."""
     files = state["all_files"]
     reqs = state["hiring_reqs"]
+    session_id = state["session_id"]
+    file_meta = state.get("file_meta") or {}
     total_files = len(files)
     
     if total_files == 0:
-        return []
+        # Nothing to process: still save, report the top candidates and answer questions
+        return "save_results"
         
-    num_chunks = min(10, total_files)
-    chunk_size = math.ceil(total_files / num_chunks)
+    shards, work = plan_shards(files, file_meta)
+    # Batches pull the rest of the bucket listing as it streams in
+    register_work_queue(session_id, WorkQueue(
+        {i + 1: chunk for i, chunk in enumerate(shards)},
+        work,
+        steal=config.sharding_mode == "work",
+        listing=take_listing(session_id),
+    ))
+
     batch_requests = []
-    
-    for i in range(num_chunks):
-        start_idx = i * chunk_size
-        end_idx = start_idx + chunk_size
-        chunk = files[start_idx:end_idx]
-        if chunk:
-            batch_requests.append(Send("process_batch_subgraph", {
-                "session_id": state["session_id"],
-                "batch_id": i + 1,
-                "files_in_batch": chunk,
-                "hiring_reqs": reqs,
-                "ocr_results": {},
-                "structured_results": [],
-                "evaluated_results": []
-            }))
-
-    logger.info(f"🔀 Sharded {total_files} files into {len(batch_requests)} batches (Target Max: 10).")
+    for i, chunk in enumerate(shards):
+        batch_requests.append(Send("process_batch_subgraph", {
+            "session_id": session_id,
+            "batch_id": i + 1,
+            "files_in_batch": chunk,
+            "hiring_reqs": reqs,
+            "ocr_results": {},
+            "structured_results": [],
+            "evaluated_results": []
+        }))
+
+    logger.info(
+        f"🔀 Sharded {total_files} files into {len(batch_requests)} batches "
+        f"(Target Max: {config.max_batches}, mode: {config.sharding_mode})."
+    )
     return batch_requests
 
 def define_path(state: OverallState):
@@ -53,16 +62,26 @@ def should_continue_hiring(state: OverallState):
 def should_continue_jd(state: OverallState):
     return "jd_writer" if state.get("jd_reqs") else "jd_input"
 
+def build_batch_graph():
+    """Subgraph that processes one batch of resume files."""
+    workflow_batch = StateGraph(BatchState)
+    if config.batch_execution_mode == "pipelined":
+        workflow_batch.add_node("batch_pipeline", processing.batch_pipeline_node)
+        workflow_batch.add_edge(START, "batch_pipeline")
+        workflow_batch.add_edge("batch_pipeline", END)
+    else:
+        workflow_batch.add_node("batch_ocr", processing.batch_ocr_node)
+        workflow_batch.add_node("batch_structure", processing.batch_structure_node)
+        workflow_batch.add_node("batch_evaluate", processing.batch_evaluate_node)
+        workflow_batch.add_edge(START, "batch_ocr")
+        workflow_batch.add_edge("batch_ocr", "batch_structure")
+        workflow_batch.add_edge("batch_structure", "batch_evaluate")
+        workflow_batch.add_edge("batch_evaluate", END)
+    return workflow_batch
+
 def build_graph():
     # 1. Subgraph
-    workflow_batch = StateGraph(BatchState)
-    workflow_batch.add_node("batch_ocr", processing.batch_ocr_node)
-    workflow_batch.add_node("batch_structure", processing.batch_structure_node)
-    workflow_batch.add_node("batch_evaluate", processing.batch_evaluate_node)
-    workflow_batch.add_edge(START, "batch_ocr")
-    workflow_batch.add_edge("batch_ocr", "batch_structure")
-    workflow_batch.add_edge("batch_structure", "batch_evaluate")
-    workflow_batch.add_edge("batch_evaluate", END)
+    workflow_batch = build_batch_graph()
 
     # 2. Main Graph
     workflow = StateGraph(OverallState)
@@ -85,7 +104,11 @@ def build_graph():
     workflow.add_node("compare_qa_process", comparison.compare_qa_process_node)
     
     workflow.add_node("load_and_shard", processing.load_and_shard)
-    workflow.add_node("process_batch_subgraph", workflow_batch.compile())
+    if config.processing_backend == "queue":
+        workflow.add_node("dispatch_jobs", processing.dispatch_jobs_node)
+        workflow.add_node("await_jobs", processing.await_jobs_node)
+    else:
+        workflow.add_node("process_batch_subgraph", workflow_batch.compile())
     workflow.add_node("save_results", processing.save_results_node)
     
     workflow.add_node("prepare_qa", qa.prepare_qa_node)
@@ -118,12 +141,18 @@ def build_graph():
     workflow.add_edge("jd_writer", END)
 
     workflow.add_edge("upload_resume","load_and_shard")
-    workflow.add_conditional_edges(
-        "load_and_shard", 
-        map_to_batches, 
-        ["process_batch_subgraph"]
-    )
-    workflow.add_edge("process_batch_subgraph", "save_results")
+    if config.processing_backend == "queue":
+        # Batches run in separate worker processes (python -m app.worker)
+        workflow.add_edge("load_and_shard", "dispatch_jobs")
+        workflow.add_edge("dispatch_jobs", "await_jobs")
+        workflow.add_edge("await_jobs", "save_results")
+    else:
+        workflow.add_conditional_edges(
+            "load_and_shard", 
+            map_to_batches, 
+            ["process_batch_subgraph", "save_results"]
+        )
+        workflow.add_edge("process_batch_subgraph", "save_results")
     workflow.add_edge("save_results", "top_candidates")
     workflow.add_edge("top_candidates", "prepare_qa")
     workflow.add_edge("prepare_qa", "qa_input")
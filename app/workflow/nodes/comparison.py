@@ -9,6 +9,7 @@ from app.config.config import config
 from app.services.minio_service import MinioHandler
 from app.services.ocr import OCRService
 from app.services.llm_factory import LLMFactory
+from app.services.upload_manifest import UploadManifest, session_prefix
 from app.workflow.state import OverallState
 
 from utils.prompt import COMPARISON_PROMPT, COMPARE_QA_PROMPT
@@ -38,7 +39,7 @@ async def compare_process_node(state: OverallState):
     files = state["compare_files"]
     minio = MinioHandler()
     if len(files) == 0:
-        files = await minio.list_files(config.minio_compare_bucket)
+        files = await minio.list_files(config.minio_compare_bucket, prefix=session_prefix(session_id))
         logger.info(f"📂 Found {len(files)} total resumes.")
 
     logger.info(f"⚖️ Comparing {len(files)} resumes...")
@@ -48,10 +49,13 @@ async def compare_process_node(state: OverallState):
     tasks = [ocr_service.process_file(minio, config.minio_compare_bucket, f) for f in files]
     results = await asyncio.gather(*tasks)
     
+    # Objects are stored under their content hash, show the uploaded file name instead
+    manifest = await UploadManifest().lookup(config.minio_compare_bucket, files)
     combined_text = ""
     for i, (key, text) in enumerate(results):
         if text:
-            combined_text += f"\n\n--- Candidate {i+1} ({key}) ---\n{text}"
+            name = ", ".join(manifest.get(key, {}).get("original_names", [])) or key
+            combined_text += f"\n\n--- Candidate {i+1} ({name}) ---\n{text}"
     
     if not combined_text:
         return {"comparison_context": "No text extracted from files."}
@@ -62,7 +66,7 @@ async def compare_process_node(state: OverallState):
         [HumanMessage(content=prompt)],
         temperature=0.2,
     )
-    asyncio.create_task(save_token_cost("compare_process_node", session_id, report))
+    await save_token_cost("compare_process_node", session_id, report)
     report_content = parser.invoke(report)
     
     print("\n" + "="*40)
@@ -88,7 +92,7 @@ async def compare_qa_process_node(state: OverallState):
     
     prompt = COMPARE_QA_PROMPT.format(context=context, question=question)
     response = await LLMFactory.ainvoke([HumanMessage(content=prompt)])
-    asyncio.create_task(save_token_cost("compare_qa_process_node", session_id, response))
+    await save_token_cost("compare_qa_process_node", session_id, response)
     response_content = parser.invoke(response)
     print(f"\n🤖 Comparison Assistant: {response_content}\n")
     return {"compare_qa_answer": response_content}
@@ -37,7 +37,7 @@ async def hiring_process_node(state: OverallState):
         messages,
         tools=[AgentTools.submit_hiring_requirements],
     )
-    asyncio.create_task(save_token_cost("hiring_process_node", session_id, response))
+    await save_token_cost("hiring_process_node", session_id, response)
     
     # Check if tool called
     if response.tool_calls:
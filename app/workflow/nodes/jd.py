@@ -30,7 +30,7 @@ async def jd_process_node(state: OverallState):
         messages,
         tools=[AgentTools.submit_jd_requirements],
     )
-    asyncio.create_task(save_token_cost("jd_process_node", session_id, response))
+    await save_token_cost("jd_process_node", session_id, response)
 
     if response.tool_calls:
         tool_call = response.tool_calls[0]
@@ -78,7 +78,7 @@ async def jd_writer_node(state: OverallState):
         [HumanMessage(content=prompt)],
         temperature=0.7,
     )
-    asyncio.create_task(save_token_cost("jd_writer_node", session_id, response))
+    await save_token_cost("jd_writer_node", session_id, response)
     text = parser.invoke(response)
     
     print("\n" + "="*40)
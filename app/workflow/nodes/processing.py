@@ -1,15 +1,50 @@
 import asyncio
+import hashlib
+
+from langgraph.config import get_stream_writer
 
 from app.config.logger import logger
 from app.config.config import config
 from app.services.minio_service import MinioHandler
-from app.services.mongo_service import MongoHandler
 from app.services.ocr import OCRService
 from app.services.analyzer import ResumeAnalyzerService
+from app.services.pipeline import ResumePipeline
+from app.services.artifact_store import ArtifactStore
+from app.services.ledger import ProgressLedger, Stage, stage_reached
+from app.services.processor import ResumeProcessor
+from app.services.job_queue import JobQueue, JobStatus, PROCESS_BATCH, PROCESS_FILE
+from app.services.local_uploads import local_uploads
+from app.services.mongo_client import log_connection_stats
+from app.services.upload_manifest import UploadManifest, session_prefix
 from app.workflow.state import BatchState, OverallState
+from app.workflow.sharding import (
+    BatchFiles,
+    FileListing,
+    get_work_queue,
+    plan_shards,
+    register_listing,
+    release_listing,
+    release_work_queue,
+    take_listing,
+)
 
 # Instantiate services once to reuse semaphores across batch calls
 analyzer_service = ResumeAnalyzerService()
+artifact_store = ArtifactStore()
+ledger = ProgressLedger()
+processor = ResumeProcessor(analyzer_service, artifact_store, ledger)
+job_queue = JobQueue()
+upload_manifest = UploadManifest()
+
+def mark_batch_done(session_id: str, batch_id: int):
+    work_queue = get_work_queue(session_id)
+    if work_queue is not None:
+        work_queue.mark_done(batch_id)
+
+async def write_behind(session_id: str, evaluated: list[dict]):
+    """Saves a finished batch's candidates right away, so save_results only has leftovers to write."""
+    if config.save_write_behind and evaluated:
+        await processor.save(session_id, evaluated)
 
 async def batch_ocr_node(state: BatchState):
     """
@@ -19,17 +54,24 @@ async def batch_ocr_node(state: BatchState):
     files = state["files_in_batch"]
     session_id = state["session_id"]
     logger.info(f"⚙️ [Batch {batch_id}] Starting OCR for {len(files)} files...")
-    
+
     minio = MinioHandler()
-    ocr_service = OCRService(node_name="batch_ocr_node", session_id=session_id)
-    
+    ocr_service = OCRService(node_name="batch_ocr_node", session_id=session_id, ledger=ledger)
+    source = BatchFiles(session_id, batch_id, files)
+    entries = await ledger.entries(session_id)
+    ocr_map = {}
+
+    async def ocr_worker():
+        # Keep claiming files (own shard first, then stolen ones) until none are left
+        while (file_key := await source.next()) is not None:
+            ref = await processor.ocr(ocr_service, minio, session_id, file_key, entries.get(file_key))
+            # Filter out failures; only the artifact reference goes into the state
+            if ref is not None:
+                ocr_map[file_key] = ref
+
     # Process concurrently using the service
-    tasks = [ocr_service.process_file(minio, config.minio_resume_bucket, f) for f in files]
-    results = await asyncio.gather(*tasks)
-    
-    # Filter out failures
-    ocr_map = {k: v for k, v in results if v is not None}
-    
+    await asyncio.gather(*[ocr_worker() for _ in range(config.ocr_workers)])
+
     return {"ocr_results": ocr_map}
 
 async def batch_structure_node(state: BatchState):
@@ -39,12 +81,13 @@ async def batch_structure_node(state: BatchState):
     ocr_map = state["ocr_results"]
     session_id = state['session_id']
     logger.info(f"⚙️ [Batch {state['batch_id']}] Structuring {len(ocr_map)} items...")
-    
-    tasks = [analyzer_service.structure_text(k, v, session_id) for k, v in ocr_map.items()]
+
+    entries = await ledger.entries(session_id)
+    tasks = [processor.structure(session_id, k, ref, entries.get(k)) for k, ref in ocr_map.items()]
     results = await asyncio.gather(*tasks)
-    
+
     valid_results = [r for r in results if r is not None]
-    
+
     # Pass 'ocr_results' as a list to match the Reducer type in OverallState
     return {"structured_results": valid_results, "ocr_results": [ocr_map]}
 
@@ -52,45 +95,211 @@ async def batch_evaluate_node(state: BatchState):
     """
     Subgraph Node: Scores structured resumes against reqs.
     """
-    structured_list = state["structured_results"]
+    structured_refs = state["structured_results"]
     reqs = state["hiring_reqs"]
     batch_id = state["batch_id"]
     session_id = state['session_id']
 
-    if not structured_list:
+    if not structured_refs:
+        mark_batch_done(session_id, batch_id)
         return {"evaluated_results": []}
 
-    logger.info(f"🧠 [Batch {batch_id}] Evaluating {len(structured_list)} resumes...")
-    
-    tasks = [analyzer_service.evaluate_resume(r, reqs, session_id) for r in structured_list]
-    results = await asyncio.gather(*tasks)
-    
-    valid_results = [r for r in results if r is not None]
-    
+    logger.info(f"🧠 [Batch {batch_id}] Evaluating {len(structured_refs)} resumes...")
+
+    entries = await ledger.entries(session_id)
+    valid_results = await processor.evaluate(session_id, structured_refs, reqs, entries)
+    await write_behind(session_id, valid_results)
+    mark_batch_done(session_id, batch_id)
+
     return {"evaluated_results": valid_results}
 
+async def batch_pipeline_node(state: BatchState):
+    """
+    Subgraph Node: Streams each file through OCR -> structure -> evaluate on its own,
+    so one slow file does not hold back the rest of the batch.
+    """
+    batch_id = state["batch_id"]
+    files = state["files_in_batch"]
+    logger.info(f"⚙️ [Batch {batch_id}] Pipelining {len(files)} files...")
+
+    session_id = state["session_id"]
+    pipeline = ResumePipeline(processor, session_id, state["hiring_reqs"], batch_id)
+    await pipeline.run(BatchFiles(session_id, batch_id, files))
+    await write_behind(session_id, pipeline.evaluated_results)
+    mark_batch_done(session_id, batch_id)
+
+    # Pass 'ocr_results' as a list to match the Reducer type in OverallState
+    return {
+        "ocr_results": [pipeline.ocr_results],
+        "structured_results": pipeline.structured_results,
+        "evaluated_results": pipeline.evaluated_results,
+    }
+
+async def _pending_files(session_id: str, page: list[dict]) -> list[str]:
+    """Registers a listing page in the ledger and drops the files already saved for this session."""
+    files = [obj["key"] for obj in page]
+    await ledger.register_files(session_id, files)
+    entries = await ledger.entries(session_id, files)
+    pending = [f for f in files if not stage_reached(entries.get(f), Stage.SAVED)]
+    if len(pending) < len(files):
+        logger.info(f"📒 Resuming session: {len(files) - len(pending)} of {len(files)} listed files already saved.")
+    return pending
+
+async def report_failed_uploads(state: OverallState, files: list[str]) -> list[str]:
+    """
+    Waits for the background MinIO uploads of `files` and tells the user which of them
+    could not be stored; returns the failed keys.
+    """
+    bucket_name = config.minio_resume_bucket
+    await local_uploads.wait_uploaded(bucket_name, files)
+    failed = local_uploads.pop_failed(bucket_name, files)
+    if failed:
+        file_meta = state.get("file_meta") or {}
+        names = [", ".join(file_meta.get(key, {}).get("names") or [key]) for key in failed]
+        logger.error(f"❌ [UPLOAD] {len(failed)} resumes never reached MinIO: {names}")
+        get_stream_writer()({"type": "upload_failed", "files": names})
+    return list(failed)
+
 async def load_and_shard(state: OverallState):
     """
-    Loads all available file keys from MinIO.
+    Processes the resumes uploaded in this step (their content keys), or, when nothing
+    was uploaded, lists everything the session uploaded so far page by page (other
+    sessions' resumes are never re-scored here). Processing starts from the first
+    page with pending files; the remaining pages keep streaming in the background
+    (FileListing) and are picked up by the batches or the job dispatcher.
+    Files the ledger already shows as saved for this session are not processed again.
     """
+    session_id = state["session_id"]
     minio = MinioHandler()
-    files = await minio.list_files(config.minio_resume_bucket)
-    logger.info(f"📂 Found {len(files)} total resumes.")
-    return {"all_files": files}
+    await ledger.start_session(session_id, [], state["hiring_reqs"])
+
+    uploaded = state.get("all_files") or []
+    if uploaded:
+        manifest = await upload_manifest.lookup(config.minio_resume_bucket, uploaded)
+        file_meta = {
+            key: {"size": doc.get("size"), "pages": doc.get("pages"), "names": doc.get("original_names", [])}
+            for key, doc in manifest.items()
+        }
+        pending = await _pending_files(session_id, [{"key": key} for key in uploaded])
+        for key in set(uploaded) - set(pending):
+            # Already saved for this session, OCR will not read the local copy
+            local_uploads.release(config.minio_resume_bucket, key)
+        logger.info(f"📂 Processing {len(pending)} of {len(uploaded)} uploaded resumes.")
+        return {"all_files": pending, "file_meta": file_meta}
+
+    pages = minio.iter_object_pages(config.minio_resume_bucket, prefix=session_prefix(session_id))
+    pending, file_meta, listed = [], {}, 0
+    async for page in pages:
+        listed += len(page)
+        file_meta.update({obj["key"]: {"size": obj["size"], "etag": obj["etag"]} for obj in page})
+        pending = await _pending_files(session_id, page)
+        if pending:
+            break
+    else:
+        logger.info(f"📂 Found {listed} total resumes, nothing left to process.")
+        return {"all_files": [], "file_meta": file_meta}
+
+    register_listing(session_id, FileListing(pages, lambda page: _pending_files(session_id, page)))
+    logger.info(f"📂 Listed {listed} resumes so far, starting with {len(pending)}; the rest is streaming in.")
+    return {"all_files": pending, "file_meta": file_meta}
+
+async def dispatch_jobs_node(state: OverallState):
+    """
+    Queue backend: submits the session's files as jobs for the worker processes, one job
+    per file (JOB_GRANULARITY=file) or per shard, page by page while the listing streams in.
+    Re-submitting the same work is a no-op.
+    """
+    session_id = state["session_id"]
+    files = state["all_files"]
+    reqs_json = state["hiring_reqs"].model_dump_json()
+    # All jobs of this dispatch share a run id, so progress and results are aggregated per run
+    run_id = hashlib.sha256("\n".join([session_id, reqs_json, *sorted(files)]).encode("utf-8")).hexdigest()[:16]
+    if not files:
+        return {"job_run_id": run_id}
+
+    await job_queue.ensure_indexes()
+    # Workers read from MinIO, the local upload fast path only exists in this process
+    failed = await report_failed_uploads(state, files)
+    for key in files:
+        local_uploads.release(config.minio_resume_bucket, key)
+    for key in failed:
+        await ledger.fail(session_id, key, Stage.DOWNLOADED, "upload to MinIO failed")
+    files = [f for f in files if f not in failed]
+    file_meta = dict(state.get("file_meta") or {})
+    listing = take_listing(session_id)
+    count, total_files, next_batch = 0, 0, 1
+    page = files
+    while page is not None:
+        if config.job_granularity == "file":
+            jobs = [(f, {"file": f, "hiring_reqs": reqs_json}) for f in page]
+            count += await job_queue.submit_many(PROCESS_FILE, session_id, run_id, jobs)
+        else:
+            shards, _ = plan_shards(page, file_meta)
+            jobs = [
+                ("\n".join(sorted(chunk)), {"batch_id": next_batch + i, "files": chunk, "hiring_reqs": reqs_json})
+                for i, chunk in enumerate(shards)
+            ]
+            next_batch += len(shards)
+            count += await job_queue.submit_many(PROCESS_BATCH, session_id, run_id, jobs)
+        total_files += len(page)
+        page = await listing.next_page() if listing is not None else None
+        if listing is not None:
+            file_meta.update(listing.meta)
+    logger.info(f"📨 Submitted {count} {config.job_granularity} jobs for {total_files} files (run {run_id}).")
+    return {"job_run_id": run_id}
+
+async def await_jobs_node(state: OverallState):
+    """
+    Queue backend: polls the run's jobs and streams their progress until all are finished,
+    then aggregates the results of every worker for this session.
+    """
+    session_id = state["session_id"]
+    run_id = state["job_run_id"]
+    writer = get_stream_writer()
+    last_progress = None
+
+    while True:
+        statuses = await job_queue.run_status_counts(run_id)
+        total = sum(statuses.values())
+        finished = statuses.get(JobStatus.DONE.value, 0) + statuses.get(JobStatus.FAILED.value, 0)
+        progress = {
+            "type": "job_progress",
+            "total_jobs": total,
+            "jobs": statuses,
+            "files": await ledger.stage_counts(session_id),
+        }
+        if progress != last_progress:
+            writer(progress)
+            last_progress = progress
+        if finished >= total:
+            break
+        await asyncio.sleep(config.job_poll_seconds)
+
+    done, failed = await job_queue.run_results(run_id)
+    evaluated = []
+    for job in done:
+        evaluated.extend(job["result"]["evaluated_results"])
+    for job in failed:
+        logger.error(f"❌ [JOB] {job['_id']} failed: {job.get('error')}")
+    logger.info(f"📬 {len(done)}/{total} jobs finished, {len(evaluated)} resumes evaluated.")
+    return {"evaluated_results": evaluated}
 
 async def save_results_node(state: OverallState):
     """
-    Saves all evaluated resumes to MongoDB.
+    Saves the evaluated resumes not yet written by the batches (write-behind) to MongoDB.
     """
     results = state["evaluated_results"]
+    release_listing(state["session_id"])
+    work_queue = release_work_queue(state["session_id"])
+    if work_queue is not None:
+        work_queue.log_completion_skew()
+    log_connection_stats(f"after run of {state['session_id']}")
+    # Local runs OCR'd these from the upload path; the user still has to know they are not stored
+    await report_failed_uploads(state, state.get("all_files") or [])
     if not results:
         logger.warning("No results to save.")
         return
-    
-    logger.info(f"💾 Saving {len(results)} candidates to MongoDB...")
-    mongo = MongoHandler()
-    session_id = state['session_id']
-    for res in results:
-        res['session_id'] = session_id
-        await mongo.save_candidate(res)
-    return
\ No newline at end of file
+
+    saved = await processor.save(state['session_id'], results)
+    logger.info(f"💾 {saved} of {len(results)} candidates left to save at the end of the run.")
+    return
@@ -4,13 +4,12 @@ from langgraph.types import Command, interrupt
 from langchain_core.messages import HumanMessage
 from langchain_core.output_parsers import StrOutputParser
 
-from app.config.config import config
 from app.config.logger import logger
-from app.services.mongo_qa import ResumeQAAgent
+from app.services.db_structure import get_db_structure
+from app.services.mongo_qa import get_qa_agent
 from app.services.mongo_service import MongoHandler
 from app.services.llm_factory import LLMFactory
 from app.workflow.state import OverallState
-from utils.extract_structure import ExtractSchema
 from utils.helper import save_token_cost , candidate_summary
 from utils.prompt import TOP_CANDIDATE
 
@@ -19,14 +18,11 @@ parser = StrOutputParser()
 
 async def prepare_qa_node(state: OverallState):
     """
-    Extracts DB schema once for the session.
+    Provides the DB schema for the session (built from the models once per process).
     """
-    logger.info("🔍 Analyzing Database Schema for Q&A...")
+    logger.info("🔍 Loading Database Schema for Q&A...")
     try:
-        extractor = ExtractSchema(config.mongo_uri, config.mongo_db_name, config.mongo_collection)
-        sample = extractor.get_random_doc()
-        structure = extractor.generate_schema(sample) if sample else {}
-        return {"db_structure": structure}
+        return {"db_structure": await get_db_structure(mongo_handler)}
     except Exception as e:
         logger.error(f"Schema extraction failed: {e}")
         return {"db_structure": {}}
@@ -49,20 +45,19 @@ async def qa_process_node(state: OverallState):
     question = state["current_question"]
     structure = state["db_structure"]
     session_id = state['session_id']
-    agent = ResumeQAAgent(structure , session_id)
-    answer = await agent.run(question)
+    answer = await get_qa_agent(structure).run(question, session_id)
     
     print(f"\n🤖 Agent Answer: {answer}\n")
     return {"qa_answer": answer}
 
 async def top_candidates_node(state: OverallState):
     session_id = state['session_id']
-    top_candidates = await mongo_handler.get_top_candidates(3)
+    top_candidates = await mongo_handler.get_top_candidates(3, session_id)
     top_candidates_summary = candidate_summary(top_candidates)
 
     prompt = TOP_CANDIDATE.format(top_candidate_summary=top_candidates_summary)
     response = await LLMFactory.ainvoke([HumanMessage(content=prompt)])
-    asyncio.create_task(save_token_cost('top_candidates_node', session_id , response))
+    await save_token_cost('top_candidates_node', session_id , response)
     answer = parser.invoke(response)
 
     print(f"\n🤖 Agent Answer: {answer}\n")
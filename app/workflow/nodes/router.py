@@ -26,7 +26,7 @@ async def router_process_node(state: OverallState):
         messages,
         tools=[AgentTools.router_tool],
     )
-    asyncio.create_task(save_token_cost("router_process_node", session_id, response))
+    await save_token_cost("router_process_node", session_id, response)
     
     if response.tool_calls:
         tool_call = response.tool_calls[0]
@@ -0,0 +1,254 @@
+import asyncio
+import heapq
+import math
+import statistics
+import time
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable
+
+from app.config.config import config
+from app.config.logger import logger
+
+
+def estimate_work(meta: dict | None) -> float:
+    """Estimated OCR pages of a file: the real page count when known, otherwise derived from its size."""
+    meta = meta or {}
+    if meta.get("pages"):
+        return float(meta["pages"])
+    size = meta.get("size") or 0
+    return max(1.0, size / config.shard_bytes_per_page)
+
+
+def count_shards(files: list[str], num_shards: int) -> list[list[str]]:
+    """Original sharding: equal number of files per shard."""
+    chunk_size = math.ceil(len(files) / num_shards)
+    shards = [files[i * chunk_size:(i + 1) * chunk_size] for i in range(num_shards)]
+    return [s for s in shards if s]
+
+
+def work_shards(files: list[str], work: dict[str, float], num_shards: int) -> list[list[str]]:
+    """Longest-processing-time-first: each file goes to the currently lightest shard."""
+    shards: list[list[str]] = [[] for _ in range(num_shards)]
+    heap = [(0.0, i) for i in range(num_shards)]
+    for f in sorted(files, key=lambda k: work[k], reverse=True):
+        load, i = heapq.heappop(heap)
+        shards[i].append(f)
+        heapq.heappush(heap, (load + work[f], i))
+    return [s for s in shards if s]
+
+
+def work_skew(shards: list[list[str]], work: dict[str, float]) -> float:
+    """max/mean of the estimated work per shard (1.0 = perfectly balanced)."""
+    loads = [sum(work[f] for f in shard) for shard in shards]
+    mean = statistics.mean(loads) if loads else 0
+    return max(loads) / mean if mean else 1.0
+
+
+def plan_shards(files: list[str], file_meta: dict[str, dict]) -> tuple[list[list[str]], dict[str, float]]:
+    """Splits files into at most `max_batches` shards according to `sharding_mode`."""
+    num_chunks = min(config.max_batches, len(files))
+    work = {f: estimate_work(file_meta.get(f)) for f in files}
+    by_count = count_shards(files, num_chunks)
+    if config.sharding_mode != "work":
+        return by_count, work
+    shards = work_shards(files, work, num_chunks)
+    logger.info(
+        f"📐 Estimated work skew (max/mean): count-based={work_skew(by_count, work):.2f} "
+        f"work-based={work_skew(shards, work):.2f}"
+    )
+    return shards, work
+
+
+class FileListing:
+    """
+    The rest of a bucket listing, streamed in the background while the first page is
+    already being processed. `prepare` turns a page of objects into the file keys still
+    to process (registering them in the ledger on the way).
+    """
+
+    def __init__(
+        self,
+        pages: AsyncIterator[list[dict]],
+        prepare: Callable[[list[dict]], Awaitable[list[str]]],
+        prefetch: int = 2,
+    ):
+        self.meta: dict[str, dict] = {}
+        self.listed = 0
+        self._pages: asyncio.Queue = asyncio.Queue(maxsize=prefetch)
+        self._exhausted = False
+        self._task = asyncio.create_task(self._fill(pages, prepare))
+
+    async def _fill(self, pages: AsyncIterator[list[dict]], prepare):
+        try:
+            async for page in pages:
+                for obj in page:
+                    self.meta[obj["key"]] = {"size": obj.get("size"), "etag": obj.get("etag")}
+                self.listed += len(page)
+                await self._pages.put(await prepare(page))
+        except Exception as e:
+            logger.error(f"❌ Listing stopped after {self.listed} objects: {e}")
+        await self._pages.put(None)
+
+    async def next_page(self) -> list[str] | None:
+        """The next page of pending files, None once the listing is exhausted."""
+        if self._exhausted:
+            return None
+        files = await self._pages.get()
+        if files is None:
+            self._exhausted = True
+            logger.info(f"📂 Listing finished: {self.listed} more resumes streamed in.")
+        return files
+
+    async def pages(self) -> AsyncIterator[list[str]]:
+        while (files := await self.next_page()) is not None:
+            yield files
+
+    def cancel(self):
+        self._task.cancel()
+
+
+class WorkQueue:
+    """
+    Shared per-session file queue for the batch workers of one run.
+    Each batch first drains its own shard; with stealing enabled an idle batch then
+    takes files from the tail of the shard with the most remaining work.
+    With a `listing`, a batch that runs dry pulls the next listing page and spreads
+    it over the shards, so processing starts before the bucket is fully listed.
+    """
+
+    def __init__(
+        self,
+        shards: dict[int, list[str]],
+        work: dict[str, float],
+        steal: bool,
+        listing: FileListing | None = None,
+    ):
+        self.shards = {batch_id: deque(files) for batch_id, files in shards.items()}
+        self.assigned = {batch_id: len(files) for batch_id, files in shards.items()}
+        self.work = work
+        self.steal = steal
+        self.listing = listing
+        self._listing_lock = asyncio.Lock()
+        self.stolen = 0
+        self.started_at = time.perf_counter()
+        self.finished_at: dict[int, float] = {}
+
+    def _remaining(self, batch_id: int) -> float:
+        return sum(self.work.get(f, 1.0) for f in self.shards[batch_id])
+
+    def _available(self, batch_id: int) -> bool:
+        if self.shards.get(batch_id):
+            return True
+        return self.steal and any(self.shards.values())
+
+    def _take(self, batch_id: int) -> str | None:
+        own = self.shards.get(batch_id)
+        if own:
+            return own.popleft()
+        if not self.steal:
+            return None
+        victims = [b for b, files in self.shards.items() if files]
+        if not victims:
+            return None
+        victim = max(victims, key=self._remaining)
+        self.stolen += 1
+        file_key = self.shards[victim].pop()
+        logger.debug(f"🦝 [Batch {batch_id}] Stole {file_key} from batch {victim}")
+        return file_key
+
+    def add(self, files: list[str]):
+        """Spreads newly listed files over the shards, like `plan_shards` would have."""
+        for f in files:
+            self.work[f] = estimate_work(self.listing.meta.get(f) if self.listing else None)
+        if config.sharding_mode == "work":
+            heap = [(self._remaining(b), b) for b in self.shards]
+            heapq.heapify(heap)
+            for f in sorted(files, key=lambda k: self.work[k], reverse=True):
+                load, b = heapq.heappop(heap)
+                self.shards[b].append(f)
+                heapq.heappush(heap, (load + self.work[f], b))
+        else:
+            for f in files:
+                b = min(self.assigned, key=self.assigned.get)
+                self.shards[b].append(f)
+                self.assigned[b] += 1
+
+    async def claim(self, batch_id: int) -> str | None:
+        while True:
+            file_key = self._take(batch_id)
+            if file_key is not None or self.listing is None:
+                return file_key
+            async with self._listing_lock:
+                # Another batch may have pulled a page while this one waited
+                if self._available(batch_id) or self.listing is None:
+                    continue
+                files = await self.listing.next_page()
+                if files is None:
+                    self.listing = None
+                else:
+                    self.add(files)
+
+    def mark_done(self, batch_id: int):
+        self.finished_at[batch_id] = time.perf_counter() - self.started_at
+
+    def log_completion_skew(self):
+        if not self.finished_at:
+            return
+        durations = list(self.finished_at.values())
+        mean = statistics.mean(durations)
+        skew = max(durations) / mean if mean else 1.0
+        logger.info(
+            f"⏱️ Batch completion: {len(durations)} batches, first={min(durations):.1f}s "
+            f"last={max(durations):.1f}s skew(max/mean)={skew:.2f} stolen={self.stolen} "
+            f"mode={config.sharding_mode}"
+        )
+
+
+# Work queues and listings of the runs currently being processed in this process, by session
+_work_queues: dict[str, WorkQueue] = {}
+_listings: dict[str, FileListing] = {}
+
+
+def register_work_queue(session_id: str, queue: WorkQueue):
+    _work_queues[session_id] = queue
+
+
+def get_work_queue(session_id: str) -> WorkQueue | None:
+    return _work_queues.get(session_id)
+
+
+def release_work_queue(session_id: str) -> WorkQueue | None:
+    return _work_queues.pop(session_id, None)
+
+
+def register_listing(session_id: str, listing: FileListing):
+    _listings[session_id] = listing
+
+
+def release_listing(session_id: str) -> FileListing | None:
+    listing = _listings.pop(session_id, None)
+    if listing is not None:
+        listing.cancel()
+    return listing
+
+
+def take_listing(session_id: str) -> FileListing | None:
+    """Hands the listing over to its consumer (work queue or job dispatch)."""
+    return _listings.pop(session_id, None)
+
+
+class BatchFiles:
+    """
+    File source for one batch: claims from the session's work queue, or walks the
+    batch's own `files_in_batch` when no queue is registered (e.g. after a restart).
+    """
+
+    def __init__(self, session_id: str, batch_id: int, files_in_batch: list[str]):
+        self.batch_id = batch_id
+        self.queue = get_work_queue(session_id)
+        self.fallback = deque(files_in_batch)
+
+    async def next(self) -> str | None:
+        if self.queue is not None:
+            return await self.queue.claim(self.batch_id)
+        return self.fallback.popleft() if self.fallback else None
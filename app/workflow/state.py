@@ -12,6 +12,7 @@ class BatchState(TypedDict):
     session_id:str
     batch_id: int
     files_in_batch: List[str]
+    # Artifact references (see ArtifactStore), never the OCR text / resume payloads themselves
     ocr_results: Dict[str, str]
     structured_results: List[Dict[str, Any]]
     hiring_reqs: HiringRequirements
@@ -34,10 +35,12 @@ class OverallState(TypedDict):
     hiring_messages: Annotated[List[BaseMessage], add_messages]
     hiring_reqs: Annotated[HiringRequirements, update_latest]
 
-    # Processing (Map-Reduce)
+    # Processing (Map-Reduce) - compact artifact references, payloads live in the ArtifactStore
     evaluated_results: Annotated[List[Dict[str, Any]], operator.add]
     ocr_results: Annotated[List[Dict[str, str]], operator.add]
     all_files: List[str]
+    file_meta: Dict[str, Dict[str, Any]]
+    job_run_id: str
 
     # mongo Q&A
     db_structure: Annotated[Dict, update_latest]
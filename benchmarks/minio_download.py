@@ -0,0 +1,94 @@
+"""
+MinIO download benchmark: per-object latency with a new S3 client per call (the old
+behaviour) versus the shared, pooled client of MinioHandler.
+
+    python -m benchmarks.minio_download --objects 1000 --concurrency 5
+
+Uploads `--objects` small PDFs to a scratch bucket, downloads each of them once per mode
+with `--concurrency` parallel downloads (like OCR_WORKERS) and removes the bucket afterwards.
+Only MinIO from docker-compose needs to be running.
+"""
+import asyncio
+import statistics
+import time
+
+import click
+
+from app.services.minio_service import MinioHandler
+
+BENCH_BUCKET = "bench-downloads"
+
+
+def _fake_pdf(i: int, size: int) -> bytes:
+    body = b"%PDF-1.4\n% resume " + str(i).encode() + b"\n"
+    return body + b"0" * max(0, size - len(body) - 6) + b"\n%%EOF"
+
+
+async def _per_call_client(minio: MinioHandler, key: str) -> bytes:
+    async with minio.session.client("s3", **minio.config) as s3:
+        response = await s3.get_object(Bucket=BENCH_BUCKET, Key=key)
+        return await response["Body"].read()
+
+
+async def _shared_client(minio: MinioHandler, key: str) -> bytes:
+    return await minio.download_file_bytes(BENCH_BUCKET, key)
+
+
+async def _measure(download, minio: MinioHandler, keys: list[str], concurrency: int) -> tuple[float, list[float]]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(key: str):
+        async with semaphore:
+            started = time.perf_counter()
+            await download(minio, key)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(k) for k in keys])
+    return time.perf_counter() - started, latencies
+
+
+def _report(label: str, elapsed: float, latencies: list[float]):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    click.echo(
+        f"{label:<16} total {elapsed:>7.2f}s  {len(latencies) / elapsed:>7.1f} obj/s  "
+        f"mean {statistics.mean(latencies):>6.1f}ms  p50 {statistics.median(latencies):>6.1f}ms  p95 {p95:>6.1f}ms"
+    )
+
+
+async def _run(objects: int, size: int, concurrency: int):
+    minio = MinioHandler()
+    await minio.ensure_bucket(BENCH_BUCKET)
+    keys = [f"resume_{i:05d}.pdf" for i in range(objects)]
+    semaphore = asyncio.Semaphore(20)
+
+    async def seed(i: int, key: str):
+        async with semaphore:
+            await minio.upload_bytes(BENCH_BUCKET, key, _fake_pdf(i, size), "application/pdf")
+
+    await asyncio.gather(*[seed(i, k) for i, k in enumerate(keys)])
+    click.echo(f"{objects} objects of {size} bytes, {concurrency} concurrent downloads")
+
+    try:
+        _report("client per call", *await _measure(_per_call_client, minio, keys, concurrency))
+        _report("shared client", *await _measure(_shared_client, minio, keys, concurrency))
+    finally:
+        await minio.empty_bucket(BENCH_BUCKET)
+        s3 = await minio._s3()
+        await s3.delete_bucket(Bucket=BENCH_BUCKET)
+        await MinioHandler.close()
+
+
+@click.command()
+@click.option("--objects", default=1000, show_default=True, help="Number of PDFs to download.")
+@click.option("--size", default=20_000, show_default=True, help="Size of each PDF in bytes.")
+@click.option("--concurrency", default=5, show_default=True, help="Parallel downloads.")
+def main(objects: int, size: int, concurrency: int):
+    """Compares download latency with and without the shared S3 client."""
+    asyncio.run(_run(objects, size, concurrency))
+
+
+if __name__ == "__main__":
+    main()
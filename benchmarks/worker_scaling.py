@@ -0,0 +1,103 @@
+"""
+Worker scaling benchmark: how file throughput grows with the number of worker processes.
+
+    python -m benchmarks.worker_scaling --files 400 --workers 1 2 4 8
+
+Uses the real Mongo job queue (a separate `bench_jobs` collection, wiped before every
+round) with stand-in handlers instead of MinIO/OCR/LLM: each file waits `--io-ms`
+(the network calls) and burns `--cpu-ms` of CPU (PDF rendering, parsing).
+Only MongoDB from docker-compose needs to be running.
+"""
+import asyncio
+import multiprocessing as mp
+import time
+
+import click
+
+from app.services.job_queue import JobQueue, PROCESS_FILE
+
+BENCH_COLLECTION = "bench_jobs"
+
+
+async def _stand_in_job(job: dict, io_ms: int, cpu_ms: int) -> dict:
+    deadline = time.perf_counter() + cpu_ms / 1000
+    while time.perf_counter() < deadline:
+        pass
+    await asyncio.sleep(io_ms / 1000)
+    file_key = job["payload"]["file"]
+    return {"evaluated_results": [{"file": file_key, "ref": f"bench:{file_key}", "final_score": 0.0}]}
+
+
+def _worker_process(concurrency: int, io_ms: int, cpu_ms: int):
+    from app.worker import JobWorker
+
+    async def handler(job):
+        return await _stand_in_job(job, io_ms, cpu_ms)
+
+    async def run():
+        worker = JobWorker(
+            JobQueue(BENCH_COLLECTION), concurrency, handlers={PROCESS_FILE: handler}, exit_when_idle=True
+        )
+        await worker.run()
+
+    asyncio.run(run())
+
+
+async def _prepare(files: int):
+    queue = JobQueue(BENCH_COLLECTION)
+    await queue.collection.delete_many({})
+    await queue.ensure_indexes()
+    jobs = [(f"resume_{i:05d}.pdf", {"file": f"resume_{i:05d}.pdf"}) for i in range(files)]
+    await queue.submit_many(PROCESS_FILE, "bench", "bench-run", jobs)
+
+
+async def _collect() -> tuple[float, int, int]:
+    queue = JobQueue(BENCH_COLLECTION)
+    done, failed = await queue.run_results("bench-run")
+    files = {r["file"] for job in done for r in job["result"]["evaluated_results"]}
+    # Measure from the first claim to the last completion, so process start-up is not counted
+    cursor = queue.collection.aggregate([
+        {"$match": {"run_id": "bench-run"}},
+        {"$group": {"_id": None, "start": {"$min": "$started_at"}, "end": {"$max": "$finished_at"}}},
+    ])
+    span = (await cursor.to_list(length=1))[0]
+    return (span["end"] - span["start"]).total_seconds(), len(files), len(failed)
+
+
+def _round(files: int, workers: int, concurrency: int, io_ms: int, cpu_ms: int) -> tuple[float, int, int]:
+    asyncio.run(_prepare(files))
+    ctx = mp.get_context("spawn")
+    procs = [ctx.Process(target=_worker_process, args=(concurrency, io_ms, cpu_ms)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    return asyncio.run(_collect())
+
+
+@click.command()
+@click.option("--files", default=400, show_default=True, help="Files (jobs) per round.")
+@click.option("--workers", "worker_counts", multiple=True, type=int, default=(1, 2, 4, 8), show_default=True,
+              help="Worker process counts to compare.")
+@click.option("--concurrency", default=2, show_default=True, help="Jobs per worker at the same time.")
+@click.option("--io-ms", default=200, show_default=True, help="Simulated network time per file.")
+@click.option("--cpu-ms", default=20, show_default=True, help="Simulated CPU time per file.")
+def main(files: int, worker_counts: tuple[int, ...], concurrency: int, io_ms: int, cpu_ms: int):
+    """Measures file throughput for several worker process counts."""
+    click.echo(f"{files} files, concurrency {concurrency}/worker, {io_ms}ms io + {cpu_ms}ms cpu per file")
+    click.echo(f"{'workers':>8} {'seconds':>9} {'files/s':>9} {'speedup':>8} {'efficiency':>11} {'done':>6} {'failed':>7}")
+    baseline = None
+    for workers in worker_counts:
+        elapsed, done, failed = _round(files, workers, concurrency, io_ms, cpu_ms)
+        throughput = done / elapsed
+        baseline = baseline or throughput / workers
+        speedup = throughput / baseline
+        click.echo(
+            f"{workers:>8} {elapsed:>9.2f} {throughput:>9.1f} {speedup:>7.2f}x {speedup / workers:>10.0%} "
+            f"{done:>6} {failed:>7}"
+        )
+    asyncio.run(JobQueue(BENCH_COLLECTION).collection.drop())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,47 @@
 import chainlit as cl
 import asyncio
-from pymongo import MongoClient
 
 # Graph & Service Imports
 from langgraph.types import Command
-from langgraph.checkpoint.mongodb import MongoDBSaver
 from langchain_core.messages import HumanMessage
 from langchain_core.output_parsers import StrOutputParser
 
 # Your existing project imports
 from app.services.minio_service import MinioHandler
+from app.services.checkpoint import MeasuredMongoDBSaver
+from app.services.indexes import ensure_indexes
+from app.services.mongo_client import close_clients, get_sync_client, log_connection_stats
+from app.services.local_uploads import local_uploads
+from app.services.retention import retention_loop
+from app.services.usage_writer import usage_writer
 from utils.helper import upload_resume_to_minio
 from app.workflow.builder import build_graph
 from app.config.config import config
 from app.config.logger import logger
 
 # Initialize services
-mongo_client = MongoClient(config.mongo_uri)
 parser = StrOutputParser()
 minio = MinioHandler()
-checkpointer = MongoDBSaver(mongo_client)
+checkpointer = MeasuredMongoDBSaver(get_sync_client())
+
+retention_task: asyncio.Task | None = None
+
+@cl.on_app_startup
+async def startup():
+    global retention_task
+    await ensure_indexes()
+    if config.storage_retention_days > 0:
+        retention_task = asyncio.create_task(retention_loop())
+
+@cl.on_app_shutdown
+async def shutdown():
+    if retention_task is not None:
+        retention_task.cancel()
+    await local_uploads.drain()
+    await usage_writer.close()
+    await MinioHandler.close()
+    log_connection_stats("shutdown")
+    close_clients()
 
 @cl.on_chat_start
 async def start():
@@ -28,6 +50,7 @@ async def start():
     # --- Step 1: check bucket exist---
     await minio.ensure_bucket(config.minio_resume_bucket)
     await minio.ensure_bucket(config.minio_compare_bucket)
+    await minio.ensure_bucket(config.minio_artifact_bucket)
 
     # --- Step 2: Build & Compile Graph ---
     builder = build_graph()
@@ -56,6 +79,22 @@ async def on_message(message: cl.Message):
     # depending on your graph logic.
     await run_graph_cycle(Command(resume=message.content))
 
+async def show_job_progress(progress: dict, msg: cl.Message | None) -> cl.Message:
+    """Shows (and keeps updating) the progress of background processing jobs."""
+    jobs = progress.get("jobs", {})
+    files = progress.get("files", {})
+    content = (
+        f"⏳ پردازش در پس‌زمینه: {jobs.get('done', 0)}/{progress.get('total_jobs', 0)} کار انجام شد"
+        f" | ارزیابی‌شده: {files.get('evaluated', 0) + files.get('saved', 0)}"
+    )
+    if msg is None:
+        msg = cl.Message(content=content)
+        await msg.send()
+    else:
+        msg.content = content
+        await msg.update()
+    return msg
+
 async def run_graph_cycle(input_data):
     """
     Main loop to run the graph until it stops or hits an interrupt.
@@ -66,14 +105,24 @@ async def run_graph_cycle(input_data):
     logger.debug(f"🔄 DEBUG: Starting cycle with input: {input_data}") # DEBUG LOG
 
     try:
-        # stream_mode="updates" allows us to react to node completion
-        async for event in graph.astream(input_data, config=config, stream_mode="updates"):
+        progress_msg = None
+        # "updates" allows us to react to node completion, "custom" carries job progress
+        async for mode, event in graph.astream(input_data, config=config, stream_mode=["updates", "custom"]):
+
+            if mode == "custom":
+                if isinstance(event, dict) and event.get("type") == "job_progress":
+                    progress_msg = await show_job_progress(event, progress_msg)
+                elif isinstance(event, dict) and event.get("type") == "upload_failed":
+                    await cl.Message(
+                        content=f"❌ ذخیره‌سازی این فایل‌ها ناموفق بود، لطفا دوباره آپلود کنید: {'؛ '.join(event['files'])}"
+                    ).send()
+                continue
             
             for node_name, updates in event.items():
                 logger.debug(f"📍 DEBUG: Node '{node_name}' finished.") # DEBUG LOG
                 msg = cl.Message(content=f"...رزومه‌ها در حال بررسی هستند")
 
-                if "process_batch_subgraph" in node_name or "compare_process" in node_name:
+                if "process_batch_subgraph" in node_name or "dispatch_jobs" in node_name or "compare_process" in node_name:
                     msg.content = "رزومه در حال ocr هستند"
                     await msg.update()
 
@@ -139,9 +188,11 @@ async def run_graph_cycle(input_data):
                         await msg.send()
                         
                         bucket_name = interrupt_val.get("bucket_name")
-                        uploaded_keys = await upload_resume_to_minio(files , bucket_name)
+                        session_id = config["configurable"]["thread_id"]
+                        uploaded_keys = await upload_resume_to_minio(files , bucket_name, session_id)
                         if uploaded_keys:
-                            msg.content = f"✅ آپلود {len(files)} فایل انجام شد."
+                            # The MinIO upload continues in the background, failures are reported later
+                            msg.content = f"✅ {len(files)} فایل دریافت شد، ذخیره‌سازی در پس‌زمینه ادامه دارد."
                             await msg.update()
                             logger.debug(f"▶️ DEBUG: Resuming with files: {uploaded_keys}")
                             # Resume the graph immediately
@@ -151,7 +202,7 @@ async def run_graph_cycle(input_data):
                     else:
                         await cl.Message(content="❌ آپلود کنسل یا ارتباط قطع شد.").send()
                 else:
-                    msg = cl.Message(content=f"رزومه های ذخیره شده بررسی می شود.")
+                    msg = cl.Message(content=f"رزومه های ذخیره شده این گفتگو بررسی می شود.")
                     await msg.send()
                     await run_graph_cycle(Command(resume=[]))
 
@@ -0,0 +1,8 @@
+import os
+
+# Settings() is built on import and requires these; the tests never connect to anything
+for _name in (
+    "API_KEY", "MINIO_SECRET_KEY", "MINIO_ENDPOINT", "MONGO_ENDPOINT", "MONGO_DB_NAME",
+    "MONGO_DB_USAGE", "MONGO_COLLECTION", "MONGO_USERNAME", "MONGO_PASSWORD",
+):
+    os.environ.setdefault(_name, "test")
@@ -0,0 +1,41 @@
+import pytest
+
+from utils.process_stracutre import degree_level
+
+
+@pytest.mark.parametrize("degree, expected", [
+    ("Ph.D. in Computer Science", "phd"),
+    ("دکترای مهندسی برق", "phd"),
+    ("MS in Computer Science", "master"),
+    ("M.A.", "master"),
+    ("M.Sc. Software Engineering", "master"),
+    ("Master's degree", "master"),
+    ("MBA", "master"),
+    ("کارشناسی ارشد", "master"),
+    ("فوق‌لیسانس", "master"),
+    ("BS Software Engineering", "bachelor"),
+    ("B.A. Economics", "bachelor"),
+    ("B.Sc.", "bachelor"),
+    ("کارشناسی نرم افزار", "bachelor"),
+    ("لیسانس حسابداری", "bachelor"),
+    ("Associate Degree", "associate"),
+    ("فوق دیپلم کامپیوتر", "associate"),
+    ("کاردانی", "associate"),
+    ("High School Diploma", "diploma"),
+    ("دیپلم ریاضی", "diploma"),
+])
+def test_degree_levels(degree, expected):
+    assert degree_level(degree)[0] == expected
+
+
+@pytest.mark.parametrize("degree", [
+    "Associate Professor",
+    "Postgraduate Diploma in IT",
+    "Business Administration",
+    "Mass communication",
+    "masterclass",
+    "",
+    None,
+])
+def test_not_degrees(degree):
+    assert degree_level(degree) is None
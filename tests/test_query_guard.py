@@ -0,0 +1,121 @@
+import pytest
+
+from app.config.config import config
+from app.services.query_guard import (
+    QueryRejectedError, clamp_limit, plan_summary, vet_filter, vet_pipeline, vet_projection,
+)
+
+
+def _whitelist(excluded=()):
+    return {field: 1 for field in config.qa_projection_fields if field not in ("_id", *excluded)}
+
+
+@pytest.mark.parametrize("query", [
+    {"$where": "this.final_score > 80"},
+    {"$or": [{"final_score": {"$gt": 80}}, {"$where": "true"}]},
+    {"$expr": {"$function": {"body": "function() { return true }", "args": [], "lang": "js"}}},
+])
+def test_filter_rejects_javascript(query):
+    with pytest.raises(QueryRejectedError):
+        vet_filter(query)
+
+
+def test_filter_must_be_a_document():
+    with pytest.raises(QueryRejectedError):
+        vet_filter([{"final_score": 1}])
+
+
+def test_filter_canonicalizes_skills():
+    query = {"$and": [{"search.skills": {"$all": ["Py", "پایتون", "Docker"]}}, {"final_score": {"$gt": 50}}]}
+    assert vet_filter(query) == {
+        "$and": [{"search.skills": {"$all": ["python", "python", "docker"]}}, {"final_score": {"$gt": 50}}]
+    }
+
+
+def test_projection_defaults_to_whitelist():
+    assert vet_projection(None) == {"_id": 0, **_whitelist()}
+
+
+@pytest.mark.parametrize("projection, expected", [
+    ({"_id": 0}, {"_id": 0, **_whitelist()}),
+    ({"search": 0}, {"_id": 0, **_whitelist(excluded=("search",))}),
+    ({"_id": 1, "evaluation": False}, {"_id": 1, **_whitelist(excluded=("evaluation",))}),
+])
+def test_exclusions_become_whitelist_inclusions(projection, expected):
+    assert vet_projection(projection) == expected
+
+
+def test_inclusions_pass_through():
+    projection = {"_id": 0, "final_score": 1, "resume.skills.hard_skills": {"$slice": 5}}
+    assert vet_projection(projection) == projection
+
+
+@pytest.mark.parametrize("projection", [
+    {"password": 1},
+    {"secret": 0},
+    {"evaluation.summary_explanation": 0},
+    {"final_score": 1, "search": 0},
+    {"resume.skills.hard_skills": {"$slice": 5}},
+    {"final_score": {"$elemMatch": {}}},
+    {"final_score": 2},
+    {field: 0 for field in config.qa_projection_fields},
+])
+def test_projection_rejections(projection):
+    with pytest.raises(QueryRejectedError):
+        vet_projection(projection)
+
+
+@pytest.mark.parametrize("stage", [
+    {"$group": {"_id": None, "doc": {"$first": "$$ROOT"}}},
+    {"$group": {"_id": "$$CURRENT.resume", "n": {"$sum": 1}}},
+    {"$group": {"_id": "$password", "n": {"$sum": 1}}},
+    {"$group": {"_id": None, "n": {"$push": "$final_score"}}},
+    {"$lookup": {"from": "usage_logs", "localField": "_id", "foreignField": "_id", "as": "x"}},
+    {"$out": "stolen"},
+    {"$match": {"$where": "true"}},
+])
+def test_pipeline_rejections(stage):
+    with pytest.raises(QueryRejectedError):
+        vet_pipeline([stage])
+
+
+def test_pipeline_allows_safe_variables():
+    stage = {"$group": {"_id": "$search.highest_degree", "latest": {"$max": "$$NOW"}}}
+    assert vet_pipeline([stage])[0] == stage
+
+
+def test_pipeline_gets_a_final_limit():
+    pipeline = vet_pipeline([{"$group": {"_id": "$search.highest_degree", "n": {"$sum": 1}}}])
+    assert pipeline[-1] == {"$limit": config.qa_query_max_results}
+
+
+def test_pipeline_limit_is_clamped():
+    pipeline = vet_pipeline([{"$sort": {"final_score": -1}}, {"$limit": config.qa_query_max_results + 100}])
+    assert pipeline == [{"$sort": {"final_score": -1}}, {"$limit": config.qa_query_max_results}]
+
+
+def test_count_needs_no_limit():
+    pipeline = vet_pipeline([{"$match": {"final_score": {"$gt": 80}}}, {"$count": "total"}])
+    assert pipeline[-1] == {"$count": "total"}
+
+
+@pytest.mark.parametrize("limit, expected", [
+    (None, config.qa_query_max_results),
+    (0, config.qa_query_max_results),
+    (1, 1),
+    (10_000, config.qa_query_max_results),
+])
+def test_clamp_limit(limit, expected):
+    assert clamp_limit(limit) == expected
+
+
+def test_plan_summary_finds_nested_stages():
+    explain = {"queryPlanner": {"winningPlan": {
+        "stage": "LIMIT", "inputStage": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "search_skills"}},
+    }, "rejectedPlans": [{"stage": "COLLSCAN"}]}}
+    assert plan_summary(explain) == {"collscan": False, "indexes": ["search_skills"]}
+
+
+def test_plan_summary_of_an_aggregation():
+    explain = {"stages": [{"$cursor": {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}}, {"$group": {}}]}
+    assert plan_summary(explain)["collscan"] is True
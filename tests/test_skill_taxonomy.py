@@ -0,0 +1,57 @@
+import pytest
+
+from app.config.config import config
+from utils.skill_taxonomy import canonical_skill, canonical_skills
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    canonical_skill.cache_clear()
+    yield
+    canonical_skill.cache_clear()
+
+
+@pytest.mark.parametrize("skill, expected", [
+    ("Python", "python"),
+    ("Py", "python"),
+    ("پایتون", "python"),
+    ("پيتون", "python"),  # Arabic ye
+    ("تایپ‌اسکریپت", "typescript"),  # zero-width non-joiner
+    ("  React  JS ", "react"),
+    ("DRF", "django rest framework"),
+])
+def test_aliases(skill, expected):
+    assert canonical_skill(skill) == expected
+
+
+@pytest.mark.parametrize("skill, expected", [
+    ("Python 3.11", "python"),
+    ("vue3", "vue"),
+    ("angular-15", "angular"),
+    ("Ubuntu 22.04", "ubuntu"),
+])
+def test_versions_are_dropped(skill, expected):
+    assert canonical_skill(skill) == expected
+
+
+@pytest.mark.parametrize("skill, expected", [
+    ("kubernets", "kubernetes"),
+    ("postgress", "postgresql"),
+    ("machine learnin", "machine learning"),
+])
+def test_misspellings_are_matched(skill, expected):
+    assert canonical_skill(skill) == expected
+
+
+@pytest.mark.parametrize("skill", ["data analyst", "project manager", "github", "scrum", "node", "jav"])
+def test_related_terms_are_not_merged(skill):
+    assert canonical_skill(skill) == skill
+
+
+def test_fuzzy_matching_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(config, "skill_fuzzy_cutoff", 1.0)
+    assert canonical_skill("kubernets") == "kubernets"
+
+
+def test_canonical_skills_are_unique_and_sorted():
+    assert canonical_skills(["Py", "python3", "Docker", "", "  ", None]) == ["docker", "python"]
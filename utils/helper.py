@@ -1,11 +1,18 @@
 import asyncio
+from datetime import datetime, timezone
 from typing import Dict
 
-from app.services.mongo_service import MongoHandler
+from botocore.exceptions import ClientError
+from pdf2image import pdfinfo_from_path
+
+from app.config.logger import logger
+from app.services.local_uploads import local_uploads
 from app.services.minio_service import MinioHandler
+from app.services.upload_manifest import UploadManifest, content_key, file_digest, session_prefix
+from app.services.usage_writer import usage_writer
 
-mongo_db = MongoHandler()
 minio_handler= MinioHandler()
+upload_manifest = UploadManifest()
 
 def candidate_summary(top_candidate_resume) -> str:
     text = ""
@@ -17,29 +24,85 @@ def candidate_summary(top_candidate_resume) -> str:
             if keys == "summary_explanation":
                 text += f"{keys}: {candidate['evaluation'][keys]}\n"
             elif keys != "final_weighted_score":
-                text += f"{keys}: {candidate['evaluation'][keys]["reasoning"]}\n"
+                text += f"{keys}: {candidate['evaluation'][keys]['reasoning']}\n"
         text += "=" * 10 + "\n"
     return text
 
-async def save_token_cost(node_name:str , session_id:str , response) -> Dict:
-    token_usage = response.response_metadata.get('token_usage') or response.usage_metadata
-    if 'is_byok' in token_usage:
-        del token_usage['is_byok']  
-    data = {
-        'node_name': node_name,
-        'session_id': session_id,
-        'model_name': response.response_metadata['model_name'],
-        **token_usage
-    }
-    result = await mongo_db.save_doc(mongo_db.usage_logs , data)
-    return result
-
-async def upload_resume_to_minio(files, bucket_name:str) -> Dict:
-    await minio_handler.empty_bucket(bucket_name)
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used for prompt budgeting."""
+    return len(text) // 4 + 1
+
+async def save_token_cost(node_name:str , session_id:str , response) -> Dict | None:
+    try:
+        token_usage = response.response_metadata.get('token_usage') or response.usage_metadata
+        if 'is_byok' in token_usage:
+            del token_usage['is_byok']  
+        data = {
+            'node_name': node_name,
+            'session_id': session_id,
+            'model_name': response.response_metadata['model_name'],
+            'latency_ms': response.response_metadata.get('latency_ms'),
+            'created_at': datetime.now(timezone.utc),
+            **token_usage
+        }
+    except Exception as e:
+        # Usage logging must never fail the LLM step it belongs to
+        logger.error(f"❌ [USAGE] Could not read token usage of {node_name}: {e}")
+        return None
+    # Buffered: written in batches by the usage writer, waits only when its buffer is full
+    await usage_writer.record(data)
+    return data
+
+def count_pages(path: str) -> int | None:
+    try:
+        return int(pdfinfo_from_path(path)["Pages"])
+    except Exception:
+        return None
+
+async def _copy_existing(bucket_name: str, digest: str, key: str) -> bool:
+    """Copies identical content another session already uploaded, server-side."""
+    for source in await upload_manifest.locations(bucket_name, digest):
+        try:
+            await minio_handler.copy_object(bucket_name, source, key)
+            return True
+        except ClientError:
+            # Removed by retention cleanup in the meantime, try the next copy
+            continue
+    return False
+
+async def _store_resume(path: str, name: str, bucket_name: str, key: str, digest: str):
+    """
+    Makes `key` durable in MinIO. A file the session already has is skipped, identical
+    content from another session is copied server-side.
+    """
+    head = await minio_handler.head_object(bucket_name, key)
+    if head is not None and head.get("Metadata", {}).get("sha256") == digest:
+        logger.info(f"♻️ {name} already stored as {key}, skipping upload")
+    elif await _copy_existing(bucket_name, digest, key):
+        logger.info(f"♻️ {name} copied from an identical upload to {key}")
+    else:
+        await minio_handler.upload_file(path, bucket_name, key, metadata={"sha256": digest})
+    await upload_manifest.add_location(bucket_name, key)
+
+async def upload_resume(file, bucket_name: str, session_id: str) -> str:
+    """
+    Registers one resume under the session's prefix and its content hash and returns its key
+    right away. The MinIO upload continues in the background; until it is gone, OCR reads
+    the local file.
+    """
+    digest, size = await asyncio.to_thread(file_digest, file.path)
+    key = session_prefix(session_id) + content_key(digest)
+    pages = await asyncio.to_thread(count_pages, file.path)
+    await upload_manifest.record(bucket_name, key, digest, size, file.name, pages, stored=False)
+    upload = asyncio.create_task(_store_resume(file.path, file.name, bucket_name, key, digest))
+    local_uploads.register(bucket_name, key, file.path, upload)
+    return key
+
+async def upload_resume_to_minio(files, bucket_name:str, session_id: str) -> list[str]:
+    """Returns the object keys of the uploaded files (duplicates collapsed)."""
     uploaded_keys = []
     if files:
-        tasks = [minio_handler.upload_file(file.path, bucket_name ,file.name) for file in files]
-        await asyncio.gather(*tasks)
-        uploaded_keys = [file.name for file in files]
+        tasks = [upload_resume(file, bucket_name, session_id) for file in files]
+        uploaded_keys = list(dict.fromkeys(await asyncio.gather(*tasks)))
     
     return uploaded_keys
\ No newline at end of file
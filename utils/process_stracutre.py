@@ -1,4 +1,6 @@
+import re
 from utils.date_calulator import DateCalculator
+from utils.skill_taxonomy import canonical_skills
 from typing import Dict
 
 data_calculater  = DateCalculator()
@@ -27,4 +29,90 @@ def fix_age_field(resume:Dict) -> Dict:
         if data_of_birth:
             resume['resume']['personal_info']['age'] = data_calculater.calculate_age(data_of_birth)
             return resume
-        return resume
\ No newline at end of file
+        return resume
+
+# Degree keywords (English and Persian) by level, matched as whole words; dots are
+# ignored, so "B.Sc." is "bsc" and "Ph.D" is "phd"
+DEGREE_LEVELS = [
+    ("phd", 5, ("phd", "dphil", "doctor", "doctorate", "doctoral", "دکتری", "دکترا", "دکترای")),
+    ("master", 4, ("msc", "ms", "ma", "mba", "meng", "mphil", "mres", "master", "masters",
+                   "کارشناسی ارشد", "ارشد", "فوق لیسانس")),
+    ("bachelor", 3, ("bsc", "bs", "ba", "beng", "bba", "bachelor", "bachelors", "undergraduate",
+                     "کارشناسی", "لیسانس")),
+    ("associate", 2, ("associate", "associates", "کاردانی", "فوق دیپلم")),
+    ("diploma", 1, ("diploma", "high school", "دیپلم")),
+]
+# Titles that contain a keyword without being that degree
+_NOT_DEGREES = (
+    "associate professor", "associate director", "associate manager", "associate engineer",
+    "postgraduate diploma", "graduate diploma", "pg diploma",
+)
+_WORD = re.compile(r"\w+")
+# Arabic code points Persian text often uses, and the zero-width non-joiner
+_PERSIAN = str.maketrans({"ي": "ی", "ك": "ک", "\u200c": " ", ".": ""})
+
+
+def _words(text: str) -> list[str]:
+    return _WORD.findall(text.translate(_PERSIAN).lower())
+
+
+# Every keyword, longest phrase first across levels: "فوق لیسانس" is a master's, not "لیسانس"
+_DEGREE_KEYWORDS = sorted(
+    ((tuple(_words(keyword)), name, level) for name, level, keywords in DEGREE_LEVELS for keyword in keywords),
+    key=lambda item: (len(item[0]), len(" ".join(item[0]))),
+    reverse=True,
+)
+_NOT_DEGREE_WORDS = [tuple(_words(phrase)) for phrase in _NOT_DEGREES]
+
+
+def _has_phrase(words: list[str], phrase: tuple[str, ...]) -> bool:
+    return any(tuple(words[i:i + len(phrase)]) == phrase for i in range(len(words) - len(phrase) + 1))
+
+
+def degree_level(degree: str | None) -> tuple[str, int] | None:
+    """(name, level) of a free-text degree, None when it is not recognized."""
+    words = _words(degree or "")
+    for phrase in _NOT_DEGREE_WORDS:
+        for i in range(len(words) - len(phrase) + 1):
+            if tuple(words[i:i + len(phrase)]) == phrase:
+                words[i:i + len(phrase)] = ["-"] * len(phrase)
+    for keyword, name, level in _DEGREE_KEYWORDS:
+        if _has_phrase(words, keyword):
+            return name, level
+    return None
+
+
+def build_search_view(resume: Dict) -> Dict:
+    """
+    Flat, indexed summary of a saved candidate (`search`) for fast filtering: canonical
+    skill ids (utils.skill_taxonomy) from every section, total experience months, highest degree, best university
+    tier (1 = elite), age and final score. Run after `enrich_resume_with_durations`.
+    """
+    data = resume['resume']
+    skills = list((data.get('skills') or {}).get('hard_skills') or [])
+    experience = ((data.get('work_experience') or {}).get('items')) or []
+    for item in experience:
+        skills += (item.get('extracted_skills') or []) + (item.get('technologies_used') or [])
+    for item in ((data.get('projects') or {}).get('items')) or []:
+        skills += item.get('technologies') or []
+
+    degrees = [
+        degree_level(item.get('degree'))
+        for item in ((data.get('education') or {}).get('items')) or []
+    ]
+    degrees = [d for d in degrees if d]
+    tiers = [
+        item['university_tier'] for item in ((data.get('education') or {}).get('items')) or []
+        if item.get('university_tier')
+    ]
+    highest = max(degrees, key=lambda d: d[1]) if degrees else None
+
+    return {
+        'skills': canonical_skills(skills),
+        'experience_months': sum(item.get('duration_months') or 0 for item in experience),
+        'highest_degree': highest[0] if highest else None,
+        'degree_level': highest[1] if highest else None,
+        'best_university_tier': min(tiers) if tiers else None,
+        'age': (data.get('personal_info') or {}).get('age'),
+        'final_score': resume.get('final_score'),
+    }
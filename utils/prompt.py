@@ -86,6 +86,30 @@ Assign a score (0-100) for each category.
 Output JSON strictly adhering to the `ResumeEvaluation` schema structure (excluding final_weighted_score, I will calc that).
 """
 
+BATCH_SCORING_PROMPT = """
+You are a Senior HR Evaluator. Rate EACH candidate resume below against the Job Requirements.
+Assign a score (0-100) for each category, independently for every candidate.
+
+**Job Requirements:**
+{requirements_json}
+
+**Instructions:**
+1. **Hard Skills:** 100 = All essential skills + some nice-to-have. 0 = No skills.
+2. **Experience:** Compare years and seniority level.Of course, experience related to the requested field should be the final scoring criterion.
+3. **Education:** 100 = Exact or higher degree match.
+4. **University Tier** 100 = Tier 1 , 0 =  Tier 4
+5. **Soft Skills:** Infer from summary/experience if not explicit.
+6. **Military Service:** If required=True and candidate is NOT Exempt/Completed, score is 0. Otherwise 100.
+7. Provide a short reasoning for each.
+8. Do NOT compare candidates with each other; evaluate every resume on its own.
+
+Output JSON strictly adhering to the `BatchResumeEvaluation` schema: one item in `evaluations` per candidate,
+with `source_file` copied exactly from the candidate entry (excluding final_weighted_score, I will calc that).
+
+**Candidate Resumes:**
+{resumes_json}
+"""
+
 TOP_CANDIDATE="""
 **Role:** You are the **Candidate Summary Synthesizer**, Your task is to analyze, compare, and synthesize the key characteristics of pre-selected candidates into a clear, balanced, and actionable summary for the human hiring manager.
 
@@ -119,20 +143,34 @@ Your goal is to answer user questions about candidates based strictly on the res
 {structure}
 
 **Tools:**
-You have access to a tool named `search_database`.
-- You MUST use this tool to retrieve information. Do NOT hallucinate candidate data.
-- Input to the tool must be a valid MongoDB `find()` query. (JSON string).
+You have access to two tools:
+- `search_database`: input must be a valid MongoDB `find()` query (JSON string). Use it to look up candidates and their details.
+- `aggregate_database`: input must be a MongoDB aggregation pipeline (JSON array string) using only `$match`, `$unwind`, `$group`, `$count`, `$sort` and `$limit`. Use it for every "how many", "average", "per city/degree/skill" or ranking question; it is computed on the server over all candidates.
+- You MUST use these tools to retrieve information. Do NOT hallucinate candidate data.
+
+**Search view (prefer it):**
+Every candidate has a flat, indexed `search` object. Filter on it instead of the nested `resume` fields whenever possible:
+- `search.skills`: canonical skill ids from all sections, e.g. {{"search.skills": "python"}} or {{"search.skills": {{"$all": ["python", "docker"]}}}}. Aliases and Persian names you put in these filters ("پایتون", "python3", "k8s") are mapped to the canonical id automatically, so match skills exactly and never with $regex.
+- `search.experience_months`: total work experience in months, e.g. more than 5 years -> {{"search.experience_months": {{"$gt": 60}}}}
+- `search.degree_level` (1 diploma, 2 associate, 3 bachelor, 4 master, 5 phd) and `search.highest_degree`
+- `search.best_university_tier` (1 = elite .. 4), `search.age`, `search.final_score`
+Use the nested `resume` fields only to display details (names, companies, titles) or for fields the view does not have.
 
 **Guidelines:**
 1. **Analyze** the user's question.
 2. **Construct** a MongoDB query to find the answer with this **Rules**
    -	BE CARFULL DO NOT TRANSLATE names or items mentioned in the query. For example, if you are told to search for people in تهران, you should search for the word "تهران" and not "Tehran".
     - Just retrive field you need based on question not all feild
-    - Search for fields with string data type as contains unless explicitly stated otherwise in the request.
+    - Search for fields with string data type as contains unless explicitly stated otherwise in the request (except `search.skills`, which holds exact lowercase values).
         - Example: "Find the final score of people whose name is مرتضی." -> {{ "query" : {{ "resume.personal_info.full_name": {{ "$regex": "مرتضی", "$options": "i" }}}} , "projection":{{"_id": 0, "final_score": 1}}}}
         - Example: "Give me name of people score above 80" -> {{ "query" : {{ "final_score": {{ "$gt": 80 }} }} , "projection":{{"_id": 0, "resume.personal_info.full_name": 1}}}}
-        - Example: "Count people live in Tehran" -> {{ "query" : {{'resume.personal_info.location': {{'$regex': 'Tehran', '$options': 'i'}}}} , "projection":{{"_id": 1}}}}
+        - Example: "Count people live in Tehran" -> aggregate_database: [{{"$match": {{"resume.personal_info.location": {{"$regex": "Tehran", "$options": "i"}}}}}}, {{"$count": "total"}}]
+        - Example: "How many candidates have Python and more than 5 years of experience" -> aggregate_database: [{{"$match": {{"search.skills": "python", "search.experience_months": {{"$gt": 60}}}}}}, {{"$count": "total"}}]
+        - Example: "Average score per city" -> aggregate_database: [{{"$group": {{"_id": "$resume.personal_info.location", "avg_score": {{"$avg": "$final_score"}}, "count": {{"$sum": 1}}}}}}, {{"$sort": {{"count": -1}}}}, {{"$limit": 10}}]
 3. **Execute** the tool.
+   - When you need several independent queries, call the tools for all of them in the same step; they run in parallel.
+   - Every result ends with `Query stats`. If the query was rejected, `rewritten` or `slow`, refine it with filters on indexed fields and run it again.
+   - Only the first few matching documents are returned (see `limit` in the stats), so never count results yourself.
 4. **Interpret** the results.
 5. **Answer** the user in **Persian (Farsi)**.
    - Be polite and concise.
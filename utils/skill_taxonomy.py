@@ -0,0 +1,137 @@
+import difflib
+import re
+from functools import lru_cache
+
+from app.config.config import config
+
+# Canonical skill id -> aliases (lowercase; English spellings, abbreviations and Persian names).
+# Aliases are other names of the same technology only: related tools (github/git, scrum/agile,
+# spring boot/spring) keep their own ids.
+SKILL_ALIASES: dict[str, list[str]] = {
+    "python": ["py", "python3", "python 3", "پایتون", "پيتون"],
+    "javascript": ["js", "java script", "ecmascript", "es6", "جاوااسکریپت", "جاوا اسکریپت"],
+    "typescript": ["ts", "تایپ اسکریپت", "تایپ‌اسکریپت"],
+    "java": ["جاوا", "java se", "java ee"],
+    "c#": ["csharp", "c sharp", "سی شارپ"],
+    "c++": ["cpp", "c plus plus", "سی پلاس پلاس"],
+    "c": ["c language", "زبان سی"],
+    "go": ["golang", "گو", "گولنگ"],
+    "rust": ["راست"],
+    "php": ["پی اچ پی"],
+    "kotlin": ["کاتلین"],
+    "swift": ["سوئیفت"],
+    "dart": ["دارت"],
+    "sql": ["اس کیو ال"],
+    "t-sql": ["tsql", "transact-sql"],
+    "pl/sql": ["plsql", "pl sql"],
+    "html": ["html5", "اچ تی ام ال"],
+    "css": ["css3", "سی اس اس"],
+    "react": ["reactjs", "react.js", "react js", "ری اکت", "ریکت"],
+    "react native": ["react-native", "ری اکت نیتیو"],
+    "vue": ["vuejs", "vue.js", "vue js", "ویو"],
+    "angular": ["angularjs", "angular.js", "انگولار"],
+    "next.js": ["nextjs", "next js", "نکست"],
+    "node.js": ["nodejs", "node js", "نود جی اس"],
+    "express": ["expressjs", "express.js"],
+    "django": ["جنگو"],
+    "django rest framework": ["drf", "django rest"],
+    "flask": ["فلسک"],
+    "fastapi": ["fast api", "فست ای پی آی"],
+    "spring": ["spring framework", "اسپرینگ"],
+    "spring boot": ["springboot", "اسپرینگ بوت"],
+    ".net": ["dotnet", "dot net", ".net core", "دات نت"],
+    "asp.net": ["asp.net core", "asp net", "asp.net mvc"],
+    "laravel": ["لاراول"],
+    "flutter": ["فلاتر"],
+    "android": ["اندروید"],
+    "ios": ["آی او اس"],
+    "docker": ["داکر"],
+    "docker compose": ["docker-compose"],
+    "kubernetes": ["k8s", "kube", "کوبرنتیز", "کوبرنیتیز"],
+    "linux": ["لینوکس"],
+    "ubuntu": ["اوبونتو"],
+    "centos": ["cent os"],
+    "debian": ["دبیان"],
+    "git": ["گیت"],
+    "github": ["git hub", "گیت هاب"],
+    "gitlab": ["git lab", "گیت لب"],
+    "ci/cd": ["cicd", "ci cd", "ci-cd"],
+    "aws": ["amazon web services", "آمازون وب سرویس"],
+    "postgresql": ["postgres", "psql", "پستگرس", "پستگرس کیو ال"],
+    "mysql": ["مای اس کیو ال"],
+    "mongodb": ["mongo", "مونگو", "مونگو دی بی"],
+    "redis": ["ردیس"],
+    "elasticsearch": ["elastic search", "elastic", "الستیک"],
+    "kafka": ["apache kafka", "کافکا"],
+    "rabbitmq": ["rabbit mq", "rabbit", "ربیت"],
+    "graphql": ["graph ql"],
+    "rest api": ["restful", "restful api", "rest apis", "restful apis"],
+    "machine learning": ["ml", "یادگیری ماشین"],
+    "deep learning": ["dl", "یادگیری عمیق"],
+    "nlp": ["natural language processing", "پردازش زبان طبیعی"],
+    "computer vision": ["بینایی ماشین", "بینایی کامپیوتر"],
+    "data analysis": ["data analytics", "تحلیل داده", "تحلیل داده‌ها"],
+    "tensorflow": ["تنسورفلو"],
+    "pytorch": ["py torch", "پای تورچ"],
+    "pandas": ["پانداس"],
+    "numpy": ["نامپای"],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "excel": ["microsoft excel", "ms excel", "اکسل"],
+    "power bi": ["powerbi", "پاور بی آی"],
+    "figma": ["فیگما"],
+    "photoshop": ["adobe photoshop", "فتوشاپ"],
+    "seo": ["سئو", "search engine optimization"],
+    "project management": ["مدیریت پروژه"],
+    "agile": ["اجایل"],
+    "scrum": ["اسکرام"],
+}
+
+# Trailing versions ("python 3.11", "vue3", "angular-15"), not part of the skill
+_VERSION = re.compile(r"[\s\-_]*v?\d+(\.\d+)*x?$")
+# Arabic code points Persian text often uses, and the zero-width non-joiner
+_PERSIAN = str.maketrans({"ي": "ی", "ك": "ک", "‌": " "})
+
+
+def normalize_skill(skill: str) -> str:
+    return " ".join(str(skill).translate(_PERSIAN).lower().split())
+
+
+_ALIASES: dict[str, str] = {}
+for _canonical, _names in SKILL_ALIASES.items():
+    _ALIASES[normalize_skill(_canonical)] = _canonical
+    for _name in _names:
+        _ALIASES[normalize_skill(_name)] = _canonical
+
+
+def _typo_of(name: str, alias: str) -> bool:
+    # Word by word, so "data analyst" is not taken for a misspelled "data analysis"
+    words, alias_words = name.split(), alias.split()
+    return len(words) == len(alias_words) and all(
+        difflib.SequenceMatcher(None, word, alias_word).ratio() >= config.skill_fuzzy_cutoff
+        for word, alias_word in zip(words, alias_words)
+    )
+
+
+@lru_cache(maxsize=20000)
+def canonical_skill(skill: str) -> str:
+    """
+    Canonical id of a skill: alias lookup, then the name without its version, then a fuzzy
+    match against the aliases (`skill_fuzzy_cutoff`, for the whole name and each of its words),
+    which only catches misspellings. Unknown skills keep their normalized name.
+    """
+    name = normalize_skill(skill)
+    if name in _ALIASES:
+        return _ALIASES[name]
+    unversioned = _VERSION.sub("", name)
+    if unversioned and unversioned in _ALIASES:
+        return _ALIASES[unversioned]
+    # Short names are too ambiguous to match fuzzily ("go" vs "git")
+    if len(name) >= 4 and config.skill_fuzzy_cutoff < 1:
+        for match in difflib.get_close_matches(name, _ALIASES.keys(), n=3, cutoff=config.skill_fuzzy_cutoff):
+            if _typo_of(name, match):
+                return _ALIASES[match]
+    return name
+
+
+def canonical_skills(skills) -> list[str]:
+    return sorted({canonical_skill(s) for s in skills if s and str(s).strip()})